@@ -1,33 +1,39 @@
-import pandas as pd
-import time
-import hashlib
+"""Signal alert watcher.
+
+Wakes on filesystem notifications for the signal journal directory
+(watchdog, when installed) or on a short stat poll otherwise, reads only
+the journal bytes appended since the last offset, and hands new signals
+to every notifier backend concurrently. Signal-to-alert latency is
+measured from the journal's `written_at` stamp.
+
+Run from the live_trader directory:
+    python alert_system.py [--no-sound] [--webhook URL] [--poll]
+"""
 import os
+import json
+import time
+import asyncio
+import argparse
 import platform
 import subprocess
-import glob
+import urllib.request
 from datetime import datetime
+from storage.signal_journal import JournalReader, latest_journal, JOURNAL_DIR
 
-DATA_DIR = "./data/signal_exports/"
-seen_hashes = set()
-last_file_size = 0
-last_mtime = 0
-current_csv = None
-
-print("🔍 Starting signal export watcher...")
-print(f"📂 Monitoring directory: {DATA_DIR}")
+# === Optional filesystem notifications ===
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+    WATCHDOG_AVAILABLE = False
 
-def get_latest_csv():
-    """Find the newest CSV file in signal_exports directory"""
-    csv_files = glob.glob(os.path.join(DATA_DIR, "*.csv"))
-    if not csv_files:
-        return None
-    return max(csv_files, key=os.path.getmtime)
-
-def row_hash(row):
-    """Generate a unique hash for a row"""
-    return hashlib.sha256(
-        "|".join(str(x) for x in row).encode()
-    ).hexdigest()
+DATA_DIR = JOURNAL_DIR
+POLL_INTERVAL = 0.5  # seconds between stat() checks without watchdog
+NOTIFY_TIMEOUT = 10
+LATENCY_REPORT_EVERY = 20  # alerts between latency summaries
 
 def play_alert():
     """Cross-platform alert sound"""
@@ -52,95 +58,187 @@ def format_alert(row):
     action = row.get('signal', row.get('action', 'UNKNOWN')).upper()
     color_code = ""
     reset_code = ""
-    
+
     # Add color if supported (not Windows)
     if platform.system() != 'Windows':
         color_code = "\033[93m" if "BUY" in action else "\033[91m"
         reset_code = "\033[0m"
-    
+
     return (
         f"{color_code}🚨 NEW SIGNAL AT {datetime.now().strftime('%H:%M:%S')}{reset_code}\n"
         f"Symbol: {row.get('symbol', 'N/A')}\n"
         f"Action: {color_code}{action}{reset_code}\n"
         f"position: {row.get('position', 'N/A')}\n"
         f"price: {row.get('price', 'N/A')}\n"
-        f"Confidence: {row.get('confidence', 0.0)*100:.1f}%\n"
+        f"Confidence: {(row.get('confidence') or 0.0)*100:.1f}%\n"
         f"Timestamp: {row.get('timestamp', 'N/A')}\n"
-        f"Reason: {row.get('reason', 'No reason provided')}"
+        f"Reason: {row.get('reason') or row.get('exit_reason') or 'No reason provided'}"
     )
 
-while True:
-    try:
-        # Find latest CSV file in signal_exports
-        latest_csv = get_latest_csv()
-        
-        if not latest_csv:
-            print(f"⚠️ No CSV files found in {DATA_DIR}")
-            time.sleep(5)
-            continue
-            
-        # Switch to new file if detected
-        if current_csv != latest_csv:
-            print(f"📁 New file detected: {os.path.basename(latest_csv)}")
-            seen_hashes = set()  # Reset seen hashes for new file
-            last_file_size = 0
-            last_mtime = 0
-            current_csv = latest_csv
-        
-        # Check if file has changed
-        current_size = os.path.getsize(current_csv)
-        current_mtime = os.path.getmtime(current_csv)
-        
-        # Skip processing if file hasn't changed
-        if current_size == last_file_size and current_mtime == last_mtime:
-            time.sleep(5)
-            continue
-            
-        last_file_size = current_size
-        last_mtime = current_mtime
-        
-        # Read CSV with error handling
+# === Notifier backends ===
+class ConsoleNotifier:
+    """Prints the alert block, as the watcher always has"""
+
+    async def notify(self, rows, source):
+        clear_screen()
+        print(f"📁 Active file: {os.path.basename(source)}")
+        print(f"🚨 {len(rows)} NEW SIGNAL(S) DETECTED (up to #{rows[-1].get('seq')})")
+        print("="*50)
+        for row in rows:
+            print("\n" + format_alert(row))
+            print("-"*50)
+        print("="*50)
+
+class SoundNotifier:
+    """One alert sound per batch, played off the event loop"""
+
+    async def notify(self, rows, source):
+        await asyncio.to_thread(play_alert)
+
+class WebhookNotifier:
+    """POSTs each batch as JSON ({"signals": [...]}) to a webhook URL"""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def _post(self, payload):
+        request = urllib.request.Request(self.url, data=payload, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return response.status
+
+    async def notify(self, rows, source):
+        await asyncio.to_thread(self._post, json.dumps({'signals': rows}).encode())
+
+async def dispatch(notifiers, rows, source):
+    """Run every backend concurrently; one failing or slow backend does not block the others"""
+    results = await asyncio.gather(
+        *(asyncio.wait_for(notifier.notify(rows, source), NOTIFY_TIMEOUT) for notifier in notifiers),
+        return_exceptions=True
+    )
+    for notifier, result in zip(notifiers, results):
+        if isinstance(result, BaseException):
+            print(f"⚠️ {type(notifier).__name__} failed: {result!r}")
+
+# === Latency ===
+class LatencyTracker:
+    """Seconds from a signal being journaled to it being detected and to its alerts completing"""
+
+    def __init__(self):
+        self.detected = []
+        self.alerted = []
+
+    def record(self, written_at, detected_at, alerted_at):
+        self.detected.append(detected_at - written_at)
+        self.alerted.append(alerted_at - written_at)
+
+    def summary(self):
+        def stats(values):
+            ordered = sorted(values)
+            pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+            return f"p50 {pick(0.5) * 1000:.0f} ms, p95 {pick(0.95) * 1000:.0f} ms, max {ordered[-1] * 1000:.0f} ms"
+        return f"{len(self.alerted)} alerts | detect {stats(self.detected)} | alert {stats(self.alerted)}"
+
+# === Change notification ===
+class _JournalEvents(FileSystemEventHandler):
+    def __init__(self, loop, changed):
+        self.loop = loop
+        self.changed = changed
+
+    def on_any_event(self, event):
+        # Called on the observer thread
+        self.loop.call_soon_threadsafe(self.changed.set)
+
+class JournalWatcher:
+    """Waits for the journal directory to change: filesystem events, or a stat poll as fallback"""
+
+    def __init__(self, directory, poll_interval=POLL_INTERVAL, use_events=WATCHDOG_AVAILABLE):
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.use_events = use_events and WATCHDOG_AVAILABLE
+        self.changed = asyncio.Event()
+        self.observer = None
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        if self.use_events:
+            self.observer = Observer()
+            self.observer.schedule(_JournalEvents(asyncio.get_running_loop(), self.changed), self.directory)
+            self.observer.start()
+        print(f"👀 Watching {self.directory} via {'filesystem events' if self.use_events else f'{self.poll_interval}s polling'}")
+
+    async def wait(self):
+        if not self.use_events:
+            await asyncio.sleep(self.poll_interval)
+            return
         try:
-            df = pd.read_csv(current_csv)
-        except pd.errors.EmptyDataError:
-            print(f"⚠️ CSV file is empty: {os.path.basename(current_csv)}")
-            time.sleep(5)
-            continue
-        except pd.errors.ParserError:
-            print(f"⚠️ Error parsing CSV: {os.path.basename(current_csv)}")
-            time.sleep(5)
-            continue
-            
-        # Skip if no data
-        if df.empty:
-            time.sleep(5)
-            continue
-            
-        # Compute hashes and find new rows
-        current_hashes = set(df.apply(row_hash, axis=1))
-        new_hashes = current_hashes - seen_hashes
-        
-        if new_hashes:
-            clear_screen()
-            new_rows = df[df.apply(lambda row: row_hash(row) in new_hashes, axis=1)]
-            
-            print(f"📁 Active file: {os.path.basename(current_csv)}")
-            print(f"🚨 {len(new_rows)} NEW SIGNAL(S) DETECTED")
-            print("="*50)
-            for _, row in new_rows.iterrows():
-                print("\n" + format_alert(row))
-                print("-"*50)
-            print("="*50)
-                
-            play_alert()
-            seen_hashes.update(new_hashes)
-            
-        time.sleep(3)  # Slightly faster polling
-
-    except Exception as e:
-        print(f"[CRITICAL ERROR] {e}")
-        import traceback
-        traceback.print_exc()
-        time.sleep(10)
-
-        
\ No newline at end of file
+            # The timeout only guards against a missed event
+            await asyncio.wait_for(self.changed.wait(), 5)
+        except asyncio.TimeoutError:
+            pass
+        self.changed.clear()
+
+    def stop(self):
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer.join()
+
+async def watch(notifiers, directory=DATA_DIR, poll_interval=POLL_INTERVAL, use_events=True):
+    """Alert on every signal appended to the newest journal"""
+    watcher = JournalWatcher(directory, poll_interval, use_events)
+    watcher.start()
+    latency = LatencyTracker()
+    started = time.time()
+    next_report = LATENCY_REPORT_EVERY
+    reader = None
+    try:
+        while True:
+            try:
+                latest = latest_journal(directory)
+                # Switch to new file if detected (a new run starts a new journal)
+                if latest and (reader is None or reader.path != latest):
+                    print(f"📁 New file detected: {os.path.basename(latest)}")
+                    reader = JournalReader(latest)
+
+                # Only the bytes appended since the last read are parsed
+                rows = reader.poll() if reader else []
+                if rows:
+                    detected_at = time.time()
+                    await dispatch(notifiers, rows, reader.path)
+                    alerted_at = time.time()
+                    for row in rows:
+                        # Signals journaled before the watcher started are backlog, not latency
+                        if row.get('written_at', 0) >= started:
+                            latency.record(row['written_at'], detected_at, alerted_at)
+                    if len(latency.alerted) >= next_report:
+                        print(f"⏱️ Latency: {latency.summary()}")
+                        next_report += LATENCY_REPORT_EVERY
+            except Exception as e:
+                print(f"[CRITICAL ERROR] {e}")
+                import traceback
+                traceback.print_exc()
+                await asyncio.sleep(10)
+            await watcher.wait()
+    finally:
+        watcher.stop()
+        if latency.alerted:
+            print(f"⏱️ Latency: {latency.summary()}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alert on new trading signals")
+    parser.add_argument("--no-sound", action="store_true", help="disable the alert sound")
+    parser.add_argument("--webhook", action="append", default=[], help="also POST alerts to this URL (repeatable)")
+    parser.add_argument("--poll", action="store_true", help="poll instead of using filesystem events")
+    args = parser.parse_args()
+
+    notifiers = [ConsoleNotifier()]
+    if not args.no_sound:
+        notifiers.append(SoundNotifier())
+    notifiers += [WebhookNotifier(url) for url in args.webhook]
+
+    print("🔍 Starting signal journal watcher...")
+    print(f"📂 Monitoring directory: {DATA_DIR}")
+    try:
+        asyncio.run(watch(notifiers, use_events=not args.poll))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,169 @@
+"""Deterministic offline replay of the live strategy over recorded candles.
+
+Each step sets the replay clock to the next bar close, then runs the live
+pipeline for every instrument: backfill_intraday_data() against a
+ReplayBroker, the incremental indicator update, and handle_position_logic().
+Nothing sleeps, so a month of 5-minute bars replays in seconds.
+
+Run from the live_trader directory:
+    python -m backtest.replay candles.csv --start "2025-06-02 09:15" --out signals.csv
+"""
+import os
+import time
+import logging
+import argparse
+import asyncio
+import contextlib
+import pandas as pd
+import clock
+from instrument_manager import init_instrument_data
+from data_ingestion.intraday_data import backfill_intraday_data
+from computation.indicators import compute_indicators_for_instrument
+from computation.incremental import IncrementalIndicators
+from decision import monitoring
+from decision.monitoring import handle_position_logic
+from backtest.replay_broker import ReplayBroker
+
+CANDLE_FILE_COLUMNS = ['instrument_token', 'symbol', 'date', 'open', 'high', 'low', 'close', 'volume']
+# Replay parameters: module constants of decision.monitoring, and IncrementalIndicators arguments
+STRATEGY_PARAMS = ['EXIT_BUFFER', 'REENTRY_COST', 'MIN_HOLD_DURATION', 'REENTRY_WINDOW']
+INDICATOR_PARAMS = ['period', 'multiplier', 'length']
+
+
+def save_candles(instrument_data, path):
+    """Record every instrument's intraday candles to one CSV (the replay input format)"""
+    frames = []
+    for token, data in instrument_data.items():
+        store = data['candles']['intraday']
+        if not len(store):
+            continue
+        df = store.frame()[['date', 'open', 'high', 'low', 'close', 'volume']].copy()
+        df.insert(0, 'symbol', data['symbol'])
+        df.insert(0, 'instrument_token', token)
+        frames.append(df)
+    if frames:
+        pd.concat(frames).to_csv(path, index=False)
+    return sum(len(df) for df in frames)
+
+
+def load_candles(path):
+    """Read a recorded candle CSV into ({token: candles DataFrame}, {token: symbol})"""
+    df = pd.read_csv(path, parse_dates=['date'])
+    candles, symbols = {}, {}
+    for token, group in df.groupby('instrument_token', sort=False):
+        token = int(token)
+        candles[token] = group.drop(columns=['instrument_token', 'symbol']).reset_index(drop=True)
+        symbols[token] = group['symbol'].iloc[0]
+    return candles, symbols
+
+
+def collect_signals(instrument_data):
+    """All instruments' signals in one DataFrame, as export_signals writes them"""
+    frames = []
+    for token, data in instrument_data.items():
+        signals = data['signals']
+        if len(signals):
+            df = signals.frame().copy()
+            df['instrument_token'] = token
+            df['symbol'] = data['symbol']
+            frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=['timestamp', 'action', 'position', 'price', 'price_source',
+                                     'exit_reason', 'instrument_token', 'symbol'])
+    return pd.concat(frames, ignore_index=True).sort_values('timestamp', kind='stable', ignore_index=True)
+
+
+@contextlib.contextmanager
+def strategy_params(params):
+    """Temporarily override decision.monitoring constants (EXIT_BUFFER, ...) named in `params`"""
+    overrides = {name: params[name] for name in STRATEGY_PARAMS if name in params}
+    previous = {name: getattr(monitoring, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(monitoring, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(monitoring, name, value)
+
+
+@contextlib.contextmanager
+def silenced(enabled=True):
+    """Drop the pipeline's per-update prints and INFO logs during a replay"""
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        logging.disable(logging.INFO)
+        try:
+            yield
+        finally:
+            logging.disable(logging.NOTSET)
+
+
+async def run_replay(candles, symbols, start=None, end=None, spread=0.0, quiet=True, params=None):
+    """Replay candles bar by bar through ingestion -> indicators -> decisions.
+
+    Bars before `start` only warm up the candle stores and indicators; the
+    decision logic runs once per bar close from `start` to `end`, seeing the
+    closed bar as the last row and its close as the live price. `params`
+    overrides any of STRATEGY_PARAMS and INDICATOR_PARAMS for this run.
+    Returns (signals DataFrame, instrument_data).
+    """
+    params = params or {}
+    indicator_args = {name: params[name] for name in INDICATOR_PARAMS if name in params}
+    broker = ReplayBroker(candles, symbols, spread=spread)
+    replay_clock = clock.ReplayClock()
+    previous = clock.set_clock(replay_clock)
+    instrument_data = {}
+    for token, symbol in symbols.items():
+        init_instrument_data(token, symbol, registry=instrument_data)
+        if indicator_args:
+            instrument_data[token]['indicators']['intraday'] = IncrementalIndicators(**indicator_args)
+
+    start = pd.Timestamp(start).to_pydatetime() if start is not None else None
+    end = pd.Timestamp(end).to_pydatetime() if end is not None else None
+    try:
+        with silenced(quiet), strategy_params(params):
+            for step in broker.bar_closes():
+                if end is not None and step > end:
+                    break
+                replay_clock.set(step)
+                for token, data in instrument_data.items():
+                    await backfill_intraday_data(broker, token, instrument_data)
+                    if data['versions']['intraday'] != data['computed_versions']['intraday']:
+                        compute_indicators_for_instrument(instrument_data, token, 'intraday')
+                        data['computed_versions']['intraday'] = data['versions']['intraday']
+                    if start is None or step >= start:
+                        await handle_position_logic(broker, instrument_data, token)
+    finally:
+        clock.set_clock(previous)
+    return collect_signals(instrument_data), instrument_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded 5-minute candles through the live strategy")
+    parser.add_argument("candles", help="CSV with columns " + ", ".join(CANDLE_FILE_COLUMNS))
+    parser.add_argument("--start", help="first bar close to trade on (earlier bars are warm-up)")
+    parser.add_argument("--end", help="last bar close to replay")
+    parser.add_argument("--spread", type=float, default=0.0, help="bid/ask spread around the bar close")
+    parser.add_argument("--out", help="write the signals to this CSV")
+    args = parser.parse_args()
+
+    candles, symbols = load_candles(args.candles)
+    started = time.perf_counter()
+    signals, _ = asyncio.run(run_replay(candles, symbols, args.start, args.end, args.spread))
+    elapsed = time.perf_counter() - started
+
+    bars = sum(len(df) for df in candles.values())
+    print(f"⏩ Replayed {bars} bars for {len(candles)} instruments in {elapsed:.1f}s ({bars / elapsed:.0f} bars/s)")
+    print(f"📈 {len(signals)} signals")
+    if args.out:
+        signals.to_csv(args.out, index=False)
+        print(f"✅ Signals written to {args.out}")
+    else:
+        print(signals.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import datetime
+import numpy as np
+import pandas as pd
+import clock
+from candle_store import EXCHANGE_TZ
+from data_ingestion.candle_builder import INTERVAL_MINUTES
+
+
+def _naive_ist(dates):
+    """Candle dates as naive IST timestamps (Kite returns tz-aware ones)"""
+    dates = pd.DatetimeIndex(pd.to_datetime(dates))
+    if dates.tz is not None:
+        dates = dates.tz_convert(EXCHANGE_TZ).tz_localize(None)
+    return dates
+
+
+class ReplayBroker:
+    """Offline stand-in for AsyncKiteClient that serves recorded candles.
+
+    `candles` maps instrument token -> DataFrame (date/open/high/low/close/volume)
+    and `symbols` maps token -> "EXCHANGE:TRADINGSYMBOL". Only bars that have
+    closed by the replay clock are visible: historical_data() returns them,
+    and quote() answers with the last closed bar's close as LTP and a fixed
+    `spread` around it as best bid/ask.
+    """
+
+    def __init__(self, candles, symbols, interval='5minute', spread=0.0):
+        self.interval = interval
+        self.bar_length = datetime.timedelta(minutes=INTERVAL_MINUTES[interval])
+        self.spread = spread
+        self.tokens = {symbol: token for token, symbol in symbols.items()}
+        self.records = {}
+        self.closes_ns = {}
+        for token, df in candles.items():
+            df = df.sort_values('date')
+            dates = _naive_ist(df['date'])
+            records = df[['open', 'high', 'low', 'close', 'volume']].to_dict('records')
+            for record, date in zip(records, dates):
+                record['date'] = date
+            self.records[token] = records
+            self.closes_ns[token] = (dates + self.bar_length).as_unit('ns').asi8
+        self.stats = {'historical_data': 0, 'quote': 0}
+
+    def bar_closes(self):
+        """Every distinct bar close time across all instruments, in order"""
+        if not self.closes_ns:
+            return []
+        closes = np.unique(np.concatenate(list(self.closes_ns.values())))
+        return list(pd.to_datetime(closes).to_pydatetime())
+
+    def _closed(self, token):
+        """Number of bars closed by the replay clock"""
+        return int(np.searchsorted(self.closes_ns[token], pd.Timestamp(clock.now()).value, side='right'))
+
+    async def historical_data(self, token, from_date, to_date, interval='5minute', **kwargs):
+        self.stats['historical_data'] += 1
+        if interval != self.interval or token not in self.records:
+            return []
+        closes = self.closes_ns[token]
+        first = int(np.searchsorted(closes, (pd.Timestamp(from_date) + self.bar_length).value, side='left'))
+        last = min(self._closed(token), int(np.searchsorted(closes, (pd.Timestamp(to_date) + self.bar_length).value, side='right')))
+        return self.records[token][first:last]
+
+    async def quote(self, symbols):
+        self.stats['quote'] += 1
+        symbols = [symbols] if isinstance(symbols, str) else symbols
+        quotes = {}
+        for symbol in symbols:
+            token = self.tokens.get(symbol)
+            closed = self._closed(token) if token in self.records else 0
+            if not closed:
+                continue
+            bar = self.records[token][closed - 1]
+            price = bar['close']
+            quotes[symbol] = {
+                'last_price': price,
+                'volume': bar['volume'],
+                'depth': {
+                    'buy': [{'price': price - self.spread / 2, 'quantity': 0, 'orders': 0}],
+                    'sell': [{'price': price + self.spread / 2, 'quantity': 0, 'orders': 0}],
+                },
+            }
+        return quotes
+
+    def close(self):
+        pass
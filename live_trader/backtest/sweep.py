@@ -0,0 +1,223 @@
+"""Parameter sweep of the live strategy over recorded candles.
+
+Every parameter set replays all instruments through backtest.replay in a
+ProcessPoolExecutor worker. The candle history is packed once into
+shared memory (dates plus an OHLCV matrix) and each worker attaches to it
+at start-up, so tasks carry only their parameter dict.
+
+Run from the live_trader directory:
+    python -m backtest.sweep candles.csv --start "2025-06-02 09:15" --random 50 --out sweep.csv
+
+PnL is in price points per unit (no lot sizes or costs). The decision
+logic reads only the Supertrend columns, so `length` (Fisher) does not
+change results until the Fisher signal is wired in.
+"""
+import os
+import time
+import random
+import asyncio
+import argparse
+import datetime
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from config import exchange_symbol_token_map
+from candle_store import EXCHANGE_TZ
+from backtest.replay import load_candles, run_replay
+
+OHLCV = ['open', 'high', 'low', 'close', 'volume']
+
+# Values tried per parameter; the live values come first
+DEFAULT_GRID = {
+    'EXIT_BUFFER': [100, 50, 150, 200],
+    'REENTRY_COST': [300, 150, 450],
+    'MIN_HOLD_DURATION': [datetime.timedelta(minutes=m) for m in (5, 10, 15)],
+    'REENTRY_WINDOW': [datetime.timedelta(minutes=m) for m in (15, 30)],
+    'period': [10, 7, 14],
+    'multiplier': [3, 2, 4],
+    'length': [10],
+}
+
+
+def configured_tokens():
+    """Instrument tokens listed in config.exchange_symbol_token_map"""
+    return {token for symbols in exchange_symbol_token_map.values() for token in symbols.values()}
+
+
+def parameter_sets(grid, samples=None, seed=0):
+    """Full grid, or `samples` distinct random picks from it"""
+    names = list(grid)
+    combos = list(itertools.product(*(grid[name] for name in names)))
+    if samples is not None and samples < len(combos):
+        combos = random.Random(seed).sample(combos, samples)
+    return [dict(zip(names, combo)) for combo in combos]
+
+
+# === Shared-memory candles ===
+def _utc_ns(dates):
+    """Candle dates as UTC int64 nanoseconds (naive dates are exchange-local, as Kite/CSV records are)"""
+    dates = pd.DatetimeIndex(pd.to_datetime(dates))
+    if dates.tz is None:
+        dates = dates.tz_localize(EXCHANGE_TZ)
+    return dates.as_unit('ns').asi8
+
+
+def pack_candles(candles):
+    """Copy every instrument's candles into two shared-memory blocks.
+
+    Returns (blocks, layout): `blocks` must stay referenced (and be unlinked)
+    by the parent; `layout` is the picklable description workers attach with.
+    """
+    tokens = list(candles)
+    lengths = [len(candles[token]) for token in tokens]
+    total = sum(lengths)
+    dates = shared_memory.SharedMemory(create=True, size=max(1, total * 8))
+    values = shared_memory.SharedMemory(create=True, size=max(1, total * len(OHLCV) * 8))
+    date_array = np.ndarray((total,), dtype=np.int64, buffer=dates.buf)
+    value_array = np.ndarray((total, len(OHLCV)), dtype=np.float64, buffer=values.buf)
+
+    spans = {}
+    begin = 0
+    for token, n in zip(tokens, lengths):
+        df = candles[token]
+        date_array[begin:begin + n] = _utc_ns(df['date'])
+        value_array[begin:begin + n] = df[OHLCV].to_numpy(dtype=np.float64)
+        spans[token] = (begin, begin + n)
+        begin += n
+    del date_array, value_array
+    layout = {'dates': dates.name, 'values': values.name, 'total': total, 'spans': spans}
+    return [dates, values], layout
+
+
+_worker = {}
+
+
+def _attach(layout, symbols, start, end, spread):
+    """Worker initializer: map the shared candle blocks and build per-instrument frames over them"""
+    dates = shared_memory.SharedMemory(name=layout['dates'])
+    values = shared_memory.SharedMemory(name=layout['values'])
+    date_array = np.ndarray((layout['total'],), dtype=np.int64, buffer=dates.buf)
+    value_array = np.ndarray((layout['total'], len(OHLCV)), dtype=np.float64, buffer=values.buf)
+    candles = {}
+    for token, (begin, stop) in layout['spans'].items():
+        frame = {'date': pd.to_datetime(date_array[begin:stop], utc=True).tz_convert(EXCHANGE_TZ)}
+        for i, name in enumerate(OHLCV):
+            frame[name] = value_array[begin:stop, i]
+        candles[token] = pd.DataFrame(frame, copy=False)
+    _worker.update(blocks=[dates, values], candles=candles, symbols=symbols, start=start, end=end, spread=spread)
+
+
+def _evaluate(params):
+    """Worker task: replay every instrument with `params` and score the signals"""
+    signals, instrument_data = asyncio.run(run_replay(
+        _worker['candles'], _worker['symbols'], _worker['start'], _worker['end'],
+        _worker['spread'], params=params
+    ))
+    last_prices = {token: float(df['close'].iloc[-1]) for token, df in _worker['candles'].items() if len(df)}
+    return params, score_signals(signals, last_prices)
+
+
+# === Scoring ===
+def score_signals(signals, last_prices):
+    """Round-trip trades from a signals DataFrame: PnL, max drawdown, trade count, win rate.
+
+    ENTRY/REENTRY opens a position and EXIT closes it; a position still open
+    at the end is marked to the instrument's last close.
+    """
+    realized = []
+    open_pnl = 0.0
+    for token, group in signals.groupby('instrument_token', sort=False):
+        entry = None
+        for signal in group.itertuples(index=False):
+            if signal.action in ('ENTRY', 'REENTRY'):
+                entry = signal
+            elif signal.action == 'EXIT' and entry is not None:
+                sign = 1 if entry.position == 'LONG' else -1
+                realized.append((signal.timestamp, sign * (signal.price - entry.price)))
+                entry = None
+        if entry is not None and token in last_prices:
+            sign = 1 if entry.position == 'LONG' else -1
+            open_pnl += sign * (last_prices[token] - entry.price)
+
+    realized.sort(key=lambda trade: trade[0])
+    pnl = np.array([trade[1] for trade in realized], dtype=np.float64)
+    equity = np.concatenate([[0.0], np.cumsum(pnl)])
+    drawdown = float(np.max(np.maximum.accumulate(equity) - equity))
+    return {
+        'pnl': float(pnl.sum()) + open_pnl,
+        'realized_pnl': float(pnl.sum()),
+        'open_pnl': open_pnl,
+        'max_drawdown': drawdown,
+        'trades': len(pnl),
+        'win_rate': float((pnl > 0).mean()) if len(pnl) else np.nan,
+        'avg_trade': float(pnl.mean()) if len(pnl) else np.nan,
+    }
+
+
+def _format_params(params):
+    return {name: value.total_seconds() / 60 if isinstance(value, datetime.timedelta) else value
+            for name, value in params.items()}
+
+
+def run_sweep(candles, symbols, param_sets, start=None, end=None, spread=0.0, workers=None):
+    """Evaluate every parameter set in a process pool; returns the ranked results table"""
+    blocks, layout = pack_candles(candles)
+    rows = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                 initargs=(layout, symbols, start, end, spread)) as pool:
+            futures = [pool.submit(_evaluate, params) for params in param_sets]
+            for done, future in enumerate(as_completed(futures), start=1):
+                params, stats = future.result()
+                rows.append({**_format_params(params), **stats})
+                print(f"🔁 {done}/{len(futures)} pnl={stats['pnl']:.1f} trades={stats['trades']}")
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    table = pd.DataFrame(rows)
+    if table.empty:
+        return table
+    return table.sort_values(['pnl', 'max_drawdown'], ascending=[False, True], ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep strategy parameters over recorded candles")
+    parser.add_argument("candles", help="recorded candle CSV (see backtest.replay)")
+    parser.add_argument("--start", help="first bar close to trade on (earlier bars are warm-up)")
+    parser.add_argument("--end", help="last bar close to replay")
+    parser.add_argument("--spread", type=float, default=0.0, help="bid/ask spread around the bar close")
+    parser.add_argument("--random", type=int, help="evaluate this many random grid points instead of the full grid")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--all-instruments", action="store_true",
+                        help="use every instrument in the file, not only those in exchange_symbol_token_map")
+    parser.add_argument("--out", help="write the ranked table to this CSV")
+    args = parser.parse_args()
+
+    candles, symbols = load_candles(args.candles)
+    if not args.all_instruments:
+        wanted = configured_tokens()
+        candles = {token: df for token, df in candles.items() if token in wanted}
+        symbols = {token: symbols[token] for token in candles}
+    if not candles:
+        print("⚠️ No candles for the configured instruments (use --all-instruments to sweep the whole file)")
+        return
+
+    param_sets = parameter_sets(DEFAULT_GRID, args.random, args.seed)
+    print(f"🧪 {len(param_sets)} parameter sets x {len(candles)} instruments on {args.workers} workers")
+    started = time.perf_counter()
+    table = run_sweep(candles, symbols, param_sets, args.start, args.end, args.spread, args.workers)
+    print(f"⏱️ Sweep finished in {time.perf_counter() - started:.1f}s")
+
+    print(table.head(20).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    if args.out:
+        table.to_csv(args.out, index=False)
+        print(f"✅ Ranked results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
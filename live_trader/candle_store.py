@@ -0,0 +1,226 @@
+import numpy as np
+import pandas as pd
+
+CANDLE_COLUMNS = {'open': np.float64, 'high': np.float64, 'low': np.float64, 'close': np.float64, 'volume': np.int64}
+EXCHANGE_TZ = 'Asia/Kolkata'
+
+# Capacities cover the 30-day intraday / 50-day daily history windows with headroom
+INTRADAY_CAPACITY = 10_000
+DAILY_CAPACITY = 1_000
+
+
+def _fill_value(dtype):
+    """Placeholder for a not-yet-written cell: NaN, or 0 for integer columns"""
+    return np.nan if np.dtype(dtype).kind == 'f' else 0
+
+
+def _allocate(size, dtype):
+    return np.full(size, _fill_value(dtype), dtype=dtype)
+
+
+class CandleStore:
+    """Fixed-capacity columnar candle buffer.
+
+    Columns are preallocated NumPy arrays of twice the capacity; rows live
+    in [start, end) and when the write cursor reaches the end the newest
+    `capacity - 1` rows are copied to the front of fresh arrays. That keeps
+    every column a contiguous slice (so views are zero-copy) at amortised
+    O(1) per append.
+
+    Rows are addressed two ways: local indexes 0..len-1 into the current
+    views, and absolute indexes that keep counting across evictions
+    (absolute = offset + local). `revision` only moves when a bar other than
+    the last one is rewritten or inserted, so readers holding state up to
+    the last bar can tell an append/revise-last from a historical revision.
+    Views returned by column()/frame() see later writes to their rows
+    until the store compacts (`compactions` moves); from then on they are
+    a frozen snapshot of the rows they were taken over, never shifted
+    data. Readers that must follow new bars take a fresh view per update
+    (as data['intraday'] is republished on every indicator recompute).
+    """
+
+    def __init__(self, capacity=INTRADAY_CAPACITY, tz=EXCHANGE_TZ):
+        self.capacity = capacity
+        self.tz = tz
+        self._dates = np.zeros(2 * capacity, dtype=np.int64)
+        self._columns = {name: _allocate(2 * capacity, dtype) for name, dtype in CANDLE_COLUMNS.items()}
+        self._start = 0
+        self._end = 0
+        self.offset = 0
+        self.revision = 0
+        self.compactions = 0
+        self._dates_cache = (None, None)
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def end(self):
+        """Absolute index one past the last row"""
+        return self.offset + len(self)
+
+    def clear(self):
+        """Drop all rows and derived columns"""
+        self._columns = {name: _allocate(2 * self.capacity, dtype) for name, dtype in CANDLE_COLUMNS.items()}
+        self._start = self._end = 0
+        self.offset = 0
+        self.revision += 1
+
+    # === Writes ===
+    def _to_ns(self, date):
+        ts = pd.Timestamp(date)
+        if ts.tzinfo is None:
+            ts = ts.tz_localize(self.tz)
+        return ts.value
+
+    def _compact(self):
+        # Fresh arrays instead of an in-place move, so views handed out earlier keep their rows
+        keep = slice(self._start, self._end)
+        n = self._end - self._start
+        dates = np.zeros(len(self._dates), dtype=np.int64)
+        dates[:n] = self._dates[keep]
+        self._dates = dates
+        for name, values in self._columns.items():
+            fresh = _allocate(len(values), values.dtype)
+            fresh[:n] = values[keep]
+            self._columns[name] = fresh
+        self._start, self._end = 0, n
+        self.compactions += 1
+
+    def _make_room(self):
+        if len(self) == self.capacity:
+            self._start += 1
+            self.offset += 1
+        if self._end == len(self._dates):
+            self._compact()
+
+    def _write_row(self, i, row):
+        changed = False
+        for name, value in row.items():
+            column = self._columns[name]
+            if column[i] != value:
+                column[i] = value
+                changed = True
+        return changed
+
+    def upsert(self, date, open, high, low, close, volume=0):
+        """Append a bar, or overwrite the bar with the same timestamp"""
+        ts = self._to_ns(date)
+        row = {'open': open, 'high': high, 'low': low, 'close': close, 'volume': volume}
+        last = self._end - 1
+
+        if len(self) and ts == self._dates[last]:
+            self._write_row(last, row)
+            return
+        if not len(self) or ts > self._dates[last]:
+            self._make_room()
+            i = self._end
+            self._end += 1
+            self._dates[i] = ts
+            for values in self._columns.values():
+                values[i] = _fill_value(values.dtype)
+            self._write_row(i, row)
+            return
+
+        # Out-of-order bar: rewrite in place or insert (rare, O(n))
+        i = self._start + int(np.searchsorted(self._dates[self._start:self._end], ts))
+        if self._dates[i] == ts:
+            if self._write_row(i, row):
+                self.revision += 1
+            return
+        self._make_room()
+        i = self._start + int(np.searchsorted(self._dates[self._start:self._end], ts))
+        self._dates[i + 1:self._end + 1] = self._dates[i:self._end]
+        for values in self._columns.values():
+            values[i + 1:self._end + 1] = values[i:self._end]
+            values[i] = _fill_value(values.dtype)
+        self._end += 1
+        self._dates[i] = ts
+        self._write_row(i, row)
+        self.revision += 1
+
+    def upsert_many(self, candles):
+        """Upsert Kite-style candle dicts (date/open/high/low/close/volume)"""
+        for candle in candles:
+            self.upsert(candle['date'], candle['open'], candle['high'], candle['low'],
+                        candle['close'], candle.get('volume', 0))
+        return len(candles)
+
+    def extend(self, dates, columns):
+        """Bulk-append bars given as int64 UTC-ns dates and OHLCV arrays (O(n) instead of n upserts)
+
+        Rows not newer than the current last bar go through upsert() so the
+        store stays sorted; the rest are copied in as whole slices.
+        """
+        dates = np.asarray(dates, dtype=np.int64)
+        newer = 0
+        if len(self):
+            newer = int(np.searchsorted(dates, self._dates[self._end - 1], side='right'))
+            for i in range(newer):
+                ts = pd.Timestamp(dates[i], tz='UTC')
+                self.upsert(ts, *(columns[name][i] for name in CANDLE_COLUMNS))
+        skipped = max(0, len(dates) - newer - self.capacity)  # evicted before they ever land
+        dates = dates[newer + skipped:]
+        columns = {name: np.asarray(columns[name])[newer + skipped:] for name in CANDLE_COLUMNS}
+        n = len(dates)
+        if not n:
+            return 0
+
+        self.offset += skipped
+        overflow = len(self) + n - self.capacity
+        if overflow > 0:
+            self._start += overflow
+            self.offset += overflow
+        if self._end + n > len(self._dates):
+            self._compact()
+
+        new = slice(self._end, self._end + n)
+        self._dates[new] = dates
+        for name, values in self._columns.items():
+            values[new] = columns[name] if name in columns else _fill_value(values.dtype)
+        self._end += n
+        return n
+
+    def write(self, name, start, values):
+        """Write a derived column from local row `start` onwards, creating it if needed"""
+        values = np.asarray(values)
+        if name not in self._columns:
+            self._columns[name] = _allocate(2 * self.capacity, np.int64 if values.dtype.kind in 'iub' else np.float64)
+        begin = self._start + start
+        self._columns[name][begin:begin + len(values)] = values
+
+    # === Reads ===
+    def has_column(self, name):
+        return name in self._columns
+
+    def column(self, name):
+        """Zero-copy view of one column"""
+        return self._columns[name][self._start:self._end]
+
+    def __getitem__(self, name):
+        return self.column(name)
+
+    def dates(self):
+        """Bar timestamps as a tz-aware DatetimeIndex (rebuilt only after an append, eviction or insert)"""
+        key = (self.offset, len(self), self.revision)
+        if self._dates_cache[0] != key:
+            index = pd.DatetimeIndex(self._dates[self._start:self._end].view('M8[ns]')).tz_localize('UTC').tz_convert(self.tz)
+            self._dates_cache = (key, index)
+        return self._dates_cache[1]
+
+    def dates_ns(self):
+        """Zero-copy view of the bar timestamps as int64 UTC nanoseconds"""
+        return self._dates[self._start:self._end]
+
+    def last_date(self):
+        """Timestamp of the newest bar, or None when empty"""
+        if not len(self):
+            return None
+        return pd.Timestamp(self._dates[self._end - 1], tz='UTC').tz_convert(self.tz)
+
+    def frame(self):
+        """DataFrame over the stored rows; every column except `date` is a zero-copy view"""
+        data = {'date': self.dates()}
+        for name in self._columns:
+            data[name] = self.column(name)
+        return pd.DataFrame(data, copy=False)
@@ -0,0 +1,53 @@
+import datetime
+
+IST_OFFSET = datetime.timedelta(hours=5, minutes=30)
+
+
+class SystemClock:
+    """Wall-clock time (the default)"""
+
+    def now(self):
+        return datetime.datetime.now()
+
+    def ist_now(self):
+        """Naive IST wall-clock time, independent of the machine's timezone"""
+        return datetime.datetime.now(tz=datetime.timezone.utc).replace(tzinfo=None) + IST_OFFSET
+
+
+class ReplayClock:
+    """Manually driven clock for replays; `now()` and `ist_now()` both return the set time"""
+
+    def __init__(self, start=None):
+        self.current = start or datetime.datetime(1970, 1, 1)
+
+    def now(self):
+        return self.current
+
+    def ist_now(self):
+        return self.current
+
+    def set(self, when):
+        self.current = when
+
+    def advance(self, delta):
+        self.current += delta
+
+
+_clock = SystemClock()
+
+
+def now():
+    """Current time from the active clock (replaces datetime.datetime.now() in trading code)"""
+    return _clock.now()
+
+
+def ist_now():
+    """Current naive IST time from the active clock"""
+    return _clock.ist_now()
+
+
+def set_clock(clock):
+    """Install a clock; returns the previous one so callers can restore it"""
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
@@ -0,0 +1,74 @@
+"""Per-bar cost of the indicator kernels.
+
+Run from the live_trader directory:
+    python -m computation.bench_indicators
+"""
+import time
+import numpy as np
+import pandas as pd
+from computation.kernels import NUMBA_AVAILABLE, fisher_arrays
+from computation.indicators import compute_fisher_transform, compute_supertrend
+from computation.incremental import IncrementalIndicators
+from candle_store import CandleStore
+
+SIZES = [1_000, 10_000, 100_000]
+
+
+def synthetic_candles(n, seed=0):
+    """Random-walk 5-minute candles"""
+    rng = np.random.default_rng(seed)
+    close = 1000 + np.cumsum(rng.normal(0, 5, n))
+    return pd.DataFrame({
+        'date': pd.date_range('2025-01-01 09:15', periods=n, freq='5min'),
+        'open': close,
+        'high': close + rng.random(n) * 8,
+        'low': close - rng.random(n) * 8,
+        'close': close,
+        'volume': rng.integers(100, 1000, n),
+    })
+
+
+def best_of(fn, repeat=3):
+    """Best wall time of `repeat` runs, in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench(n):
+    df = synthetic_candles(n)
+    high = df['high'].to_numpy()
+    low = df['low'].to_numpy()
+
+    fisher_kernel = best_of(lambda: fisher_arrays(high, low))
+    fisher_frame = best_of(lambda: compute_fisher_transform(df))
+    both_frame = best_of(lambda: compute_supertrend(compute_fisher_transform(df)))
+
+    # Append one bar to an already-computed candle store
+    store = CandleStore(capacity=n)
+    records = df.to_dict('records')
+    store.upsert_many(records[:-1])
+    state = IncrementalIndicators()
+    state.update(store)
+    start = time.perf_counter()
+    store.upsert_many(records[-1:])
+    state.update(store)
+    append_one = time.perf_counter() - start
+
+    return {
+        'bars': n,
+        'fisher kernel µs/bar': fisher_kernel / n * 1e6,
+        'fisher frame µs/bar': fisher_frame / n * 1e6,
+        'fisher+supertrend frame µs/bar': both_frame / n * 1e6,
+        'store append + incremental µs': append_one * 1e6,
+    }
+
+
+if __name__ == "__main__":
+    # Warm up (and compile, when Numba is installed) before timing
+    bench(100)
+    print(f"Numba: {'enabled' if NUMBA_AVAILABLE else 'not installed (pure Python loops)'}")
+    print(pd.DataFrame([bench(n) for n in SIZES]).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
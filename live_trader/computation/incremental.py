@@ -0,0 +1,265 @@
+import math
+import numpy as np
+from collections import deque
+from computation.kernels import fisher_arrays
+from computation.indicators import supertrend_columns
+
+SUPERTREND_COLUMNS = ['hl2', 'tr', 'atr', 'upper_band', 'lower_band',
+                      'final_upper_band', 'final_lower_band', 'direction', 'supertrend']
+FISHER_COLUMNS = ['hl2', 'high_hl2', 'low_hl2', 'value', 'fisher', 'trigger']
+
+
+class SupertrendState:
+    """Supertrend/ATR recurrence state after one bar"""
+    __slots__ = ('period', 'multiplier', 'prev_close', 'atr', 'final_upper',
+                 'final_lower', 'direction', 'supertrend', 'tr_window')
+
+    def __init__(self, period=10, multiplier=3, atr_period=14):
+        self.period = period
+        self.multiplier = multiplier
+        self.prev_close = np.nan
+        self.atr = np.nan
+        self.final_upper = np.nan
+        self.final_lower = np.nan
+        self.direction = 1
+        self.supertrend = np.nan
+        self.tr_window = deque(maxlen=atr_period)
+
+    @classmethod
+    def from_columns(cls, columns, i, period=10, multiplier=3, atr_period=14):
+        """Seed state from row i of computed Supertrend columns (name -> array)"""
+        state = cls(period, multiplier, atr_period)
+        state.prev_close = float(columns['close'][i])
+        state.atr = float(columns['atr'][i])
+        state.final_upper = float(columns['final_upper_band'][i])
+        state.final_lower = float(columns['final_lower_band'][i])
+        state.direction = int(columns['direction'][i])
+        state.supertrend = float(columns['supertrend'][i])
+        state.tr_window.extend(columns['tr'][max(0, i - atr_period + 1):i + 1].tolist())
+        return state
+
+    def copy(self):
+        state = SupertrendState(self.period, self.multiplier, self.tr_window.maxlen)
+        for name in self.__slots__[2:-1]:
+            setattr(state, name, getattr(self, name))
+        state.tr_window.extend(self.tr_window)
+        return state
+
+    @property
+    def rolling_atr(self):
+        """Simple-mean ATR over the last atr_period bars, as compute_atr returns"""
+        values = [tr for tr in self.tr_window if tr == tr]
+        if len(self.tr_window) < self.tr_window.maxlen or len(values) < len(self.tr_window):
+            return np.nan
+        return sum(values) / len(values)
+
+    def step(self, high, low, close):
+        """Advance one bar; returns that bar's Supertrend column values"""
+        prev_close = self.prev_close
+        tr = max(high - low, max(abs(high - prev_close), abs(low - prev_close)))
+        alpha = 1 / self.period
+        atr = alpha * tr + (1 - alpha) * self.atr
+
+        hl2 = (high + low) / 2
+        upper = hl2 + self.multiplier * atr
+        lower = hl2 - self.multiplier * atr
+
+        final_upper = upper if (upper < self.final_upper) or (prev_close > self.final_upper) else self.final_upper
+        final_lower = lower if (lower > self.final_lower) or (prev_close < self.final_lower) else self.final_lower
+
+        if close > final_upper:
+            direction = -1
+        elif close < final_lower:
+            direction = 1
+        else:
+            direction = self.direction
+        supertrend = final_lower if direction == -1 else final_upper
+
+        self.prev_close = close
+        self.atr = atr
+        self.final_upper = final_upper
+        self.final_lower = final_lower
+        self.direction = direction
+        self.supertrend = supertrend
+        self.tr_window.append(tr)
+
+        return {
+            'hl2': hl2,
+            'tr': tr,
+            'atr': atr,
+            'upper_band': upper,
+            'lower_band': lower,
+            'final_upper_band': final_upper,
+            'final_lower_band': final_lower,
+            'direction': direction,
+            'supertrend': supertrend,
+        }
+
+
+class FisherState:
+    """Fisher Transform recurrence state after one bar"""
+    __slots__ = ('length', 'hl2_window', 'value', 'fisher')
+
+    def __init__(self, length=10):
+        self.length = length
+        self.hl2_window = deque(maxlen=length)
+        self.value = 0.0
+        self.fisher = 0.0
+
+    @classmethod
+    def from_columns(cls, columns, i, length=10):
+        """Seed state from row i of computed Fisher columns (name -> array)"""
+        state = cls(length)
+        state.hl2_window.extend(columns['hl2'][max(0, i - length + 1):i + 1].tolist())
+        state.value = float(columns['value'][i])
+        state.fisher = float(columns['fisher'][i])
+        return state
+
+    def copy(self):
+        state = FisherState(self.length)
+        state.hl2_window.extend(self.hl2_window)
+        state.value = self.value
+        state.fisher = self.fisher
+        return state
+
+    def step(self, high, low):
+        """Advance one bar; returns that bar's Fisher column values"""
+        hl2 = (high + low) / 2
+        self.hl2_window.append(hl2)
+        high_hl2 = max(self.hl2_window)
+        low_hl2 = min(self.hl2_window)
+
+        denom = high_hl2 - low_hl2 or 1e-9
+        current_val = 0.66 * ((hl2 - low_hl2) / denom - 0.5) + 0.67 * self.value
+        value = min(max(current_val, -0.99), 0.999)
+        trigger = self.fisher
+        fisher = 0.5 * math.log((1 + value) / (1 - value)) + 0.5 * self.fisher
+
+        self.value = value
+        self.fisher = fisher
+
+        return {
+            'hl2': hl2,
+            'high_hl2': high_hl2,
+            'low_hl2': low_hl2,
+            'value': value,
+            'fisher': fisher,
+            'trigger': trigger,
+        }
+
+
+class IncrementalIndicators:
+    """Append-only Fisher/Supertrend state for one instrument's CandleStore.
+
+    The last bar is treated as provisional (the forming candle is revised on
+    every poll), so state is committed at the second-to-last bar. update()
+    re-steps from that commit point over the new bars in O(new bars) and
+    writes the results into the store's indicator columns. It falls back to
+    a full recompute when the store's revision moved (a historical bar was
+    rewritten or inserted), when the commit point was evicted, or when the
+    indicator columns are missing.
+    """
+
+    def __init__(self, fisher=True, supertrend=True, period=10, multiplier=3, length=10, atr_period=14):
+        self.use_fisher = fisher
+        self.use_supertrend = supertrend
+        self.period = period
+        self.multiplier = multiplier
+        self.length = length
+        self.atr_period = atr_period
+        self.reset()
+
+    def reset(self):
+        """Forget all state; the next update recomputes from the first stored bar"""
+        self.rows = 0
+        self.revision = None
+        self.fisher_state = None
+        self.supertrend_state = None
+        self.head_supertrend = None
+        self.full_recomputes = 0
+        self.tail_updates = 0
+
+    @property
+    def columns(self):
+        columns = []
+        if self.use_fisher:
+            columns += FISHER_COLUMNS
+        if self.use_supertrend:
+            columns += [c for c in SUPERTREND_COLUMNS if c not in columns]
+        return columns
+
+    @property
+    def rolling_atr(self):
+        """compute_atr-equivalent ATR at the last bar, or NaN when unavailable"""
+        if self.head_supertrend is None:
+            return np.nan
+        return self.head_supertrend.rolling_atr
+
+    def _can_extend(self, store):
+        if self.rows < 2 or store.revision != self.revision:
+            return False
+        if store.end < self.rows or self.rows - 1 < store.offset:
+            return False
+        return all(store.has_column(column) for column in self.columns)
+
+    def update(self, store):
+        """Bring the store's indicator columns up to date with its candles"""
+        if not self._can_extend(store):
+            self._recompute(store)
+            return
+
+        start = self.rows - 1 - store.offset
+        fisher_state = self.fisher_state.copy() if self.use_fisher else None
+        supertrend_state = self.supertrend_state.copy() if self.use_supertrend else None
+        high = store['high'][start:].tolist()
+        low = store['low'][start:].tolist()
+        close = store['close'][start:].tolist()
+
+        tail = {column: [] for column in self.columns}
+        commit = len(high) - 2
+        for i in range(len(high)):
+            values = {}
+            if fisher_state is not None:
+                values.update(fisher_state.step(high[i], low[i]))
+            if supertrend_state is not None:
+                values.update(supertrend_state.step(high[i], low[i], close[i]))
+            for column in tail:
+                tail[column].append(values[column])
+            if i == commit:
+                self.fisher_state = fisher_state.copy() if fisher_state is not None else None
+                self.supertrend_state = supertrend_state.copy() if supertrend_state is not None else None
+        self.head_supertrend = supertrend_state
+
+        for column, values in tail.items():
+            store.write(column, start, values)
+        self.rows = store.end
+        self.tail_updates += 1
+
+    def _recompute(self, store):
+        """Full recompute over the stored bars, then seed state from the last two"""
+        high = store['high'].astype(np.float64)
+        low = store['low'].astype(np.float64)
+        close = store['close'].astype(np.float64)
+
+        columns = {'close': close}
+        if self.use_fisher:
+            columns.update(fisher_arrays(high, low, self.length))
+        if self.use_supertrend:
+            columns.update(supertrend_columns(high, low, close, self.period, self.multiplier))
+        for column in self.columns:
+            store.write(column, 0, columns[column])
+        self.full_recomputes += 1
+        self.revision = store.revision
+
+        n = len(store)
+        if n < max(self.period, self.length) + 2:
+            self.rows = 0
+            return
+
+        commit = n - 2
+        self.fisher_state = FisherState.from_columns(columns, commit, self.length) if self.use_fisher else None
+        self.supertrend_state = (SupertrendState.from_columns(columns, commit, self.period, self.multiplier, self.atr_period)
+                                 if self.use_supertrend else None)
+        self.head_supertrend = (SupertrendState.from_columns(columns, n - 1, self.period, self.multiplier, self.atr_period)
+                                if self.use_supertrend else None)
+        self.rows = store.end
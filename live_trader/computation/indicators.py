@@ -3,6 +3,9 @@ import numpy as np
 import hashlib
 import logging
 import asyncio
+import time
+from computation.kernels import fisher_arrays, supertrend_arrays, true_range
+from events import data_changed, indicator_listeners
 
 
 
@@ -20,127 +23,113 @@ def compute_atr(df, period=14):
     atr = df['tr'].rolling(window=period).mean()
     return atr.iloc[-1]
 
+def supertrend_columns(high, low, close, period=10, multiplier=3):
+    """Supertrend columns (name -> array) from raw float64 arrays"""
+    # ATR seed uses the same pandas rolling mean as the original loop, over the first window only
+    tr = true_range(high, low, close)
+    atr_seed = pd.Series(tr[:period]).rolling(period, min_periods=1).mean().iloc[-1] if len(tr) >= period else np.nan
+    return supertrend_arrays(high, low, close, tr, atr_seed, period, multiplier)
+
 def compute_supertrend(df, period=10, multiplier=3):
     """Supertrend calculation for a given DataFrame"""
     df = df.copy()
-    # Original supertrend logic preserved
-    df['hl2'] = (df['high'] + df['low']) / 2
-    df['tr'] = np.maximum(
-        df['high'] - df['low'],
-        np.maximum(
-            abs(df['high'] - df['close'].shift(1)),
-            abs(df['low'] - df['close'].shift(1))
-        )
-    )
-    
-    alpha = 1 / period
-    df['atr'] = np.nan
-    sma_initial = df['tr'].rolling(period, min_periods=1).mean()
-    df.loc[period-1, 'atr'] = sma_initial.iloc[period-1]
-    
-    for i in range(period, len(df)):
-        df.at[i, 'atr'] = alpha * df.at[i, 'tr'] + (1 - alpha) * df.at[i-1, 'atr']
-    
-    df['upper_band'] = df['hl2'] + multiplier * df['atr']
-    df['lower_band'] = df['hl2'] - multiplier * df['atr']
-    
-    start_idx = period - 1
-    df['final_upper_band'] = np.nan
-    df['final_lower_band'] = np.nan
-    df.loc[start_idx, ['final_upper_band', 'final_lower_band']] = df.loc[start_idx, ['upper_band', 'lower_band']].values
-    
-    for i in range(start_idx + 1, len(df)):
-        current_upper = df.at[i, 'upper_band']
-        prev_upper = df.at[i-1, 'final_upper_band']
-        prev_close = df.at[i-1, 'close']
-        df.at[i, 'final_upper_band'] = current_upper if (current_upper < prev_upper) or (prev_close > prev_upper) else prev_upper
-        
-        current_lower = df.at[i, 'lower_band']
-        prev_lower = df.at[i-1, 'final_lower_band']
-        df.at[i, 'final_lower_band'] = current_lower if (current_lower > prev_lower) or (prev_close < prev_lower) else prev_lower
-    
-    df['direction'] = 1
-    df['supertrend'] = df['final_upper_band']
-    
-    for i in range(start_idx + 1, len(df)):
-        current_close = df.at[i, 'close']
-        prev_supertrend = df.at[i-1, 'supertrend']
-        
-        if current_close > df.at[i, 'final_upper_band']:
-            df.at[i, 'direction'] = -1
-            df.at[i, 'supertrend'] = df.at[i, 'final_lower_band']
-        elif current_close < df.at[i, 'final_lower_band']:
-            df.at[i, 'direction'] = 1
-            df.at[i, 'supertrend'] = df.at[i, 'final_upper_band']
-        else:
-            df.at[i, 'direction'] = df.at[i-1, 'direction']
-            df.at[i, 'supertrend'] = df.at[i, 'final_lower_band'] if df.at[i, 'direction'] == -1 else df.at[i, 'final_upper_band']
-    
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
+
+    for column, values in supertrend_columns(high, low, close, period, multiplier).items():
+        df[column] = values
     return df
 
 def compute_fisher_transform(df, length=10):
     """Fisher Transform for a given DataFrame"""
     df = df.copy()
-    df['hl2'] = (df['high'] + df['low']) / 2
-    df['high_hl2'] = df['hl2'].rolling(length, min_periods=1).max()
-    df['low_hl2'] = df['hl2'].rolling(length, min_periods=1).min()
-    df['value'] = 0.0
-    df['fisher'] = 0.0
-    df['trigger'] = np.nan
-
-    for i in range(1, len(df)):
-        denom = df.at[i, 'high_hl2'] - df.at[i, 'low_hl2'] or 1e-9
-        current_val = 0.66 * ((df.at[i, 'hl2'] - df.at[i, 'low_hl2']) / denom - 0.5) + 0.67 * df.at[i-1, 'value']
-        df.at[i, 'value'] = min(max(current_val, -0.99), 0.999)
-
-    for i in range(1, len(df)):
-        prev_fisher = df.at[i-1, 'fisher']
-        current_val = df.at[i, 'value']
-        fisher_val = 0.5 * np.log((1 + current_val) / (1 - current_val)) + 0.5 * prev_fisher
-        df.at[i, 'fisher'] = fisher_val
-
-    df['trigger'] = df['fisher'].shift(1)
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+
+    for column, values in fisher_arrays(high, low, length).items():
+        df[column] = values
     return df
 
 def compute_indicators_for_instrument(instrument_data, token, name):
     """Compute indicators for specific instrument and data type"""
     data = instrument_data[token]
-    if name == 'intraday':
-        if not data['intraday'].empty:
-            data['intraday'] = compute_fisher_transform(data['intraday'])
-            data['intraday'] = compute_supertrend(data['intraday'])
-    elif name == 'daily':
-        if not data['daily'].empty:
-            data['daily'] = compute_supertrend(data['daily'])
-
-async def global_monitor_intraday_indicators(instrument_data, interval=5):
-    """Monitor intraday data changes for all instruments and compute indicators"""
+    store = data['candles'][name]
+    if not len(store):
+        return
+    # Fisher + Supertrend for intraday, Supertrend only for daily (set in init_instrument_data)
+    data['indicators'][name].update(store)
+    data[name] = store.frame()
+
+def notify_indicator_listeners(token, name):
+    for listener in indicator_listeners:
+        try:
+            listener(token, name)
+        except Exception as e:
+            logging.error(f"Indicator listener failed for {token}: {e}")
+
+def precompute_indicators(instrument_data, min_rows=15):
+    """Bring every instrument's indicators up to date now; returns the tokens with enough intraday bars to trade"""
+    ready = set()
+    for token, data in instrument_data.items():
+        for name in ('intraday', 'daily'):
+            if len(data['candles'][name]) and data['versions'][name] != data['computed_versions'][name]:
+                compute_indicators_for_instrument(instrument_data, token, name)
+                data['computed_versions'][name] = data['versions'][name]
+        if data['intraday'] is not None and len(data['intraday']) >= min_rows:
+            ready.add(token)
+    return ready
+
+async def global_monitor_indicators(instrument_data, name, interval=5, audit_interval=None):
+    """Recompute indicators for instruments whose data version moved.
+
+    Ingestion bumps data['versions'][name] and sets data_changed[name], so
+    change detection is O(1) per instrument. `interval` is only a fallback
+    wake-up. With `audit_interval` set, unchanged candle stores are also
+    checksummed that often to catch mutations that skipped mark_updated.
+    """
+    event = data_changed[name]
+    timeout = interval if audit_interval is None else min(interval, audit_interval)
+    last_audit = time.monotonic()
     while True:
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        event.clear()
+
+        audit = audit_interval is not None and time.monotonic() - last_audit >= audit_interval
         for token in instrument_data:
             data = instrument_data[token]
-            if data['intraday'] is None or data['intraday'].empty:
+            store = data['candles'][name]
+            if not len(store):
                 continue
-                
-            current_checksum = compute_checksum(data['intraday'])
-            if current_checksum != data['checksums']['intraday']:
-                print(f"Intraday data changed for {data['symbol']}. Computing indicators...")
-                compute_indicators_for_instrument(instrument_data, token, 'intraday')
-                data['checksums']['intraday'] = current_checksum
-                
-        await asyncio.sleep(interval)
-
-async def global_monitor_daily_indicators(instrument_data, interval=5):
+
+            version = data['versions'][name]
+            if version != data['computed_versions'][name]:
+                logging.debug(f"{name.capitalize()} data changed for {data['symbol']}. Computing indicators...")
+                compute_indicators_for_instrument(instrument_data, token, name)
+                data['computed_versions'][name] = version
+                notify_indicator_listeners(token, name)
+                if audit_interval is not None:
+                    data['checksums'][name] = compute_checksum(store.frame())
+            elif audit:
+                current_checksum = compute_checksum(store.frame())
+                if data['checksums'][name] is not None and current_checksum != data['checksums'][name]:
+                    logging.warning(f"{name.capitalize()} data for {data['symbol']} changed without a version bump. Recomputing...")
+                    data['indicators'][name].reset()
+                    compute_indicators_for_instrument(instrument_data, token, name)
+                    notify_indicator_listeners(token, name)
+                    current_checksum = compute_checksum(store.frame())
+                data['checksums'][name] = current_checksum
+
+        if audit:
+            last_audit = time.monotonic()
+
+async def global_monitor_intraday_indicators(instrument_data, interval=5, audit_interval=None):
+    """Monitor intraday data changes for all instruments and compute indicators"""
+    await global_monitor_indicators(instrument_data, 'intraday', interval, audit_interval)
+
+async def global_monitor_daily_indicators(instrument_data, interval=5, audit_interval=None):
     """Monitor daily data changes for all instruments and compute indicators"""
-    while True:
-        for token in instrument_data:
-            data = instrument_data[token]
-            if data['daily'] is None or data['daily'].empty:
-                continue
-                
-            current_checksum = compute_checksum(data['daily'])
-            if current_checksum != data['checksums']['daily']:
-                print(f"Daily data changed for {data['symbol']}. Computing indicators...")
-                compute_indicators_for_instrument(instrument_data, token, 'daily')
-                data['checksums']['daily'] = current_checksum
-                
-        await asyncio.sleep(interval)
+    await global_monitor_indicators(instrument_data, 'daily', interval, audit_interval)
@@ -0,0 +1,190 @@
+import math
+import numpy as np
+
+# === Optional Numba acceleration ===
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    njit = None
+    NUMBA_AVAILABLE = False
+
+
+def _maybe_jit(loop):
+    """Compile a loop with Numba when it is installed"""
+    return njit(cache=True)(loop) if NUMBA_AVAILABLE else None
+
+
+def _run_loop(loop, jitted, inputs, outputs, *args):
+    """Run a recurrence loop that fills `outputs` in place; returns the outputs.
+
+    With Numba the compiled loop works on the arrays directly; otherwise the
+    loop runs on plain lists, whose Python floats index far faster than numpy
+    scalars.
+    """
+    if jitted is not None:
+        jitted(*inputs, *outputs, *args)
+        return outputs
+    input_lists = [a.tolist() for a in inputs]
+    output_lists = [a.tolist() for a in outputs]
+    loop(*input_lists, *output_lists, *args)
+    return [np.array(values, dtype=a.dtype) for values, a in zip(output_lists, outputs)]
+
+
+# === Supertrend ===
+def true_range(high, low, close):
+    """True range with a NaN first bar (no previous close)"""
+    prev_close = np.empty_like(close)
+    prev_close[0] = np.nan
+    prev_close[1:] = close[:-1]
+    return np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def _wilder_atr_loop(tr, atr, period):
+    """Wilder smoothing seeded at atr[period-1]"""
+    alpha = 1 / period
+    for i in range(period, len(tr)):
+        atr[i] = alpha * tr[i] + (1 - alpha) * atr[i - 1]
+
+
+def _supertrend_bands_loop(close, upper, lower, final_upper, final_lower, direction, supertrend, start):
+    """Final band ratchet and trend direction in one pass"""
+    for i in range(start + 1, len(close)):
+        prev_close = close[i - 1]
+
+        prev_upper = final_upper[i - 1]
+        if upper[i] < prev_upper or prev_close > prev_upper:
+            final_upper[i] = upper[i]
+        else:
+            final_upper[i] = prev_upper
+
+        prev_lower = final_lower[i - 1]
+        if lower[i] > prev_lower or prev_close < prev_lower:
+            final_lower[i] = lower[i]
+        else:
+            final_lower[i] = prev_lower
+
+        if close[i] > final_upper[i]:
+            direction[i] = -1
+            supertrend[i] = final_lower[i]
+        elif close[i] < final_lower[i]:
+            direction[i] = 1
+            supertrend[i] = final_upper[i]
+        else:
+            direction[i] = direction[i - 1]
+            supertrend[i] = final_lower[i] if direction[i] == -1 else final_upper[i]
+
+
+_wilder_atr_jit = _maybe_jit(_wilder_atr_loop)
+_supertrend_bands_jit = _maybe_jit(_supertrend_bands_loop)
+
+
+def supertrend_arrays(high, low, close, tr, atr_seed, period=10, multiplier=3):
+    """Supertrend over contiguous float64 arrays.
+
+    `tr` comes from true_range; `atr_seed` is the simple mean of the first
+    `period` true ranges, placed at index period-1 to start the Wilder ATR.
+    Returns the intermediate and final columns keyed like compute_supertrend.
+    """
+    n = len(close)
+    start = period - 1
+    hl2 = (high + low) / 2
+
+    atr = np.full(n, np.nan)
+    if n > start:
+        atr[start] = atr_seed
+        atr, = _run_loop(_wilder_atr_loop, _wilder_atr_jit, [tr], [atr], period)
+
+    upper = hl2 + multiplier * atr
+    lower = hl2 - multiplier * atr
+
+    final_upper = np.full(n, np.nan)
+    final_lower = np.full(n, np.nan)
+    direction = np.ones(n, dtype=np.int64)
+    if n > start:
+        final_upper[start] = upper[start]
+        final_lower[start] = lower[start]
+    supertrend = final_upper.copy()
+
+    if n > start + 1:
+        final_upper, final_lower, direction, supertrend = _run_loop(
+            _supertrend_bands_loop, _supertrend_bands_jit,
+            [close, upper, lower], [final_upper, final_lower, direction, supertrend], start
+        )
+
+    return {
+        'hl2': hl2,
+        'tr': tr,
+        'atr': atr,
+        'upper_band': upper,
+        'lower_band': lower,
+        'final_upper_band': final_upper,
+        'final_lower_band': final_lower,
+        'direction': direction,
+        'supertrend': supertrend,
+    }
+
+
+# === Fisher Transform ===
+def _fisher_loop(hl2, high_hl2, low_hl2, value, fisher, trigger, length):
+    """Rolling hl2 range, clamped value, fisher and trigger in one pass"""
+    for i in range(len(hl2)):
+        # Rolling max/min over the trailing window, skipping NaN like pandas
+        hi = np.nan
+        lo = np.nan
+        for j in range(max(0, i - length + 1), i + 1):
+            x = hl2[j]
+            if hi != hi or x > hi:
+                hi = x
+            if lo != lo or x < lo:
+                lo = x
+        high_hl2[i] = hi
+        low_hl2[i] = lo
+        if i == 0:
+            continue
+
+        denom = hi - lo
+        if denom == 0.0:
+            denom = 1e-9
+        current_val = 0.66 * ((hl2[i] - lo) / denom - 0.5) + 0.67 * value[i - 1]
+        if current_val < -0.99:
+            current_val = -0.99
+        if current_val > 0.999:
+            current_val = 0.999
+        value[i] = current_val
+
+        fisher[i] = 0.5 * math.log((1 + current_val) / (1 - current_val)) + 0.5 * fisher[i - 1]
+        trigger[i] = fisher[i - 1]
+
+
+_fisher_jit = _maybe_jit(_fisher_loop)
+
+
+def fisher_arrays(high, low, length=10):
+    """Fisher Transform over contiguous float64 arrays.
+
+    Returns the intermediate and final columns keyed like
+    compute_fisher_transform; bar 0 has value/fisher 0 and a NaN trigger.
+    """
+    n = len(high)
+    hl2 = (high + low) / 2
+    high_hl2 = np.full(n, np.nan)
+    low_hl2 = np.full(n, np.nan)
+    value = np.zeros(n)
+    fisher = np.zeros(n)
+    trigger = np.full(n, np.nan)
+
+    if n:
+        high_hl2, low_hl2, value, fisher, trigger = _run_loop(
+            _fisher_loop, _fisher_jit,
+            [hl2], [high_hl2, low_hl2, value, fisher, trigger], length
+        )
+
+    return {
+        'hl2': hl2,
+        'high_hl2': high_hl2,
+        'low_hl2': low_hl2,
+        'value': value,
+        'fisher': fisher,
+        'trigger': trigger,
+    }
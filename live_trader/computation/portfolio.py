@@ -0,0 +1,108 @@
+import time
+import numpy as np
+from history_buffer import lttb_downsample
+
+SPARKLINE_BARS = 75  # one session of 5-minute closes
+SPARKLINE_POINTS = 40
+
+
+def _iso(ts):
+    return None if ts is None else ts.isoformat()
+
+
+def sparkline(store):
+    """The session's closes downsampled for a table sparkline"""
+    if not len(store):
+        return []
+    return lttb_downsample(store['close'][-SPARKLINE_BARS:], SPARKLINE_POINTS).tolist()
+
+
+def instrument_summary(token, data):
+    """One overview row: position, unrealized PnL, last signal, trend and data freshness"""
+    store = data['candles']['intraday']
+    position = data['position']
+    position_data = data['position_data'] or {}
+    tick = data['tick'].last()
+    ltp = float(tick['last_price']) if tick is not None else None
+    last_tick = None if tick is None or np.isnat(tick['exchange_timestamp']) else str(tick['exchange_timestamp'])
+
+    close = supertrend = direction = None
+    if len(store):
+        close = float(store['close'][-1])
+        if store.has_column('supertrend'):
+            supertrend = float(store['supertrend'][-1])
+            direction = int(store['direction'][-1])
+
+    entry_price = position_data.get('entry_price')
+    price = ltp if ltp is not None else close
+    unrealized = None
+    if position and entry_price is not None and price is not None:
+        unrealized = price - entry_price if position == 'LONG' else entry_price - price
+
+    last_signal = data['signals'].last()
+    return {
+        'token': token,
+        'symbol': data['symbol'],
+        'position': position,
+        'entry_price': entry_price,
+        'ltp': ltp,
+        'unrealized_pnl': unrealized,
+        'last_signal': None if last_signal is None else f"{last_signal.action} {last_signal.position}",
+        'last_signal_time': None if last_signal is None else _iso(last_signal.timestamp),
+        'close': close,
+        'supertrend': supertrend,
+        'direction': direction,
+        'trend': None if supertrend is None or np.isnan(supertrend) else ('UP' if close > supertrend else 'DOWN'),
+        'last_tick': last_tick,
+        'last_bar': _iso(store.last_date()),
+    }
+
+
+class PortfolioOverview:
+    """Overview rows for every instrument, recomputed only for instruments whose state moved.
+
+    Each publisher calls refresh() once per cycle; the first call in a
+    cycle does the work and later ones find nothing changed. Rows carry
+    the overview version they were computed at, so each consumer can pick
+    up what changed since the version it last saw. Versions restart with
+    the engine; `started_at` tells two engine runs apart.
+    """
+
+    def __init__(self, instrument_data):
+        self.instrument_data = instrument_data
+        self.rows = {}
+        self.keys = {}
+        self.sparklines = {}  # token -> (computed intraday version, points); ticks alone do not redraw them
+        self.version = 0
+        self.started_at = time.time()
+
+    @staticmethod
+    def _key(data):
+        return (
+            data['computed_versions']['intraday'], data['tick'].total, len(data['signals']),
+            data['position'], id(data['position_data']),
+        )
+
+    def refresh(self):
+        """Recompute changed rows; returns the overview version"""
+        changed = [token for token, data in self.instrument_data.items() if self.keys.get(token) != self._key(data)]
+        if changed:
+            self.version += 1
+            for token in changed:
+                data = self.instrument_data[token]
+                self.keys[token] = self._key(data)
+                row = instrument_summary(token, data)
+                computed = data['computed_versions']['intraday']
+                if self.sparklines.get(token, (None,))[0] != computed:
+                    self.sparklines[token] = (computed, sparkline(data['candles']['intraday']))
+                row['sparkline'] = self.sparklines[token][1]
+                row['version'] = self.version
+                self.rows[token] = row
+        return self.version
+
+    def changed_since(self, version):
+        """Rows computed after `version`"""
+        return [row for row in self.rows.values() if row['version'] > version]
+
+    def table(self):
+        return list(self.rows.values())
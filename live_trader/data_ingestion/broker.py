@@ -0,0 +1,116 @@
+import time
+import asyncio
+import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+# Kite Connect per-second request quotas by endpoint
+KITE_RATE_LIMITS = {'quote': 1, 'historical_data': 3, 'default': 10}
+# Concurrent in-flight requests allowed per endpoint
+KITE_CONCURRENCY = {'quote': 1, 'historical_data': 3, 'default': 4}
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncKiteClient:
+    """Runs blocking KiteConnect calls on a bounded thread pool.
+
+    Each endpoint gets its own concurrency limit and token-bucket rate
+    limiter (KITE_CONCURRENCY / KITE_RATE_LIMITS, overridable), and every
+    call is bounded by `timeout` seconds, so a slow HTTP request only
+    occupies a worker thread instead of stalling the event loop.
+    """
+
+    def __init__(self, kite, max_workers=8, timeout=10, rate_limits=None, concurrency=None):
+        self.kite = kite
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kite")
+        self.rate_limits = {**KITE_RATE_LIMITS, **(rate_limits or {})}
+        self.concurrency = {**KITE_CONCURRENCY, **(concurrency or {})}
+        self.buckets = {}
+        self.semaphores = {}
+        self.stats = {}
+
+    def _limits_for(self, endpoint):
+        if endpoint not in self.buckets:
+            rate = self.rate_limits.get(endpoint, self.rate_limits['default'])
+            limit = self.concurrency.get(endpoint, self.concurrency['default'])
+            self.buckets[endpoint] = TokenBucket(rate)
+            self.semaphores[endpoint] = asyncio.Semaphore(limit)
+            self.stats[endpoint] = {'calls': 0, 'errors': 0, 'timeouts': 0, 'total_latency': 0.0}
+        return self.buckets[endpoint], self.semaphores[endpoint]
+
+    async def call(self, endpoint, *args, **kwargs):
+        """Call a KiteConnect method by name off the event loop"""
+        bucket, semaphore = self._limits_for(endpoint)
+        stats = self.stats[endpoint]
+        async with semaphore:
+            await bucket.acquire()
+            loop = asyncio.get_running_loop()
+            start = time.monotonic()
+            try:
+                future = loop.run_in_executor(self.executor, functools.partial(getattr(self.kite, endpoint), *args, **kwargs))
+                return await asyncio.wait_for(future, timeout=self.timeout)
+            except asyncio.TimeoutError:
+                stats['timeouts'] += 1
+                raise
+            except Exception:
+                stats['errors'] += 1
+                raise
+            finally:
+                stats['calls'] += 1
+                stats['total_latency'] += time.monotonic() - start
+
+    async def historical_data(self, *args, **kwargs):
+        return await self.call('historical_data', *args, **kwargs)
+
+    async def quote(self, *args, **kwargs):
+        return await self.call('quote', *args, **kwargs)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def monitor_loop_lag(interval=1.0, warn_after=0.25, stats=None, log_every=60):
+    """Measure event-loop lag as the overshoot of a fixed sleep.
+
+    Lag above `warn_after` seconds is logged immediately; the max lag seen
+    is logged every `log_every` seconds. `stats`, when given, is updated
+    in place with 'last' and 'max'.
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault('last', 0.0)
+    stats.setdefault('max', 0.0)
+    loop = asyncio.get_running_loop()
+    last_log = loop.time()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = loop.time() - start - interval
+        stats['last'] = lag
+        stats['max'] = max(stats['max'], lag)
+        if lag > warn_after:
+            logging.warning(f"Event loop lag {lag * 1000:.0f} ms")
+        if loop.time() - last_log >= log_every:
+            logging.info(f"Event loop lag: last {stats['last'] * 1000:.1f} ms, max {stats['max'] * 1000:.1f} ms")
+            last_log = loop.time()
@@ -0,0 +1,111 @@
+import logging
+import clock
+from candle_store import CandleStore, INTRADAY_CAPACITY
+
+# Kite interval names -> bar length in minutes
+INTERVAL_MINUTES = {'minute': 1, '3minute': 3, '5minute': 5, '15minute': 15}
+# Bars built from ticks for every instrument; '5minute' feeds the intraday store
+TICK_CANDLE_INTERVALS = ['5minute']
+
+
+def bar_start(ts, minutes):
+    """Floor a timestamp to the start of its `minutes`-long bar (clock-aligned, like Kite)"""
+    minute_of_day = ts.hour * 60 + ts.minute
+    floored = minute_of_day - minute_of_day % minutes
+    return ts.replace(hour=floored // 60, minute=floored % 60, second=0, microsecond=0)
+
+
+class CandleBuilder:
+    """Streams ticks for one instrument into OHLCV bars of one interval.
+
+    The forming bar is upserted into the CandleStore on every tick, so it is
+    visible to readers immediately; it becomes a closed bar when a tick
+    from a later bar arrives. Bar volume is the change in the cumulative
+    `volume_traded` since the previous bar closed, plus any volume the bar
+    already had from a historical backfill.
+    """
+
+    def __init__(self, store, interval='5minute'):
+        self.store = store
+        self.interval = interval
+        self.minutes = INTERVAL_MINUTES[interval]
+        self.start = None
+        self.open = self.high = self.low = self.close = None
+        self.volume_base = None
+        self.volume_carry = 0
+        self.last_volume = None
+        self.closed_bars = 0
+
+    def on_tick(self, tick):
+        """Apply one tick; returns True when it closed the previous bar"""
+        price = tick.get('last_price')
+        if not price:
+            return False
+        ts = tick.get('exchange_timestamp') or tick.get('last_trade_time') or clock.now()
+        start = bar_start(ts, self.minutes)
+        volume = tick.get('volume_traded')
+
+        closed = False
+        if self.start is not None and start < self.start:
+            return False  # late tick for an already-closed bar
+        if self.start is None or start > self.start:
+            closed = self.start is not None
+            if closed:
+                self.closed_bars += 1
+            self.start = start
+            self.open = self.high = self.low = price
+            # Cumulative volume at the previous bar's close; resets with each session
+            self.volume_carry = 0
+            if self.last_volume is None or volume is None or volume < self.last_volume:
+                self.volume_base = volume
+            else:
+                self.volume_base = self.last_volume
+        else:
+            self.high = max(self.high, price)
+            self.low = min(self.low, price)
+        self.close = price
+        if volume is not None:
+            self.last_volume = volume
+            if self.volume_base is None:
+                self.volume_base = volume
+
+        bar_volume = self.volume_carry + ((volume - self.volume_base) if volume is not None else 0)
+        self.store.upsert(self.start, self.open, self.high, self.low, self.close, bar_volume)
+        return closed
+
+    def sync_from_store(self):
+        """Adopt the store's last bar after a historical backfill rewrote it"""
+        last = self.store.last_date()
+        if last is None:
+            return
+        start = last.tz_localize(None).to_pydatetime()
+        if self.start is not None and start < self.start:
+            return  # ticks are already ahead of the backfill; keep the tick-built bar
+        merged = self.start == start
+        high = float(self.store['high'][-1])
+        low = float(self.store['low'][-1])
+        self.start = start
+        self.open = float(self.store['open'][-1])
+        self.high = max(high, self.high) if merged else high
+        self.low = min(low, self.low) if merged else low
+        if not merged:
+            self.close = float(self.store['close'][-1])
+        # Backfilled volume already covers the gap; the next tick re-bases at its own cumulative volume
+        self.volume_carry = int(self.store['volume'][-1])
+        self.volume_base = None
+        self.last_volume = None
+        if merged:
+            self.store.upsert(self.start, self.open, self.high, self.low, self.close, self.volume_carry)
+
+
+def attach_candle_builders(instrument_data, intervals=TICK_CANDLE_INTERVALS):
+    """Create per-instrument builders; '5minute' writes to the intraday store, others get their own"""
+    for token, data in instrument_data.items():
+        builders = data.setdefault('builders', {})
+        for interval in intervals:
+            if interval == '5minute':
+                store = data['candles']['intraday']
+            else:
+                store = data['candles'].setdefault(interval, CandleStore(INTRADAY_CAPACITY))
+            builders[interval] = CandleBuilder(store, interval)
+        logging.info(f"Tick candle builders for {data['symbol']}: {', '.join(builders)}")
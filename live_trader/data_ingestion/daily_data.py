@@ -1,19 +1,26 @@
-import pandas as pd
 import datetime
 import asyncio
 import logging
-from kiteconnect import KiteConnect
+import clock
+from instrument_manager import mark_updated
 
-async def fetch_daily_data(kite, token, instrument_data):
-    """Fetch daily data for specific instrument"""
+async def fetch_daily_data(broker, token, instrument_data):
+    """Fetch daily data for specific instrument (from the last stored day, 50 days when empty)"""
     data = instrument_data[token]
     while True:
         try:
-            from_date = (datetime.datetime.now() - datetime.timedelta(days=50)).strftime("%Y-%m-%d")
-            to_date = datetime.datetime.now().strftime("%Y-%m-%d")
-            new_data = kite.historical_data(token, from_date=from_date, to_date=to_date, interval="day")
-            data['daily'] = pd.DataFrame(new_data)
-            print(f"Daily data updated for {data['symbol']}: {len(data['daily'])} records")
+            store = data['candles']['daily']
+            last_day = store.last_date()
+            if last_day is not None:
+                from_date = last_day.strftime("%Y-%m-%d")
+            else:
+                from_date = (clock.now() - datetime.timedelta(days=50)).strftime("%Y-%m-%d")
+            to_date = clock.now().strftime("%Y-%m-%d")
+            new_data = await broker.historical_data(token, from_date=from_date, to_date=to_date, interval="day")
+            store.upsert_many(new_data)
+            data['daily'] = store.frame()
+            mark_updated(instrument_data, token, 'daily')
+            print(f"Daily data updated for {data['symbol']}: {len(store)} records")
         except Exception as e:
             logging.error(f"Daily data error for {data['symbol']}: {str(e)}")
         
@@ -1,52 +1,67 @@
-import pandas as pd
 import datetime
 import asyncio
 import logging
-from kiteconnect import KiteConnect
+import clock
+from instrument_manager import mark_updated
+from events import ticker_reconnected
 
-async def update_intraday_data(kite, token, instrument_data):
+async def backfill_intraday_data(broker, token, instrument_data):
+    """Fetch 5-minute candles from the last stored bar onwards (30 days when empty)"""
+    data = instrument_data[token]
+    # Get current time in IST
+    now = clock.ist_now()
+    to_time_str = now.strftime("%Y-%m-%d %H:%M:%S")
+    
+    # Determine from_time (store dates are IST, like `now`)
+    store = data['candles']['intraday']
+    last_time = store.last_date()
+    if last_time is not None:
+        from_time = last_time.tz_localize(None).strftime("%Y-%m-%d %H:%M:%S")
+    else:
+        from_time = (now - datetime.timedelta(days=30)).replace(
+            hour=9, minute=0, second=0, microsecond=0
+        ).strftime("%Y-%m-%d %H:%M:%S")
+    
+    # Fetch new data
+    new_data = await broker.historical_data(
+        token, 
+        from_date=from_time, 
+        to_date=to_time_str, 
+        interval="5minute"
+    )
+    
+    if new_data:
+        # O(1) per bar: revise the forming candle in place, append the rest
+        store.upsert_many(new_data)
+        logging.info(f"Intraday new candle:{new_data[-1]}")
+        builder = data.get('builders', {}).get('5minute')
+        if builder is not None:
+            builder.sync_from_store()
+        # data['intraday'] is republished by the indicator update, with indicator columns filled in
+        mark_updated(instrument_data, token, 'intraday')
+        
+        print(f"Intraday updated for {data['symbol']}: {len(store)} records")
+    return len(new_data)
+
+async def update_intraday_data(broker, token, instrument_data):
     """Pure data update function - no indicator computations"""
     data = instrument_data[token]
     while True:
         try:
-            # Get current time in IST
-            now = datetime.datetime.now(tz=datetime.timezone.utc) + datetime.timedelta(hours=5, minutes=30)
-            to_time_str = now.strftime("%Y-%m-%d %H:%M:%S")
-            
-            # Determine from_time
-            if not data['intraday'].empty and 'date' in data['intraday'].columns:
-                last_time = data['intraday']['date'].max()
-                if isinstance(last_time, pd.Timestamp):
-                    last_time = last_time.tz_convert(None)
-                from_time = last_time.strftime("%Y-%m-%d %H:%M:%S")
-            else:
-                from_time = (now - datetime.timedelta(days=30)).replace(
-                    hour=9, minute=0, second=0, microsecond=0
-                ).strftime("%Y-%m-%d %H:%M:%S")
-            
-            # Fetch new data
-            new_data = kite.historical_data(
-                token, 
-                from_date=from_time, 
-                to_date=to_time_str, 
-                interval="5minute"
-            )
-            new_df = pd.DataFrame(new_data)
-            
-            if not new_df.empty:
-                if not data['intraday'].empty:
-                    data['intraday'] = pd.concat([data['intraday'], new_df])
-                    logging.info(f"Intraday new candle:{new_df.iloc[-1]}")
-                    data['intraday'] = data['intraday'].drop_duplicates(subset=['date'], keep='last')
-                else:
-                    data['intraday'] = new_df
-                
-                data['intraday'] = data['intraday'].sort_values('date')
-                data['intraday'] = data['intraday'].reset_index(drop=True)
-                
-                print(f"Intraday updated for {data['symbol']}: {len(data['intraday'])} records")
-            
+            await backfill_intraday_data(broker, token, instrument_data)
         except Exception as e:
             logging.error(f"Data update error for {data['symbol']}: {str(e)}")
         
         await asyncio.sleep(30)
+
+async def reconcile_intraday_on_reconnect(broker, instrument_data):
+    """Backfill every instrument after the ticker reconnects, to cover bars missed while offline"""
+    while True:
+        await ticker_reconnected.wait()
+        ticker_reconnected.clear()
+        logging.info("Ticker reconnected, reconciling intraday candles with history")
+        for token in instrument_data:
+            try:
+                await backfill_intraday_data(broker, token, instrument_data)
+            except Exception as e:
+                logging.error(f"Reconnect backfill error for {instrument_data[token]['symbol']}: {str(e)}")
@@ -0,0 +1,97 @@
+import time
+import asyncio
+import logging
+
+KITE_QUOTE_LIMIT = 500  # Max instruments per kite.quote call
+
+
+def parse_quote(quote):
+    """Extract the fields the decision logic uses from a Kite quote"""
+    return {
+        'ltp': quote['last_price'],
+        'best_ask': quote['depth']['sell'][0]['price'],
+        'best_bid': quote['depth']['buy'][0]['price'],
+        'volume': quote['volume']
+    }
+
+
+class QuoteService:
+    """Shared quote cache refreshed by one batched kite.quote call per cycle.
+
+    Every registered symbol ("EXCHANGE:TRADINGSYMBOL") is fetched together,
+    in chunks of at most KITE_QUOTE_LIMIT, so N instruments cost
+    ceil(N / 500) calls per cycle instead of N. Entries older than `ttl`
+    seconds are treated as missing so callers can fall back to REST.
+    `needs_quote(symbol)`, when given, limits each cycle to the symbols it
+    returns True for (e.g. those without a fresh tick). Each fetched quote
+    is passed to every `listeners` callback as listener(symbol, quote).
+    """
+
+    def __init__(self, broker, symbols=(), interval=5, ttl=10, chunk_size=KITE_QUOTE_LIMIT, needs_quote=None):
+        self.broker = broker
+        self.symbols = list(dict.fromkeys(symbols))
+        self.needs_quote = needs_quote
+        self.interval = interval
+        self.ttl = ttl
+        self.chunk_size = chunk_size
+        self.cache = {}
+        self.listeners = []
+        self.metrics = {'batch_calls': 0, 'quotes_fetched': 0, 'calls_saved': 0,
+                        'cache_hits': 0, 'cache_misses': 0, 'errors': 0}
+
+    def register(self, symbol):
+        if symbol not in self.symbols:
+            self.symbols.append(symbol)
+
+    async def refresh(self):
+        """Fetch quotes for all registered symbols in batched calls"""
+        symbols = self.symbols
+        if self.needs_quote is not None:
+            symbols = [symbol for symbol in symbols if self.needs_quote(symbol)]
+        for i in range(0, len(symbols), self.chunk_size):
+            chunk = symbols[i:i + self.chunk_size]
+            try:
+                quotes = await self.broker.quote(chunk)
+            except Exception as e:
+                self.metrics['errors'] += 1
+                logging.error(f"Batched quote error for {len(chunk)} symbols: {str(e)}")
+                continue
+
+            fetched_at = time.monotonic()
+            self.metrics['batch_calls'] += 1
+            for symbol in chunk:
+                if symbol not in quotes:
+                    continue
+                try:
+                    quote = parse_quote(quotes[symbol])
+                except (KeyError, IndexError) as e:
+                    logging.error(f"Price data error for {symbol}: {str(e)}")
+                    continue
+                self.cache[symbol] = (quote, fetched_at)
+                self.metrics['quotes_fetched'] += 1
+                for listener in self.listeners:
+                    try:
+                        listener(symbol, quote)
+                    except Exception as e:
+                        logging.error(f"Quote listener error for {symbol}: {e}")
+            # One call replaced len(chunk) per-symbol calls
+            self.metrics['calls_saved'] += len(chunk) - 1
+
+    def get(self, symbol):
+        """Latest cached quote for a symbol, or None when missing or stale"""
+        entry = self.cache.get(symbol)
+        if entry is None or time.monotonic() - entry[1] > self.ttl:
+            self.metrics['cache_misses'] += 1
+            return None
+        self.metrics['cache_hits'] += 1
+        return entry[0]
+
+    async def run(self, log_every=60):
+        """Refresh forever; logs call metrics every `log_every` seconds"""
+        last_log = time.monotonic()
+        while True:
+            await self.refresh()
+            if time.monotonic() - last_log >= log_every:
+                logging.info(f"Quote service: {self.metrics}")
+                last_log = time.monotonic()
+            await asyncio.sleep(self.interval)
@@ -1,57 +1,108 @@
-import pandas as pd
+import time
 import asyncio
 import logging
-from kiteconnect import KiteTicker
-from instrument_manager import instrument_data   # without the relative
+from instrument_manager import instrument_data, mark_updated   # without the relative
+from events import ticker_reconnected
 
+LIVE_PRICE_MAX_AGE = 3  # seconds before a cached tick is considered stale
 
 
-def ticks_to_dataframe(ticks, token):
-    """Process ticks into DataFrame for specific instrument"""
-    data = {col: [] for col in [
-        "tradable", "mode", "instrument_token", "last_price", 
-        "last_traded_quantity", "average_traded_price", "volume_traded",
-        "total_buy_quantity", "total_sell_quantity", "open", "high",
-        "low", "close", "change", "last_trade_time", "oi", "oi_day_high",
-        "oi_day_low", "exchange_timestamp", "depth_buy", "depth_sell"
-    ]}
-    
+class LivePriceCache:
+    """Last price and top of book per instrument token, fed from KiteTicker.
+
+    Ticks are applied on the event loop (see start_tick_data), and each
+    token's entry is replaced by a single assignment, so readers never see
+    a half-written entry.
+    """
+
+    def __init__(self, max_age=LIVE_PRICE_MAX_AGE):
+        self.max_age = max_age
+        self.entries = {}
+
+    def update(self, tick):
+        """Record the latest tick for its instrument"""
+        ltp = tick.get('last_price')
+        if ltp is None:
+            return
+        depth = tick.get('depth') or {}
+        buy = depth.get('buy') or []
+        sell = depth.get('sell') or []
+        self.entries[tick['instrument_token']] = ({
+            'ltp': ltp,
+            # LTP/QUOTE mode ticks carry no depth; fall back to the last price
+            'best_bid': buy[0]['price'] if buy and buy[0]['price'] else ltp,
+            'best_ask': sell[0]['price'] if sell and sell[0]['price'] else ltp,
+            'volume': tick.get('volume_traded'),
+            'exchange_timestamp': tick.get('exchange_timestamp'),
+        }, time.monotonic())
+
+    def get(self, token):
+        """Latest price data for a token, or None when missing or older than max_age"""
+        entry = self.entries.get(token)
+        if entry is None or time.monotonic() - entry[1] > self.max_age:
+            return None
+        return entry[0]
+
+    def age(self, token):
+        """Seconds since the last tick for a token (inf when none arrived)"""
+        entry = self.entries.get(token)
+        return float('inf') if entry is None else time.monotonic() - entry[1]
+
+
+def process_ticks(instrument_data, ticks, price_cache=None, sink=None, scheduler=None):
+    """Group a tick batch by token in one pass and append to each instrument's buffer"""
+    grouped = {}
     for tick in ticks:
-        if tick['instrument_token'] != token:
+        grouped.setdefault(tick['instrument_token'], []).append(tick)
+        if price_cache is not None:
+            price_cache.update(tick)
+        if sink is not None:
+            sink.offer_tick(tick)
+
+    for token, instrument_ticks in grouped.items():
+        if token not in instrument_data:
             continue
-            
-        for key in data.keys():
-            if key == 'ohlc':
-                ohlc = tick.get('ohlc', {})
-                for ohlc_key in ['open', 'high', 'low', 'close']:
-                    data[ohlc_key].append(ohlc.get(ohlc_key, 0))
-            elif key == 'depth':
-                depth = tick.get('depth', {"buy": [], "sell": []})
-                data['depth_buy'].append(depth.get('buy', []))
-                data['depth_sell'].append(depth.get('sell', []))
-            else:
-                data[key].append(tick.get(key, None))
-    
-    new_df = pd.DataFrame(data)
-    existing_df = instrument_data[token]['tick']
-    return pd.concat([existing_df, new_df], ignore_index=True) if not existing_df.empty else new_df
-
-async def start_tick_data(kws, instrument_data):
+        data = instrument_data[token]
+        data['tick'].append_many(instrument_ticks)
+        logging.debug(f"Updated tick data for {data['symbol']}: {len(instrument_ticks)} ticks")
+
+        # Stream ticks into local bars; the 5-minute builder feeds the intraday store
+        builders = data.get('builders')
+        if builders:
+            for builder in builders.values():
+                for tick in instrument_ticks:
+                    builder.on_tick(tick)
+            if '5minute' in builders:
+                mark_updated(instrument_data, token, 'intraday')
+
+        # Wake the decision logic when the price crosses a trigger level
+        if scheduler is not None:
+            price = instrument_ticks[-1].get('last_price')
+            if price is not None:
+                scheduler.on_price(token, price)
+    return grouped
+
+async def start_tick_data(kws, instrument_data, price_cache=None, sink=None, scheduler=None):
     """Handle tick data for all instruments"""
+    loop = asyncio.get_running_loop()
+
     def on_ticks(ws, ticks):
-        """Process incoming ticks"""
-        for token in instrument_data:
-            instrument_ticks = [t for t in ticks if t['instrument_token'] == token]
-            if instrument_ticks:
-                instrument_data[token]['tick'] = ticks_to_dataframe(instrument_ticks, token)
-                print(f"Updated tick data for {instrument_data[token]['symbol']}")
+        """Hand the batch from the ticker thread to the event loop"""
+        loop.call_soon_threadsafe(process_ticks, instrument_data, ticks, price_cache, sink, scheduler)
+
+    connections = 0
 
     def on_connect(ws, response):
         """Subscribe to all tracked instruments"""
+        nonlocal connections
         tokens = list(instrument_data.keys())
         ws.subscribe(tokens)
         ws.set_mode(ws.MODE_FULL, tokens)
         print(f"Subscribed to {len(tokens)} instruments")
+        connections += 1
+        if connections > 1:
+            # Bars may be missing for the time the socket was down
+            loop.call_soon_threadsafe(ticker_reconnected.set)
 
     kws.on_ticks = on_ticks
     kws.on_connect = on_connect
@@ -4,6 +4,13 @@ import json
 import pandas as pd
 from datetime import datetime
 import time
+import streamlit as st
+from storage.position_snapshots import load_positions
+from storage.state_segment import StateSegmentReader
+from live_feed import FeedClient, FEED_URL
+
+# Kept across dashboard reruns; decodes the engine's state segment once per publish
+state_reader = StateSegmentReader()
 
 def safe_json_load(path):
     """Robust JSON loading with retry mechanism"""
@@ -18,7 +25,8 @@ def safe_json_load(path):
 
 def get_latest_position_file():
     """Get most recent position snapshot"""
-    files = glob.glob("./data/position_snapshots/positions_*.json")
+    # Delta files (.jsonl) from current runs, full dumps (.json) from older ones
+    files = glob.glob("./data/position_snapshots/positions_*.json") + glob.glob("./data/position_snapshots/positions_*.jsonl")
     if not files:
         return None
     return max(files, key=os.path.getctime)
@@ -31,12 +39,42 @@ def get_latest_signals_file():
     return max(files, key=os.path.getctime)
 
 def load_position_data():
-    """Safely load position data"""
+    """Current positions from the engine's state segment, else the latest snapshot file"""
+    state = state_reader.read()
+    if state is not None:
+        return state['positions']
     file_path = get_latest_position_file()
     if not file_path:
         return {}
+    if file_path.endswith(".jsonl"):
+        return load_positions(file_path)
     return safe_json_load(file_path)
 
+@st.cache_resource
+def feed_client():
+    """One feed connection per dashboard server, shared by every page, session and rerun"""
+    return FeedClient(FEED_URL).start()
+
+def current_state():
+    """(positions, indicators, signals) pushed by the engine, else positions from the state segment/snapshots"""
+    feed = feed_client()
+    if feed.connected:
+        _, positions, indicators, signals = feed.state()
+        return positions, indicators, signals
+    return load_position_data(), {}, []
+
+def load_overview():
+    """(source, engine start, version, rows) of the engine's portfolio overview; version is None when unavailable"""
+    feed = feed_client()
+    if feed.connected:
+        started_at, version, rows = feed.overview_rows()
+        return 'feed', started_at, version, rows
+    state = state_reader.read()
+    if state is not None and state.get('overview'):
+        overview = state['overview']
+        return 'segment', overview.get('started_at'), overview['version'], overview['rows']
+    return None, None, None, []
+
 def load_signals_data():
     """Load signals from latest CSV"""
     file_path = get_latest_signals_file()
@@ -2,8 +2,10 @@ import datetime
 import logging
 import asyncio
 import pandas as pd
-from .signals import get_live_price_data, log_signal, minutes_since
+import clock
+from .signals import resolve_live_price, log_signal
 from computation.indicators import compute_atr
+from history_buffer import position_histories
 
 # Global constants
 MIN_HOLD_DURATION = datetime.timedelta(minutes=5)
@@ -11,82 +13,154 @@ EXIT_BUFFER = 100
 REENTRY_COST = 300
 REENTRY_WINDOW = datetime.timedelta(minutes=15)
 VOLATILITY_MULTIPLIER = 0.5
+INITIAL_DELAY = 100  # seconds to wait for data when indicators were not precomputed
 
-async def handle_position_logic(kite, instrument_data, token):
+# === Trigger table ===
+class TriggerTable:
+    """Entry, stop and re-entry levels for an instrument, fixed until its indicators are recomputed.
+
+    Built once per published intraday frame from the last closed bar's
+    supertrend and the direction flip of the forming bar; checking a price
+    against it is a handful of comparisons, so every tick can be evaluated.
+    """
+
+    def __init__(self, frame, version, atr_fallback=None):
+        self.frame = frame  # held so its id() is not reused while this table is cached
+        self.version = version
+        self.ready = 'direction' in frame and 'supertrend' in frame
+        if not self.ready:
+            return
+        # Views over the store: the forming bar's high/low/supertrend stay live between recomputes
+        self.high = frame['high'].to_numpy()
+        self.low = frame['low'].to_numpy()
+        self.supertrend = frame['supertrend'].to_numpy()
+        direction = frame['direction'].to_numpy()
+        self.bar = frame['date'].iloc[-1]
+        self.prev_supertrend = float(self.supertrend[-2])
+        self.flip_up = bool(direction[-1] == -1 and direction[-2] == 1)
+        self.flip_down = bool(direction[-1] == 1 and direction[-2] == -1)
+        self.long_stop = self.prev_supertrend - EXIT_BUFFER
+        self.short_stop = self.prev_supertrend + EXIT_BUFFER
+        self.atr_fallback = atr_fallback if atr_fallback is not None and atr_fallback[0] == self.bar else None
+
+    # --- Conditions (same price, same answer as the decision logic) ---
+    def enters(self, position, price):
+        if position == 'LONG':
+            return self.flip_up or price > self.prev_supertrend
+        if position == 'SHORT':
+            return self.flip_down or price < self.prev_supertrend
+        return False
+
+    def reverses(self, position, price):
+        return self.enters('SHORT' if position == 'LONG' else 'LONG', price)
+
+    def stop_level(self, position):
+        return self.long_stop if position == 'LONG' else self.short_stop
+
+    def stop_hit(self, position, price):
+        return price < self.long_stop if position == 'LONG' else price > self.short_stop
+
+    def atr(self, data):
+        """Incremental ATR, falling back to compute_atr once per bar when it is not available yet"""
+        atr = data['indicators']['intraday'].rolling_atr
+        if not pd.isna(atr):
+            return atr
+        if self.atr_fallback is None:
+            self.atr_fallback = (self.bar, compute_atr(self.frame))
+        return self.atr_fallback[1]
+
+    @staticmethod
+    def reentry_open(data, now):
+        """True while a premature exit is inside its re-entry window"""
+        return bool(data['was_premature_exit']) and data['last_exit_time'] is not None \
+            and now - data['last_exit_time'] <= REENTRY_WINDOW
+
+    def reentry_at(self, data, price):
+        """Position to re-enter at `price`, or None (window checked separately)"""
+        exit_signal = data['signals'].last('EXIT')
+        position = data['last_exit_position']
+        if exit_signal is None or abs(price - exit_signal.price) > REENTRY_COST:
+            return None
+        return position if self.enters(position, price) else None
+
+    # --- Fast path ---
+    def action(self, price, data, now):
+        """What the decision logic would do at `price`: 'REENTRY', 'ENTRY', 'EXIT' or None"""
+        if not self.ready:
+            return None
+        if self.reentry_open(data, now) and self.reentry_at(data, price):
+            return 'REENTRY'
+        position = data['position']
+        if not position:
+            return 'ENTRY' if self.enters('LONG', price) or self.enters('SHORT', price) else None
+        entry_time = (data['position_data'] or {}).get('entry_time')
+        if self.stop_hit(position, price) and entry_time is not None and now - entry_time >= MIN_HOLD_DURATION:
+            return 'EXIT'
+        return None
+
+
+def trigger_table(data):
+    """The instrument's TriggerTable for its current intraday frame, or None before enough bars"""
+    frame = data['intraday']
+    if frame is None or len(frame) < 15:
+        return None
+    version = data['computed_versions']['intraday']
+    table = data.get('triggers')
+    if table is None or table.frame is not frame or table.version != version:
+        table = TriggerTable(frame, version, table.atr_fallback if table is not None and table.ready else None)
+        data['triggers'] = table
+    return table
+
+
+# === Decision logic ===
+async def handle_position_logic(broker, instrument_data, token, quotes=None, price_cache=None):
     data = instrument_data[token]
     symbol = data['symbol']
 
-    if data['intraday'] is None or len(data['intraday']) < 15:
+    triggers = trigger_table(data)
+    if triggers is None:
         return
 
-    row = data['intraday'].iloc[-1]
-    prev_row = data['intraday'].iloc[-2]
-    now = datetime.datetime.now()
+    now = clock.now()
 
-    live_data = get_live_price_data(kite, symbol)
+    live_data = await resolve_live_price(broker, symbol, token, quotes, price_cache)
     if not live_data:
         return
 
     ltp = live_data['ltp']
     position = data['position']
     position_data = data['position_data']
-    last_exit_time = data['last_exit_time']
-    last_exit_position = data['last_exit_position']
     was_premature_exit = data['was_premature_exit']
     reentry_triggered = False
     trigger_price = ltp  # Use last close price as trigger
 
+    if not triggers.ready:
+        logging.warning(f"Missing 'direction' column for {symbol}")
+        return
+    high = float(triggers.high[-1])
+    low = float(triggers.low[-1])
+    supertrend = float(triggers.supertrend[-1])
+    prev_supertrend = triggers.prev_supertrend
+
     # --- Re-entry Logic ---
-    if was_premature_exit and minutes_since(last_exit_time) <= REENTRY_WINDOW.total_seconds() / 60:
+    if triggers.reentry_open(data, now):
         try:
-            exit_signals = data['signals'][data['signals']['action'] == 'EXIT']
-            if not exit_signals.empty:
-                prior_exit_price = exit_signals.iloc[-1]['price']
-                price_diff = abs(ltp - prior_exit_price)
-
-                if last_exit_position == 'LONG':
-                    condition = ((row['direction'] == -1 and prev_row['direction'] == 1) or 
-                                 trigger_price > prev_row['supertrend'])
-                    if condition and price_diff <= REENTRY_COST:
-                        position = 'LONG'
-                        position_data = {
-                            'entry_price': ltp,
-                            'entry_time': now,
-                            'highest_price': row['high'],
-                            'supertrend_history': [row['supertrend']],
-                            'atr_history': [],
-                            'profit_history': [],
-                            'trailing_sl_history': [],
-                            'stop_hit_history': [],
-                            'direction_reversed_history': [],
-                            'min_hold_met_history': [],
-                            'price_source': 'reentry_ltp'
-                        }
-                        log_signal(instrument_data, token, 'REENTRY', position, ltp, 'ltp', None)
-                        reentry_triggered = True
-                        was_premature_exit = False
-
-                elif last_exit_position == 'SHORT':
-                    condition = ((row['direction'] == 1 and prev_row['direction'] == -1) or 
-                                 trigger_price < prev_row['supertrend'])
-                    if condition and price_diff <= REENTRY_COST:
-                        position = 'SHORT'
-                        position_data = {
-                            'entry_price': ltp,
-                            'entry_time': now,
-                            'lowest_price': row['low'],
-                            'supertrend_history': [row['supertrend']],
-                            'atr_history': [],
-                            'profit_history': [],
-                            'trailing_sl_history': [],
-                            'stop_hit_history': [],
-                            'direction_reversed_history': [],
-                            'min_hold_met_history': [],
-                            'price_source': 'reentry_ltp'
-                        }
-                        log_signal(instrument_data, token, 'REENTRY', position, ltp, 'ltp', None)
-                        reentry_triggered = True
-                        was_premature_exit = False
+            reentry = triggers.reentry_at(data, trigger_price)
+            if reentry:
+                position = reentry
+                position_data = {
+                    'entry_price': ltp,
+                    'entry_time': now,
+                    **position_histories(supertrend),
+                    'price_source': 'reentry_ltp'
+                }
+                if reentry == 'LONG':
+                    position_data['highest_price'] = high
+                else:
+                    position_data['lowest_price'] = low
+                log_signal(instrument_data, token, 'REENTRY', position, ltp, 'ltp', None, now)
+                reentry_triggered = True
+                was_premature_exit = False
         except Exception as e:
             logging.error(f"Re-entry error for {symbol}: {e}")
 
@@ -94,46 +168,30 @@ async def handle_position_logic(kite, instrument_data, token):
     if not position and not reentry_triggered:
         try:
             entry_price = None
-            if 'direction' not in row or 'direction' not in prev_row:
-                logging.warning(f"Missing 'direction' column for {symbol}")
-                return
-
-            if (row['direction'] == -1 and prev_row['direction'] == 1) or trigger_price > prev_row['supertrend']:
-                entry_price = max(live_data['best_ask'], prev_row['supertrend'], ltp)
+            if triggers.enters('LONG', trigger_price):
+                entry_price = max(live_data['best_ask'], prev_supertrend, ltp)
                 position = 'LONG'
                 position_data = {
                     'entry_price': entry_price,
                     'entry_time': now,
-                    'highest_price': row['high'],
-                    'supertrend_history': [row['supertrend']],
-                    'atr_history': [],
-                    'profit_history': [],
-                    'trailing_sl_history': [],
-                    'stop_hit_history': [],
-                    'direction_reversed_history': [],
-                    'min_hold_met_history': [],
-                    'price_source': 'best_ask' if live_data['best_ask'] == entry_price else 'supertrend' if prev_row['supertrend'] == entry_price else 'ltp'
+                    'highest_price': high,
+                    **position_histories(supertrend),
+                    'price_source': 'best_ask' if live_data['best_ask'] == entry_price else 'supertrend' if prev_supertrend == entry_price else 'ltp'
                 }
-            elif (row['direction'] == 1 and prev_row['direction'] == -1) or trigger_price < prev_row['supertrend']:
-                entry_price = min(live_data['best_bid'], prev_row['supertrend'], ltp)
+            elif triggers.enters('SHORT', trigger_price):
+                entry_price = min(live_data['best_bid'], prev_supertrend, ltp)
                 position = 'SHORT'
                 position_data = {
                     'entry_price': entry_price,
                     'entry_time': now,
-                    'lowest_price': row['low'],
-                    'supertrend_history': [row['supertrend']],
-                    'atr_history': [],
-                    'profit_history': [],
-                    'trailing_sl_history': [],
-                    'stop_hit_history': [],
-                    'direction_reversed_history': [],
-                    'min_hold_met_history': [],
-                    'price_source': 'best_bid' if live_data['best_bid'] == entry_price else 'supertrend' if prev_row['supertrend'] == entry_price else 'ltp'
+                    'lowest_price': low,
+                    **position_histories(supertrend),
+                    'price_source': 'best_bid' if live_data['best_bid'] == entry_price else 'supertrend' if prev_supertrend == entry_price else 'ltp'
                 }
 
             if entry_price:
                 # print('Entry',position, entry_price)
-                log_signal(instrument_data, token, 'ENTRY', position, entry_price, position_data['price_source'], None)
+                log_signal(instrument_data, token, 'ENTRY', position, entry_price, position_data['price_source'], None, now)
         except Exception as e:
             logging.error(f"Entry error for {symbol}: {e}")
 
@@ -143,41 +201,24 @@ async def handle_position_logic(kite, instrument_data, token):
         reason = None
 
         try:
-            atr = compute_atr(data['intraday'])
+            atr = triggers.atr(data)
+            entry_price = position_data['entry_price']
+            position_data['supertrend_history'].append(supertrend)
 
             if position == 'LONG':
-                position_data['highest_price'] = max(position_data.get('highest_price', 0), row['high'])
-                position_data['supertrend_history'].append(row['supertrend'])
-
-                entry_price = position_data['entry_price']
+                position_data['highest_price'] = max(position_data.get('highest_price', 0), high)
                 current_profit = trigger_price - entry_price
                 atr_multiplier = 1.5 if current_profit < 2 * atr else 1
-
                 # trailing_sl = position_data['highest_price'] - (atr * atr_multiplier) - EXIT_BUFFER
-                trailing_sl = prev_row['supertrend'] - EXIT_BUFFER
-                stop_hit = trigger_price < trailing_sl
-
-                direction_reversed = (
-                    (row['direction'] == 1 and prev_row['direction'] == -1) or 
-                    (trigger_price < prev_row['supertrend'])
-                )
-
             elif position == 'SHORT':
-                position_data['lowest_price'] = min(position_data.get('lowest_price', float('inf')), row['low'])
-                position_data['supertrend_history'].append(row['supertrend'])
-
-                entry_price = position_data['entry_price']
+                position_data['lowest_price'] = min(position_data.get('lowest_price', float('inf')), low)
                 current_profit = entry_price - trigger_price
                 atr_multiplier = 1.5 if current_profit < 2 * atr else 0.75
-
                 # trailing_sl = position_data['lowest_price'] + (atr * atr_multiplier) + EXIT_BUFFER
-                trailing_sl = prev_row['supertrend'] + EXIT_BUFFER
-                stop_hit = trigger_price > trailing_sl
 
-                direction_reversed = (
-                    (row['direction'] == -1 and prev_row['direction'] == 1) or 
-                    (trigger_price > prev_row['supertrend'])
-                )
+            trailing_sl = triggers.stop_level(position)
+            stop_hit = triggers.stop_hit(position, trigger_price)
+            direction_reversed = triggers.reverses(position, trigger_price)
 
             hold_duration = now - position_data['entry_time']
             min_hold_met = hold_duration >= MIN_HOLD_DURATION
@@ -201,7 +242,7 @@ async def handle_position_logic(kite, instrument_data, token):
 
         if exit_price:
             # print('EXIT',position, entry_price)
-            log_signal(instrument_data, token, 'EXIT', position, exit_price, 'live', reason)
+            log_signal(instrument_data, token, 'EXIT', position, exit_price, 'live', reason, now)
             data['last_exit_time'] = now
             data['last_exit_position'] = position
             data['was_premature_exit'] = (reason == 'STOPLOSS')
@@ -214,16 +255,16 @@ async def handle_position_logic(kite, instrument_data, token):
     data['current_position'] = position
 
 
-async def monitor_instrument_signals(kite, instrument_data, token):
-    """Continuous signal monitoring with initial delay for setup"""
-    # Initial wait for system initialization (120 seconds)
-    logging.info(f"🕒 Delaying initial monitoring for {token} (120s for setup)")
-    await asyncio.sleep(100)  
+async def monitor_instrument_signals(broker, instrument_data, token, quotes=None, price_cache=None, initial_delay=INITIAL_DELAY):
+    """Continuous signal monitoring, after an initial delay unless the instrument was warmed up"""
+    if initial_delay:
+        logging.info(f"🕒 Delaying initial monitoring for {token} ({initial_delay}s for setup)")
+        await asyncio.sleep(initial_delay)
     
     logging.info(f"🚀 Starting continuous monitoring for {token}")
     while True:
         try:
-            await handle_position_logic(kite, instrument_data, token)
+            await handle_position_logic(broker, instrument_data, token, quotes, price_cache)
             await asyncio.sleep(10)  # Regular check interval
         except Exception as e:
             logging.error(f"Signal monitoring error for {token}: {str(e)}")
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import numpy as np
+import clock
+from . import monitoring
+from .monitoring import handle_position_logic, trigger_table
+
+SAFETY_INTERVAL = 10  # seconds between runs while a position is open, whatever the feeds do
+
+
+class DecisionScheduler:
+    """Runs an instrument's decision logic only when something it depends on changed.
+
+    An instrument is woken when a new bar lands in its intraday store, when
+    the forming bar's indicators flip direction, when a live price maps to
+    an action in its TriggerTable (entry, re-entry or a stop past the
+    minimum hold), or when an open position reaches its minimum hold time.
+    Prices come from ticks (on_price) and REST quote refreshes (on_quote),
+    and an open position is re-evaluated at least every SAFETY_INTERVAL
+    even if both stall. Wakes that arrive while a decision is running
+    coalesce into one follow-up run; idle instruments cost nothing.
+    Position histories are sampled once per run, not on a fixed cadence.
+    """
+
+    def __init__(self, instrument_data):
+        self.instrument_data = instrument_data
+        self.events = {token: asyncio.Event() for token in instrument_data}
+        self.tokens = {data['symbol']: token for token, data in instrument_data.items()}
+        self.marks = {}  # token -> (newest bar, forming direction, closed-bar supertrend)
+        self.stats = {'bar': 0, 'indicators': 0, 'price': 0, 'hold': 0, 'safety': 0, 'start': 0, 'runs': 0}
+
+    def wake(self, token, reason):
+        event = self.events.get(token)
+        if event is not None:
+            self.stats[reason] += 1
+            event.set()
+
+    # === Triggers ===
+    def on_indicators(self, token, name):
+        """events.indicator_listeners hook: wake on a new bar or a direction flip of the forming bar"""
+        if name != 'intraday' or token not in self.events:
+            return
+        store = self.instrument_data[token]['candles']['intraday']
+        if len(store) < 2 or not store.has_column('supertrend'):
+            return
+        direction = float(store['direction'][-1])
+        supertrend = float(store['supertrend'][-2])
+        mark = (
+            int(store.dates_ns()[-1]),
+            None if np.isnan(direction) else direction,
+            None if np.isnan(supertrend) else supertrend,
+        )
+        previous = self.marks.get(token)
+        if mark == previous:
+            return
+        self.marks[token] = mark
+        self.wake(token, 'bar' if previous is None or previous[0] != mark[0] else 'indicators')
+
+    def on_price(self, token, price):
+        """Tick hook: wake only when the price maps to an action in the instrument's trigger table"""
+        data = self.instrument_data.get(token)
+        triggers = trigger_table(data) if data is not None else None
+        if triggers is not None and triggers.action(price, data, clock.now()):
+            self.wake(token, 'price')
+
+    def on_quote(self, symbol, quote):
+        """QuoteService listener: REST quotes stand in for ticks while the socket is stale"""
+        token = self.tokens.get(symbol)
+        if token is not None:
+            self.on_price(token, quote['ltp'])
+
+    def prime(self, ready):
+        """Mark the current indicators and wake the instruments that can trade now"""
+        for token in self.instrument_data:
+            self.on_indicators(token, 'intraday')
+            self.events[token].clear()
+        for token in ready:
+            self.wake(token, 'start')
+
+    def _hold_timeout(self, data):
+        """Seconds until an open position's minimum hold is met (None when nothing is pending)"""
+        entry_time = (data['position_data'] or {}).get('entry_time')
+        if not data['position'] or entry_time is None:
+            return None
+        remaining = (entry_time + monitoring.MIN_HOLD_DURATION - clock.now()).total_seconds()
+        return remaining + 0.5 if remaining > 0 else None
+
+    def _timeout(self, data):
+        """(seconds, reason) to wait without an event: the pending hold, capped at SAFETY_INTERVAL while in a position"""
+        if not data['position']:
+            return None, None
+        hold = self._hold_timeout(data)
+        if hold is not None and hold <= SAFETY_INTERVAL:
+            return hold, 'hold'
+        return SAFETY_INTERVAL, 'safety'
+
+    # === Decision loop ===
+    async def run(self, broker, token, quotes=None, price_cache=None):
+        """Per-instrument task replacing the fixed-interval monitor loop"""
+        event = self.events[token]
+        data = self.instrument_data[token]
+        logging.info(f"🚀 Event-driven monitoring for {token}")
+        while True:
+            timeout, reason = self._timeout(data)
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                self.stats[reason] += 1
+            event.clear()
+            self.stats['runs'] += 1
+            try:
+                await handle_position_logic(broker, self.instrument_data, token, quotes, price_cache)
+            except Exception as e:
+                logging.error(f"Signal monitoring error for {token}: {str(e)}")
+                await asyncio.sleep(30)  # Backoff on error
@@ -1,52 +1,45 @@
-import datetime
 import logging
-import pandas as pd
-from kiteconnect import KiteConnect
+import clock
+from data_ingestion.quote_data import parse_quote
 
-def get_live_price_data(kite, symbol):
+# Called as listener(token, symbol, signal) after every logged signal (persistence sinks, journals)
+signal_listeners = []
+
+async def get_live_price_data(broker, symbol):
     """Get real-time market data with error handling"""
     try:
-        data = kite.quote(symbol)[symbol]
-        return {
-            'ltp': data['last_price'],
-            'best_ask': data['depth']['sell'][0]['price'],
-            'best_bid': data['depth']['buy'][0]['price'],
-            'volume': data['volume']
-        }
+        return parse_quote((await broker.quote(symbol))[symbol])
     except Exception as e:
         logging.error(f"Price data error for {symbol}: {str(e)}")
         return None
 
-def log_signal(instrument_data, token, action, position, price, source, reason):
-    """Log trading signal to instrument's signal history"""
-    now = datetime.datetime.now()
-    new_signal = pd.DataFrame([{
-        'timestamp': now,
-        'action': action,
-        'position': position.upper(),
-        'price': price,
-        'price_source': source,
-        'exit_reason': reason
-    }])
+async def resolve_live_price(broker, symbol, token=None, quotes=None, price_cache=None):
+    """Live price from the tick cache, then the shared quote cache, then a direct quote call"""
+    live_data = price_cache.get(token) if price_cache is not None else None
+    if live_data is None and quotes is not None:
+        live_data = quotes.get(symbol)
+    if live_data is None:
+        live_data = await get_live_price_data(broker, symbol)
+    return live_data
+
+def log_signal(instrument_data, token, action, position, price, source, reason, timestamp=None):
+    """Log trading signal to instrument's signal history (at `timestamp`, default now)"""
+    now = clock.now() if timestamp is None else timestamp
     
-    # Append to token's signals (not signals_df)
+    # Append to token's SignalLog (O(1); DataFrames are only built for exports)
     data = instrument_data[token]
-    # data['signals'] = pd.concat([data['signals'], new_signal], ignore_index=True)
-
-    # Only concatenate if new_signal is not empty
-    if not new_signal.empty:
-        if data['signals'].empty:
-            # If the current signals DataFrame is empty, then we can just assign the new_signal
-            data['signals'] = new_signal
-        else:
-            # Otherwise, concatenate
-            data['signals'] = pd.concat([data['signals'], new_signal], ignore_index=True)
-
+    signal = data['signals'].append(now, action, position.upper(), price, source, reason).as_dict()
     
     logging.info(f"{data['symbol']} {position.upper()} {action} @ {price} ({reason})")
 
+    for listener in signal_listeners:
+        try:
+            listener(token, data['symbol'], signal)
+        except Exception as e:
+            logging.error(f"Signal listener error for {data['symbol']}: {e}")
+
 def minutes_since(past_time):
     """Calculate minutes elapsed since given time"""
     if past_time is None:
         return float('inf')
-    return (datetime.datetime.now() - past_time).total_seconds() / 60
+    return (clock.now() - past_time).total_seconds() / 60
@@ -0,0 +1,13 @@
+import asyncio
+
+# Set by ingestion (instrument_manager.mark_updated) whenever any instrument's
+# intraday/daily frame gets a new version; awaited by the indicator monitors
+data_changed = {'intraday': asyncio.Event(), 'daily': asyncio.Event()}
+
+# Called as listener(token, name) after an instrument's indicators are recomputed
+# (decision scheduler wake-ups)
+indicator_listeners = []
+
+# Set from the KiteTicker thread (via the loop) when the socket reconnects;
+# awaited by the intraday reconciliation task
+ticker_reconnected = asyncio.Event()
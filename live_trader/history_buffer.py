@@ -0,0 +1,123 @@
+import numpy as np
+
+HISTORY_CAPACITY = 720  # two hours of raw 10-second points before older ones are downsampled
+
+# Per-position tracking series appended by decision.monitoring on every check
+POSITION_HISTORIES = [
+    'supertrend_history', 'atr_history', 'profit_history', 'trailing_sl_history',
+    'stop_hit_history', 'direction_reversed_history', 'min_hold_met_history',
+]
+
+
+def minmax_downsample(values, n_out):
+    """Keep the min and max of each bucket, in time order (spikes and boolean hits survive)"""
+    count = n_out // 2
+    size = len(values) // count
+    buckets = values[:count * size].reshape(count, size)
+    lo = np.argmin(np.where(np.isnan(buckets), np.inf, buckets), axis=1)
+    hi = np.argmax(np.where(np.isnan(buckets), -np.inf, buckets), axis=1)
+    rows = np.arange(len(buckets))[:, None]
+    picks = np.sort(np.stack([lo, hi], axis=1), axis=1)
+    return buckets[rows, picks].ravel()
+
+
+def lttb_downsample(values, n_out):
+    """Largest-Triangle-Three-Buckets: n_out points that best preserve the visual shape"""
+    n = len(values)
+    if n_out >= n or n_out < 3:
+        return values[:n_out].copy()
+    y = np.nan_to_num(values, nan=0.0)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    out = np.empty(n_out)
+    out[0], out[-1] = values[0], values[-1]
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = (end + next_end - 1) / 2
+        next_y = y[end:next_end].mean() if next_end > end else y[-1]
+        xs = np.arange(start, end)
+        areas = np.abs((previous - next_x) * (y[start:end] - y[previous])
+                       - (previous - xs) * (next_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        out[i + 1] = values[previous]
+    return out
+
+
+DOWNSAMPLERS = {
+    'minmax': minmax_downsample,
+    'lttb': lttb_downsample,
+    'drop': lambda values, n_out: values[-n_out:].copy(),  # plain ring: oldest points are discarded
+}
+
+
+class HistoryBuffer:
+    """Fixed-capacity float series for one position metric.
+
+    Appends are O(1) into a preallocated array. When it fills, the older
+    half is downsampled to a quarter of the capacity and the newest half
+    stays raw, so memory, snapshot size and chart size are bounded however
+    long a position is held. `compactions` counts rewrites of earlier
+    points (delta writers must resend the series when it moves).
+    """
+
+    def __init__(self, capacity=HISTORY_CAPACITY, method='minmax'):
+        if capacity < 8 or capacity % 4:
+            raise ValueError("capacity must be a multiple of 4 (at least 8)")
+        self.values = np.empty(capacity, dtype='f8')
+        self.length = 0
+        self.total = 0
+        self.compactions = 0
+        self.downsample = DOWNSAMPLERS[method]
+
+    @classmethod
+    def from_values(cls, values, capacity=HISTORY_CAPACITY, method='minmax'):
+        buffer = cls(capacity, method)
+        buffer.extend(values)
+        return buffer
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        return iter(self.array())
+
+    def __getitem__(self, index):
+        return self.array()[index]
+
+    def append(self, value):
+        if self.length == len(self.values):
+            self._compact()
+        self.values[self.length] = np.nan if value is None else value
+        self.length += 1
+        self.total += 1
+
+    def extend(self, values):
+        for value in values:
+            self.append(value)
+
+    def _compact(self):
+        capacity = len(self.values)
+        older = capacity // 2
+        reduced = self.downsample(self.values[:older], capacity // 4)
+        self.values[:len(reduced)] = reduced
+        self.values[len(reduced):len(reduced) + capacity - older] = self.values[older:]
+        self.length = len(reduced) + capacity - older
+        self.compactions += 1
+
+    def array(self):
+        """Current points as a read-only view"""
+        view = self.values[:self.length]
+        view.flags.writeable = False
+        return view
+
+    def tolist(self, start=0):
+        return self.values[start:self.length].tolist()
+
+
+def position_histories(supertrend=None):
+    """Fresh history buffers for a new position, seeded with the entry bar's supertrend"""
+    histories = {name: HistoryBuffer() for name in POSITION_HISTORIES}
+    if supertrend is not None:
+        histories['supertrend_history'].append(supertrend)
+    return histories
@@ -1,25 +1,45 @@
-import pandas as pd
 import datetime
+from candle_store import CandleStore, INTRADAY_CAPACITY, DAILY_CAPACITY
+from tick_store import TickBuffer, TICK_CAPACITY
+from signal_log import SignalLog
+from computation.incremental import IncrementalIndicators
+from events import data_changed
 
 instrument_data = {}
 
-def init_instrument_data(token, symbol, intraday_df=None):
-    """Initialize new instrument with consistent structure"""
-    instrument_data[token] = {
+def init_instrument_data(token, symbol, intraday_df=None, registry=None):
+    """Initialize new instrument with consistent structure (in the global registry unless one is given)"""
+    candles = {'intraday': CandleStore(INTRADAY_CAPACITY), 'daily': CandleStore(DAILY_CAPACITY)}
+    if intraday_df is not None:
+        candles['intraday'].upsert_many(intraday_df.to_dict('records'))
+
+    registry = instrument_data if registry is None else registry
+    registry[token] = {
         'symbol': symbol,
-        'tick': pd.DataFrame(),
-        'intraday': intraday_df if intraday_df is not None else pd.DataFrame(),
-        'daily': pd.DataFrame(),
-        'signals': pd.DataFrame(columns=['timestamp', 'action', 'position', 'price', 'price_source', 'exit_reason']),
+        'tick': TickBuffer(TICK_CAPACITY),
+        # 'intraday'/'daily' are DataFrame views over the candle stores, refreshed on every update
+        'candles': candles,
+        'intraday': candles['intraday'].frame(),
+        'daily': candles['daily'].frame(),
+        'signals': SignalLog(),
         'position': None,
         'current_position': None,
         'position_data': {},
         'last_exit_time': None,
         'last_exit_position': None,
         'was_premature_exit': False,
-        'checksums': {'intraday': None, 'daily': None}
+        'versions': {'intraday': 0, 'daily': 0},
+        'computed_versions': {'intraday': 0, 'daily': 0},
+        'checksums': {'intraday': None, 'daily': None},
+        'indicators': {'intraday': IncrementalIndicators(), 'daily': IncrementalIndicators(fisher=False)},
+        'triggers': None  # decision.monitoring.TriggerTable for the current intraday frame
     }
 
+def mark_updated(instrument_data, token, name):
+    """Publish a new data version for an instrument and wake the indicator monitor"""
+    instrument_data[token]['versions'][name] += 1
+    data_changed[name].set()
+
 def initialize_all_instruments(exchange_map):
     """Initialize all instruments from config"""
     for exchange in exchange_map.keys():
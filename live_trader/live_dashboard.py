@@ -1,7 +1,9 @@
 import streamlit as st
 from streamlit_autorefresh import st_autorefresh
+import numpy as np
 import plotly.graph_objects as go
-from data_utils import load_position_data, format_timestamp
+from history_buffer import lttb_downsample
+from data_utils import current_state, format_timestamp
 from config import exchange_symbol_token_map
 
 # === Page Config ===
@@ -10,6 +12,8 @@ st.title("📈 Real-Time Position Monitor")
 
 # === Settings ===
 REFRESH_INTERVAL = 10  # seconds
+FEED_REFRESH = 1  # seconds between redraws of the position panel from the pushed feed
+CHART_POINTS = 300  # histories are downsampled to this many points before plotting
 st_autorefresh(interval=REFRESH_INTERVAL * 1000, key="dash_refresh")
 
 # === Provided mapping ===
@@ -21,7 +25,7 @@ for exchange, symbol_dict in exchange_symbol_token_map.items():
         token_to_display_name[str(token)] = f"{symbol} ({exchange})"
 
 # === Dashboard Layout ===
-positions = load_position_data()
+positions, _, _ = current_state()
 
 if not positions:
     st.warning("⏳ Waiting for position data...")
@@ -34,28 +38,10 @@ selected_token = st.sidebar.selectbox(
     format_func=lambda t: f"{token_to_display_name.get(t, 'Unknown')} [{t}]"
 )
 
-data = positions.get(selected_token, {})
-
-if not data:
-    st.error(f"No position data for token {selected_token}")
-    st.stop()
-
-# === Position Overview ===
-col1, col2, col3 = st.columns(3)
-with col1:
-    st.metric("Entry Price", f"₹{data.get('entry_price', 'N/A')}")
-with col2:
-    st.metric("Current Price", f"₹{data.get('current_price', 'N/A')}")
-with col3:
-    profit = data.get('profit', 0)
-    st.metric("Profit/Loss", f"₹{profit}", delta=f"{profit/100:.2f}%" if profit else None)
-
-st.divider()
-
 # === Historical Charts ===
-def render_timeseries(title, values):
-    if not values:
-        return
+@st.cache_data(max_entries=64)
+def timeseries_figure(title, values):
+    """Figure for one downsampled series; rebuilt only when its points change"""
     fig = go.Figure()
     fig.add_trace(go.Scatter(
         y=values, 
@@ -69,19 +55,57 @@ def render_timeseries(title, values):
         margin=dict(l=20, r=20, t=40, b=20),
         showlegend=False
     )
-    st.plotly_chart(fig, use_container_width=True)
-
-render_timeseries("Supertrend History", data.get("supertrend_history"))
-render_timeseries("ATR History", data.get("atr_history"))
-render_timeseries("Profit History", data.get("profit_history"))
-
-# === Position Metadata ===
-with st.expander("Position Details"):
-    st.write(f"**Entry Time:** {format_timestamp(data.get('entry_time'))}")
-    st.write(f"**Price Source:** {data.get('price_source')}")
-    st.write(f"**Trailing SL:** {data.get('trailing_sl')}")
-    st.write(f"**Stop Hits:** {data.get('stop_hit_count', 0)}")
-    st.write(f"**Direction Reversals:** {data.get('direction_reversed_count', 0)}")
-    st.write(f"**Min Hold Met:** {data.get('min_hold_met_count', 0)}")
-
-st.caption(f"Last updated: {format_timestamp(data.get('last_updated'))}")
\ No newline at end of file
+    return fig
+
+def render_timeseries(title, values):
+    if values is None or len(values) == 0:
+        return
+    points = lttb_downsample(np.asarray(values, dtype='f8'), CHART_POINTS)
+    st.plotly_chart(timeseries_figure(title, tuple(points.tolist())), use_container_width=True)
+
+@st.fragment(run_every=FEED_REFRESH)
+def render_position(token):
+    """Position panel; redrawn from the feed without rerunning the page"""
+    positions, indicators, signals = current_state()
+    data = positions.get(token, {})
+
+    if not data:
+        st.error(f"No position data for token {token}")
+    else:
+        # === Position Overview ===
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Entry Price", f"₹{data.get('entry_price', 'N/A')}")
+        with col2:
+            st.metric("Current Price", f"₹{data.get('current_price', 'N/A')}")
+        with col3:
+            profit = data.get('profit', 0)
+            st.metric("Profit/Loss", f"₹{profit}", delta=f"{profit/100:.2f}%" if profit else None)
+
+        st.divider()
+
+        render_timeseries("Supertrend History", data.get("supertrend_history"))
+        render_timeseries("ATR History", data.get("atr_history"))
+        render_timeseries("Profit History", data.get("profit_history"))
+
+        # === Position Metadata ===
+        with st.expander("Position Details"):
+            st.write(f"**Entry Time:** {format_timestamp(data.get('entry_time'))}")
+            st.write(f"**Price Source:** {data.get('price_source')}")
+            st.write(f"**Trailing SL:** {data.get('trailing_sl')}")
+            st.write(f"**Stop Hits:** {data.get('stop_hit_count', 0)}")
+            st.write(f"**Direction Reversals:** {data.get('direction_reversed_count', 0)}")
+            st.write(f"**Min Hold Met:** {data.get('min_hold_met_count', 0)}")
+
+        st.caption(f"Last updated: {format_timestamp(data.get('last_updated'))}")
+
+    # === Indicators and recent signals (pushed by the engine's live feed) ===
+    latest = indicators.get(token)
+    if latest:
+        st.caption(" | ".join(f"{name}: {latest[name]:.2f}" for name in ('close', 'supertrend', 'fisher', 'atr')
+                              if isinstance(latest.get(name), (int, float))))
+    recent = [signal for signal in signals if str(signal.get('token')) == token][-10:]
+    if recent:
+        st.dataframe(recent[::-1], use_container_width=True)
+
+render_position(selected_token)
@@ -0,0 +1,304 @@
+"""Push feed of live engine state over Server-Sent Events.
+
+LiveFeed runs inside the engine's event loop (asyncio.start_server, no
+extra dependencies) and serves:
+
+    GET /events   text/event-stream: one "snapshot" event, then
+                  "position" (set/update/clear deltas, as in position
+                  snapshots), "indicators", "overview" (one row per
+                  changed instrument) and "signal" events
+    GET /state    the current snapshot as JSON
+
+No CORS headers are sent: the dashboard reads the feed server-side, and
+web pages open in a browser on this machine must not be able to read it.
+
+Signals are pushed the moment they are logged; positions and indicators
+are diffed every FEED_INTERVAL. Each subscriber has its own pending set
+keyed by (kind, token): while a slow client is still draining, newer
+updates are merged into what it has not been sent yet, so memory per
+client stays bounded and the trading loop never waits on a socket.
+
+FeedClient is the dashboard side: it follows /events on a background
+thread and keeps the latest state.
+"""
+import time
+import copy
+import asyncio
+import logging
+import threading
+import urllib.request
+from collections import deque
+from storage.position_snapshots import PositionDeltas, apply_delta, encode_line, decode_line
+
+FEED_HOST = "127.0.0.1"
+FEED_PORT = 8765
+FEED_URL = f"http://{FEED_HOST}:{FEED_PORT}/events"
+FEED_INTERVAL = 0.5  # seconds between position/indicator diffs
+KEEPALIVE = 15  # seconds of silence before a keep-alive comment
+MAX_SIGNALS = 200  # signals queued per subscriber (oldest dropped beyond that)
+INDICATOR_FIELDS = ['close', 'supertrend', 'direction', 'fisher', 'trigger']
+
+
+def merge_position_delta(pending, entry):
+    """Fold a newer position entry into one not yet sent"""
+    if pending is None or entry['op'] != 'update' or pending['op'] == 'clear':
+        return entry
+    merged = copy.deepcopy(pending)
+    state = merged.setdefault('state', {})
+    if merged['op'] == 'set':
+        state.update(entry.get('state', {}))
+        for name, points in entry.get('append', {}).items():
+            state[name] = state.get(name, []) + points
+    else:
+        appends = merged.setdefault('append', {})
+        for name, value in entry.get('state', {}).items():
+            state[name] = value
+            appends.pop(name, None)  # a series resent whole supersedes earlier appends
+        for name, points in entry.get('append', {}).items():
+            if name in state:
+                state[name] = state[name] + points
+            else:
+                appends[name] = appends.get(name, []) + points
+        if not appends:
+            del merged['append']
+    merged['at'] = entry['at']
+    return merged
+
+
+def sse(kind, payload):
+    return b"event: " + kind.encode() + b"\ndata: " + encode_line(payload) + b"\n"
+
+
+class _Subscriber:
+    def __init__(self):
+        self.pending = {}  # (kind, token) -> latest unsent payload
+        self.signals = deque(maxlen=MAX_SIGNALS)
+        self.wake = asyncio.Event()
+
+    def push(self, kind, token, payload):
+        if kind == 'position':
+            payload = merge_position_delta(self.pending.get((kind, token)), payload)
+        self.pending[(kind, token)] = payload
+        self.wake.set()
+
+    def push_signal(self, payload):
+        self.signals.append(payload)
+        self.wake.set()
+
+    def take(self):
+        events = [('signal', payload) for payload in self.signals]
+        events += [(kind, payload) for (kind, _), payload in self.pending.items()]
+        self.signals.clear()
+        self.pending = {}
+        return events
+
+
+class LiveFeed:
+    """Engine side: diffs instrument state and fans it out to SSE subscribers"""
+
+    def __init__(self, instrument_data, host=FEED_HOST, port=FEED_PORT, interval=FEED_INTERVAL, overview=None):
+        self.instrument_data = instrument_data
+        self.overview = overview
+        self.overview_version = 0
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.deltas = PositionDeltas()
+        self.indicator_versions = {}
+        self.subscribers = set()
+        self.stats = {'clients': 0, 'events': 0}
+
+    # === Producers ===
+    def on_signal(self, token, symbol, signal):
+        """decision.signals listener: pushed immediately"""
+        payload = {'token': token, 'symbol': symbol, **signal}
+        for subscriber in self.subscribers:
+            subscriber.push_signal(payload)
+
+    def _indicators(self, token, data):
+        store = data['candles']['intraday']
+        payload = {'token': token, 'time': store.last_date()}
+        for name in INDICATOR_FIELDS:
+            if store.has_column(name):
+                payload[name] = store[name][-1]
+        payload['atr'] = data['indicators']['intraday'].rolling_atr
+        return payload
+
+    def tick(self):
+        """Diff positions and indicators once and queue the changes for every subscriber"""
+        for entry in self.deltas.changes(self.instrument_data):
+            # Freeze: 'set' entries reference live history buffers
+            entry = decode_line(encode_line(entry))
+            for subscriber in self.subscribers:
+                subscriber.push('position', entry['token'], entry)
+        for token, data in self.instrument_data.items():
+            version = data['computed_versions']['intraday']
+            if version and self.indicator_versions.get(token) != version:
+                self.indicator_versions[token] = version
+                payload = self._indicators(token, data)
+                for subscriber in self.subscribers:
+                    subscriber.push('indicators', token, payload)
+        if self.overview is not None and self.overview.refresh() != self.overview_version:
+            for row in self.overview.changed_since(self.overview_version):
+                for subscriber in self.subscribers:
+                    subscriber.push('overview', row['token'], row)
+            self.overview_version = self.overview.version
+
+    def snapshot(self):
+        """Full current state; consistent with the deltas that follow it after a tick()"""
+        positions = {token: dict(data.get('position_data') or {}) for token, data in self.instrument_data.items()}
+        indicators = {token: self._indicators(token, data) for token, data in self.instrument_data.items()
+                      if data['computed_versions']['intraday']}
+        signals = sorted(
+            ({'token': token, 'symbol': data['symbol'], **record.as_dict()}
+             for token, data in self.instrument_data.items() for record in data['signals'].records[-20:]),
+            key=lambda signal: signal['timestamp']
+        )
+        overview = self.overview.table() if self.overview is not None else []
+        started_at = self.overview.started_at if self.overview is not None else None
+        return {'positions': positions, 'indicators': indicators, 'signals': signals, 'overview': overview,
+                'started_at': started_at}
+
+    # === Server ===
+    async def _stream(self, writer):
+        self.tick()  # bring the shared deltas up to date so the snapshot matches them
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                     b"Connection: keep-alive\r\n\r\n")
+        writer.write(sse('snapshot', self.snapshot()))
+        subscriber = _Subscriber()
+        self.subscribers.add(subscriber)
+        self.stats['clients'] += 1
+        try:
+            await writer.drain()
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.wake.wait(), KEEPALIVE)
+                except asyncio.TimeoutError:
+                    writer.write(b": keep-alive\n\n")
+                    await writer.drain()
+                    continue
+                subscriber.wake.clear()
+                events = subscriber.take()
+                writer.write(b"".join(sse(kind, payload) for kind, payload in events))
+                self.stats['events'] += len(events)
+                # Only this client's task waits here; updates meanwhile are merged into its pending set
+                await writer.drain()
+        finally:
+            self.subscribers.discard(subscriber)
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5)
+            path = request.split(b" ", 2)[1].split(b"?")[0]
+            if path == b"/events":
+                await self._stream(writer)
+            elif path == b"/state":
+                body = encode_line(self.snapshot())
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body)
+                await writer.drain()
+            else:
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError, IndexError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        """Serve subscribers and diff state every `interval` seconds; returns if the port cannot be bound"""
+        try:
+            server = await asyncio.start_server(self._handle, self.host, self.port)
+        except OSError as e:
+            # The feed is optional: a port conflict must not take the trading engine down
+            logging.error(f"Live feed disabled, cannot listen on {self.host}:{self.port}: {e}")
+            return
+        print(f"📡 Live feed on http://{self.host}:{self.port}/events")
+        async with server:
+            while True:
+                try:
+                    self.tick()
+                except Exception as e:
+                    logging.error(f"Live feed update failed: {e}")
+                await asyncio.sleep(self.interval)
+
+
+class FeedClient:
+    """Dashboard side: follows the feed on a daemon thread and keeps the latest state"""
+
+    def __init__(self, url=FEED_URL, reconnect_delay=2):
+        self.url = url
+        self.reconnect_delay = reconnect_delay
+        self.positions = {}
+        self.indicators = {}
+        self.overview = {}
+        self.signals = deque(maxlen=MAX_SIGNALS)
+        self.version = 0
+        self.overview_version = 0
+        self.started_at = None  # engine run the overview belongs to
+        self.connected = False
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="live-feed", daemon=True)
+            self.thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            try:
+                with urllib.request.urlopen(self.url, timeout=2 * KEEPALIVE) as response:
+                    self.connected = True
+                    self._consume(response)
+            except OSError:
+                pass
+            except Exception as e:
+                logging.warning(f"Live feed client error: {e}")
+            self.connected = False
+            time.sleep(self.reconnect_delay)
+
+    def _consume(self, response):
+        kind, data = None, []
+        for raw in response:
+            line = raw.rstrip(b"\r\n")
+            if not line:
+                if data:
+                    self._apply(kind, decode_line(b"\n".join(data)))
+                kind, data = None, []
+            elif line.startswith(b"event:"):
+                kind = line[6:].strip().decode()
+            elif line.startswith(b"data:"):
+                data.append(line[5:].strip())
+
+    def _apply(self, kind, payload):
+        with self.lock:
+            if kind == 'snapshot':
+                self.positions = {str(token): state for token, state in payload['positions'].items()}
+                self.indicators = {str(token): values for token, values in payload['indicators'].items()}
+                self.overview = {str(row['token']): row for row in payload.get('overview', [])}
+                self.started_at = payload.get('started_at')
+                self.overview_version += 1
+                self.signals.clear()
+                self.signals.extend(payload['signals'])
+            elif kind == 'position':
+                apply_delta(self.positions, payload)
+            elif kind == 'indicators':
+                self.indicators[str(payload['token'])] = payload
+            elif kind == 'overview':
+                self.overview[str(payload['token'])] = payload
+                self.overview_version += 1
+            elif kind == 'signal':
+                self.signals.append(payload)
+            self.version += 1
+
+    def state(self):
+        """(version, positions, indicators, recent signals) copied under the lock"""
+        with self.lock:
+            return self.version, copy.deepcopy(self.positions), dict(self.indicators), list(self.signals)
+
+    def overview_rows(self):
+        """(engine start, overview version, rows); the version moves whenever a row is pushed"""
+        with self.lock:
+            return self.started_at, self.overview_version, list(self.overview.values())
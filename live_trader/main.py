@@ -3,19 +3,34 @@ import logging
 from kiteconnect import KiteConnect, KiteTicker
 from config import api_key, api_secret, access_token, exchange_symbol_token_map
 from instrument_manager import instrument_data, initialize_all_instruments
-from data_ingestion.tick_data import start_tick_data
-from data_ingestion.intraday_data import update_intraday_data
+from data_ingestion.tick_data import start_tick_data, LivePriceCache
+from data_ingestion.intraday_data import update_intraday_data, backfill_intraday_data, reconcile_intraday_on_reconnect
+from data_ingestion.candle_builder import attach_candle_builders
 from data_ingestion.daily_data import fetch_daily_data
-from computation.indicators import global_monitor_intraday_indicators, global_monitor_daily_indicators
-from decision.monitoring import monitor_instrument_signals
+from data_ingestion.quote_data import QuoteService
+from data_ingestion.broker import AsyncKiteClient, monitor_loop_lag
+from storage.candle_cache import CandleCache, load_cached_candles, save_candle_cache, persist_candle_cache
+from storage.timescale_sink import TimescaleSink, stream_candles
+from storage.signal_journal import SignalJournal, JournalReader, SIGNAL_FIELDS, JOURNAL_DIR
+from storage.position_snapshots import PositionSnapshotWriter, SNAPSHOT_DIR
+from storage.recovery import resumable_run, recover_session
+from storage.state_segment import StateSegmentWriter, publish_state
+from live_feed import LiveFeed
+from decision.signals import signal_listeners
+from computation.indicators import global_monitor_intraday_indicators, global_monitor_daily_indicators, precompute_indicators
+from computation.portfolio import PortfolioOverview
+from decision.monitoring import monitor_instrument_signals, INITIAL_DELAY
+from decision.scheduler import DecisionScheduler
+from events import indicator_listeners
 # === ADDED IMPORTS ===
 import os
-import json
 import pandas as pd
+import time
 import datetime
-import numpy as np
 # =====================
 
+STARTED_AT = time.monotonic()
+
 # Initialize logging
 logging.basicConfig(level=logging.DEBUG)
 logging.getLogger("urllib3").setLevel(logging.WARNING)
@@ -35,80 +50,69 @@ initialize_all_instruments(exchange_symbol_token_map)
 # Global task variable
 task = None
 
+# Build 5-minute bars locally from ticks (historical backfill only at startup/reconnect);
+# set False to fall back to polling kite.historical_data every 30 seconds
+USE_TICK_CANDLES = True
+
+# Stream candles, ticks and signals to TimescaleDB (TIMESCALE_DB_CONFIG; needs asyncpg)
+USE_TIMESCALE = False
+
+# Run each instrument's decision logic on new bars, indicator flips and trigger-price crossings;
+# set False to fall back to checking every 10 seconds
+EVENT_DRIVEN_DECISIONS = True
+
+# Push positions, indicators and signals to dashboards over SSE (live_feed.FEED_URL)
+USE_LIVE_FEED = True
+
+# After a restart, continue today's latest run (journal, snapshots and exports) with its open positions
+RESUME_SESSION = True
+
+# Seconds from process start until monitoring is running
+READY_TARGET = 20
+
 # Global run identifier
-RUN_ID = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+RESUMED_RUN = resumable_run() if RESUME_SESSION else None
+RUN_ID = RESUMED_RUN or datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
 
 # === OPTIMIZED DATA SAVING FUNCTIONS ===
-def json_safe(obj):
-    """Robust JSON-safe conversion with numpy support"""
-    if isinstance(obj, datetime.datetime):
-        return obj.isoformat()
-    elif isinstance(obj, pd.Timestamp):
-        return obj.isoformat()
-    elif isinstance(obj, (np.integer, np.int64, np.int32)):
-        return int(obj)
-    elif isinstance(obj, (np.floating, np.float64, np.float32)):
-        return float(obj)
-    elif isinstance(obj, np.bool_):
-        return bool(obj)
-    elif hasattr(obj, 'to_dict'):
-        return obj.to_dict()
-    elif isinstance(obj, (list, tuple)):
-        return [json_safe(i) for i in obj]
-    elif isinstance(obj, dict):
-        return {k: json_safe(v) for k, v in obj.items()}
-    else:
-        return obj
-
-async def save_position_snapshot():
-    """Update position file for current run"""
-    os.makedirs("./data/position_snapshots", exist_ok=True)
-    target_file = f"./data/position_snapshots/positions_{RUN_ID}.json"
-    
+async def save_position_snapshot(writer):
+    """Append this minute's position changes to the run's snapshot file"""
     while True:
         try:
-            temp_file = f"./data/position_snapshots/temp_{RUN_ID}.json"
-            
-            snapshot = {}
-            for token, data in instrument_data.items():
-                pos_data = data.get('position_data', {})
-                snapshot[token] = json_safe(pos_data)
-            
-            # Atomic update
-            with open(temp_file, "w") as f:
-                json.dump(snapshot, f, indent=2)
-            os.replace(temp_file, target_file)
-            
-            print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] ✅ Position snapshot updated")
+            changed = writer.save(instrument_data)
+            print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] ✅ Position snapshot updated ({changed} instruments changed)")
             
         except Exception as e:
             print(f"⚠️ Error updating position snapshot: {e}")
         
         await asyncio.sleep(60)
 
-async def export_signals():
-    """Update signals file for current run"""
+async def export_signals(journal_path):
+    """Append signals journaled since the last pass to this run's CSV"""
     os.makedirs("./data/signal_exports", exist_ok=True)
     target_file = f"./data/signal_exports/signals_{RUN_ID}.csv"
+    reader = JournalReader(journal_path)
+    # A resumed run has already exported the start of its journal (one row per seq)
+    exported = 0
+    if os.path.exists(target_file):
+        with open(target_file) as f:
+            exported = max(0, sum(1 for _ in f) - 1)
+    exported_seq = exported
     
     while True:
         try:
-            temp_file = f"./data/signal_exports/temp_{RUN_ID}.csv"
-            
-            all_signals = []
-            for token, data in instrument_data.items():
-                signals = data.get('signals')
-                if isinstance(signals, pd.DataFrame) and not signals.empty:
-                    df = signals.copy()
-                    df['instrument_token'] = token
-                    df['symbol'] = data.get('symbol', '')
-                    all_signals.append(df)
-            
-            if all_signals:
-                combined_df = pd.concat(all_signals)
-                combined_df.to_csv(temp_file, index=False)
-                os.replace(temp_file, target_file)
-                print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] ✅ Signals updated ({len(combined_df)} rows)")
+            entries = [entry for entry in reader.poll() if entry['seq'] > exported_seq]
+            if entries:
+                df = pd.DataFrame(entries).rename(columns={'token': 'instrument_token'})
+                df['timestamp'] = pd.to_datetime(df['timestamp'])
+                df = df[SIGNAL_FIELDS + ['instrument_token', 'symbol']]
+                # Whole lines in one write, so readers never see a half-written row
+                rows = df.to_csv(header=not os.path.exists(target_file), index=False)
+                with open(target_file, "a", newline="") as f:
+                    f.write(rows)
+                exported += len(df)
+                exported_seq = entries[-1]['seq']
+                print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] ✅ Signals updated (+{len(df)}, {exported} rows)")
             else:
                 print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] ⚠️ No signals to update")
                 
@@ -121,18 +125,107 @@ async def export_signals():
 
 async def main(kite, kws):
     """Main async entry point"""
-    # Start tick data
-    # tick_task = asyncio.create_task(start_tick_data(kws, instrument_data))
+    # Blocking KiteConnect REST calls run on a rate-limited worker pool
+    broker = AsyncKiteClient(kite)
+    loop_lag = {}
+    lag_task = asyncio.create_task(monitor_loop_lag(stats=loop_lag))
     
     # Start intraday and daily updates
     intraday_tasks = []
     daily_tasks = []
     monitoring_tasks = []
     
+    # Warm the candle stores from disk so Kite is only asked for the missing tail
+    candle_cache = CandleCache()
+    load_cached_candles(candle_cache, instrument_data)
+    cache_task = asyncio.create_task(persist_candle_cache(candle_cache, instrument_data))
+    
+    # Open trades, exits and signal history of the run being resumed
+    if RESUMED_RUN:
+        recover_session(instrument_data, RESUMED_RUN)
+    
+    # Every signal is journaled the moment it is logged; exports and alerts tail the journal
+    journal = SignalJournal(os.path.join(JOURNAL_DIR, f"signals_{RUN_ID}.jsonl"))
+    signal_listeners.append(journal.append)
+    
+    # Position snapshots only record what changed since the previous minute
+    snapshots = PositionSnapshotWriter(os.path.join(SNAPSHOT_DIR, f"positions_{RUN_ID}.jsonl"))
+    # The dashboard reads live positions from a shared memory-mapped segment
+    state_segment = StateSegmentWriter()
+    # Portfolio overview rows, refreshed once per publish cycle and shared by the segment and the feed
+    overview = PortfolioOverview(instrument_data)
+    feed_tasks = []
+    # Optional push feed for dashboards; serve() logs and returns if its port is taken
+    if USE_LIVE_FEED:
+        feed = LiveFeed(instrument_data, overview=overview)
+        signal_listeners.append(feed.on_signal)
+        feed_tasks.append(feed.serve())
+    
+    # Optional database persistence; the bot keeps running without it
+    sink = None
+    sink_tasks = []
+    if USE_TIMESCALE:
+        try:
+            sink = TimescaleSink()
+            await sink.start()
+            signal_listeners.append(sink.offer_signal)
+            sink_tasks = [asyncio.create_task(sink.run()),
+                          asyncio.create_task(stream_candles(sink, instrument_data))]
+        except Exception as e:
+            logging.error(f"Timescale sink disabled: {e}")
+            sink = None
+    
+    # Tick-fed price cache is the primary live price source
+    price_cache = LivePriceCache()
+    
+    # REST fallback for stale ticks: one batched quote call per cycle shared by every instrument
+    symbol_tokens = {data['symbol']: token for token, data in instrument_data.items()}
+    quotes = QuoteService(broker, list(symbol_tokens),
+                          needs_quote=lambda symbol: price_cache.get(symbol_tokens[symbol]) is None)
+    quote_task = asyncio.create_task(quotes.run())
+    
+    if USE_TICK_CANDLES:
+        # History must be in place before tick-built bars start landing in the stores
+        attach_candle_builders(instrument_data)
+        results = await asyncio.gather(
+            *(backfill_intraday_data(broker, token, instrument_data) for token in instrument_data),
+            return_exceptions=True
+        )
+        for token, result in zip(instrument_data, results):
+            if isinstance(result, Exception):
+                logging.error(f"Startup backfill error for {instrument_data[token]['symbol']}: {result}")
+        intraday_tasks.append(asyncio.create_task(reconcile_intraday_on_reconnect(broker, instrument_data)))
+    
+    # Indicators are computed before monitoring starts, so warmed-up instruments trade immediately
+    ready = precompute_indicators(instrument_data)
+    if not USE_TICK_CANDLES:
+        # Cached bars are stale until the first poll lands
+        ready = set()
+    time_to_ready = time.monotonic() - STARTED_AT
+    print(f"⏱️ Ready in {time_to_ready:.1f}s: {len(ready)}/{len(instrument_data)} instruments warm")
+    if time_to_ready > READY_TARGET:
+        logging.warning(f"Time to ready {time_to_ready:.1f}s exceeded the {READY_TARGET}s target")
+    
+    scheduler = None
+    if EVENT_DRIVEN_DECISIONS:
+        scheduler = DecisionScheduler(instrument_data)
+        indicator_listeners.append(scheduler.on_indicators)
+        quotes.listeners.append(scheduler.on_quote)
+        scheduler.prime(ready)
+    
+    # Start tick data
+    tick_task = asyncio.create_task(start_tick_data(kws, instrument_data, price_cache, sink, scheduler))
+    
     for token in instrument_data:
-        intraday_tasks.append(asyncio.create_task(update_intraday_data(kite, token, instrument_data)))
-        daily_tasks.append(asyncio.create_task(fetch_daily_data(kite, token, instrument_data)))
-        monitoring_tasks.append(asyncio.create_task(monitor_instrument_signals(kite, instrument_data, token)))
+        if not USE_TICK_CANDLES:
+            intraday_tasks.append(asyncio.create_task(update_intraday_data(broker, token, instrument_data)))
+        daily_tasks.append(asyncio.create_task(fetch_daily_data(broker, token, instrument_data)))
+        if scheduler is not None:
+            monitoring_tasks.append(asyncio.create_task(scheduler.run(broker, token, quotes, price_cache)))
+        else:
+            monitoring_tasks.append(asyncio.create_task(monitor_instrument_signals(
+                broker, instrument_data, token, quotes, price_cache,
+                initial_delay=0 if token in ready else INITIAL_DELAY)))
     
     # Add global indicator tasks
     indicator_tasks = [
@@ -142,20 +235,42 @@ async def main(kite, kws):
     
     # === ADDED DATA SAVING TASKS ===
     data_saving_tasks = [
-        save_position_snapshot(),
-        export_signals()
+        save_position_snapshot(snapshots),
+        publish_state(state_segment, instrument_data, overview),
+        export_signals(journal.path)
     ]
     # ==============================
     
     # Run all tasks concurrently
-    await asyncio.gather(
-        # tick_task, 
-        *intraday_tasks, 
-        *daily_tasks, 
-        *monitoring_tasks,
-        *indicator_tasks,
-        *data_saving_tasks  # Added data saving tasks
-    )
+    try:
+        await asyncio.gather(
+            lag_task,
+            tick_task,
+            quote_task,
+            cache_task,
+            *sink_tasks,
+            *feed_tasks,
+            *intraday_tasks, 
+            *daily_tasks, 
+            *monitoring_tasks,
+            *indicator_tasks,
+            *data_saving_tasks  # Added data saving tasks
+        )
+    finally:
+        save_candle_cache(candle_cache, instrument_data)
+        if sink is not None:
+            # Stop the writer first so close() alone flushes its in-flight batch
+            for task in sink_tasks:
+                task.cancel()
+            await asyncio.gather(*sink_tasks, return_exceptions=True)
+            await sink.close()
+        snapshots.save(instrument_data)
+        snapshots.close()
+        overview.refresh()
+        state_segment.publish(instrument_data, overview)
+        state_segment.close()
+        journal.close()
+        broker.close()
 
 # ================================
 # Task Control Functions
@@ -0,0 +1,110 @@
+import pandas as pd
+import streamlit as st
+import plotly.graph_objects as go
+import clock
+from data_utils import load_overview
+from config import exchange_symbol_token_map
+
+# === Page Config ===
+st.set_page_config(page_title="Portfolio Overview", layout="wide")
+st.title("🗂️ Portfolio Overview")
+
+# === Settings ===
+OVERVIEW_REFRESH = 2  # seconds
+STALE_AFTER = 60  # seconds without a tick (or bar) before an instrument is flagged stale
+EXCHANGE_TZ = 'Asia/Kolkata'
+
+OVERVIEW_COLUMNS = ['token', 'symbol', 'position', 'entry_price', 'ltp', 'unrealized_pnl', 'last_signal',
+                    'last_signal_time', 'close', 'supertrend', 'direction', 'trend', 'last_tick', 'last_bar', 'sparkline']
+
+# Every configured instrument gets a row, even before the engine reports it
+configured = {
+    str(token): f"{symbol} ({exchange})"
+    for exchange, symbol_dict in exchange_symbol_token_map.items()
+    for symbol, token in symbol_dict.items()
+}
+
+def _naive_ist(values):
+    """ISO strings (naive IST or offset-aware) as naive IST timestamps"""
+    parsed = pd.to_datetime(values, errors='coerce', format='ISO8601')
+    if getattr(parsed.dt, 'tz', None) is not None:
+        parsed = parsed.dt.tz_convert(EXCHANGE_TZ).dt.tz_localize(None)
+    return parsed
+
+# === Cached aggregates (keyed on the engine run and its overview version; rows are not hashed) ===
+@st.cache_data(max_entries=8)
+def overview_frame(source, started_at, version, _rows):
+    frame = pd.DataFrame(_rows, columns=OVERVIEW_COLUMNS)
+    frame['token'] = frame['token'].astype(str)
+    frame = pd.DataFrame({'token': list(configured)}).merge(frame, on='token', how='outer')
+    frame['instrument'] = frame['token'].map(configured).fillna(frame['symbol'])
+    frame['last_tick'] = _naive_ist(frame['last_tick'])
+    frame['last_bar'] = _naive_ist(frame['last_bar'])
+    frame['last_signal_time'] = _naive_ist(frame['last_signal_time'])
+    return frame
+
+@st.cache_data(max_entries=8)
+def pnl_figure(source, started_at, version, _frame):
+    open_positions = _frame[_frame['position'].notna()].sort_values('unrealized_pnl')
+    fig = go.Figure(go.Bar(
+        x=open_positions['unrealized_pnl'],
+        y=open_positions['instrument'],
+        orientation='h',
+        marker_color=['#2ca02c' if pnl >= 0 else '#d62728' for pnl in open_positions['unrealized_pnl'].fillna(0)]
+    ))
+    fig.update_layout(
+        title="Unrealized PnL by open position",
+        height=max(250, 24 * len(open_positions) + 80),
+        margin=dict(l=20, r=20, t=40, b=20),
+        showlegend=False
+    )
+    return fig
+
+# === Overview ===
+@st.fragment(run_every=OVERVIEW_REFRESH)
+def render_overview():
+    source, started_at, version, rows = load_overview()
+    if version is None:
+        st.warning("⏳ Waiting for the engine's overview...")
+        return
+
+    frame = overview_frame(source, started_at, version, rows).copy()
+    # Staleness moves with the clock, not the state version, so it is the only per-render column
+    now = pd.Timestamp(clock.ist_now())
+    frame['stale_s'] = (now - frame['last_tick'].fillna(frame['last_bar'])).dt.total_seconds()
+
+    open_positions = frame['position'].notna()
+    stale = frame['stale_s'].isna() | (frame['stale_s'] > STALE_AFTER)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Instruments", len(frame))
+    col2.metric("Open Positions", int(open_positions.sum()))
+    col3.metric("Unrealized PnL", f"₹{frame.loc[open_positions, 'unrealized_pnl'].sum():,.2f}")
+    col4.metric("Stale Feeds", int(stale.sum()))
+
+    st.dataframe(
+        frame[['instrument', 'position', 'entry_price', 'ltp', 'unrealized_pnl', 'last_signal', 'last_signal_time',
+               'trend', 'supertrend', 'stale_s', 'sparkline']],
+        column_config={
+            'instrument': "Instrument",
+            'position': "Position",
+            'entry_price': st.column_config.NumberColumn("Entry", format="%.2f"),
+            'ltp': st.column_config.NumberColumn("LTP", format="%.2f"),
+            'unrealized_pnl': st.column_config.NumberColumn("Unrealized PnL", format="%.2f"),
+            'last_signal': "Last Signal",
+            'last_signal_time': st.column_config.DatetimeColumn("Signal Time", format="HH:mm:ss"),
+            'trend': "Supertrend",
+            'supertrend': st.column_config.NumberColumn("Supertrend Level", format="%.2f"),
+            'stale_s': st.column_config.NumberColumn("Data Age (s)", format="%.0f"),
+            'sparkline': st.column_config.LineChartColumn("Session"),
+        },
+        hide_index=True,
+        use_container_width=True,
+        height=min(38 + 35 * len(frame), 1800)
+    )
+
+    if open_positions.any():
+        st.plotly_chart(pnl_figure(source, started_at, version, frame), use_container_width=True)
+
+    st.caption(f"Source: {'live feed' if source == 'feed' else 'state segment'} | overview version {version}")
+
+render_overview()
@@ -0,0 +1,59 @@
+import pandas as pd
+
+SIGNAL_COLUMNS = ['timestamp', 'action', 'position', 'price', 'price_source', 'exit_reason']
+
+
+class SignalRecord:
+    """One logged signal"""
+    __slots__ = SIGNAL_COLUMNS
+
+    def __init__(self, timestamp, action, position, price, price_source, exit_reason):
+        self.timestamp = timestamp
+        self.action = action
+        self.position = position
+        self.price = price
+        self.price_source = price_source
+        self.exit_reason = exit_reason
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in SIGNAL_COLUMNS}
+
+
+class SignalLog:
+    """Append-only signal history for one instrument.
+
+    Appends are O(1) list appends, the newest record per action is kept
+    in an index for the decision logic, and a DataFrame is only built
+    (and cached until the next append) when an export asks for one.
+    """
+
+    def __init__(self):
+        self.records = []
+        self.last_by_action = {}
+        self._frame = None
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def empty(self):
+        return not self.records
+
+    def append(self, timestamp, action, position, price, price_source, exit_reason):
+        record = SignalRecord(timestamp, action, position, price, price_source, exit_reason)
+        self.records.append(record)
+        self.last_by_action[action] = record
+        self._frame = None
+        return record
+
+    def last(self, action=None):
+        """Newest record (of one action when given), or None"""
+        if action is not None:
+            return self.last_by_action.get(action)
+        return self.records[-1] if self.records else None
+
+    def frame(self):
+        """All records as a DataFrame with SIGNAL_COLUMNS"""
+        if self._frame is None:
+            self._frame = pd.DataFrame([record.as_dict() for record in self.records], columns=SIGNAL_COLUMNS)
+        return self._frame
@@ -0,0 +1,271 @@
+"""On-disk candle cache so restarts only gap-fill the missing tail from Kite.
+
+Layout: <root>/<interval>/<token>/<partition>.npy, one structured NumPy
+array (CACHE_DTYPE) per instrument and trading day ('5minute') or month
+('day'). Partitions are written atomically (temp file + rename) and read
+memory-mapped.
+
+Maintenance, from the live_trader directory:
+    python -m storage.candle_cache stats
+    python -m storage.candle_cache validate
+    python -m storage.candle_cache compact --keep-days 60
+"""
+import os
+import glob
+import asyncio
+import logging
+import argparse
+import datetime
+import numpy as np
+import pandas as pd
+import clock
+from candle_store import EXCHANGE_TZ
+from instrument_manager import mark_updated
+
+CACHE_DIR = "./data/candle_cache"
+CACHE_DTYPE = np.dtype([('date', 'i8'), ('open', 'f8'), ('high', 'f8'), ('low', 'f8'),
+                        ('close', 'f8'), ('volume', 'i8')])
+# Store name -> Kite interval it holds
+CACHED_STORES = {'intraday': '5minute', 'daily': 'day'}
+# Partition key per interval (strftime of the bar's IST date)
+PARTITION_FORMAT = {'5minute': '%Y-%m-%d', 'day': '%Y-%m'}
+# History kept in the stores at startup, matching the Kite backfill windows
+LOAD_DAYS = {'5minute': 30, 'day': 50}
+
+
+def partition_keys(dates_ns, interval):
+    """Partition key of every bar (int64 UTC ns dates)"""
+    dates = pd.DatetimeIndex(dates_ns.view('M8[ns]')).tz_localize('UTC').tz_convert(EXCHANGE_TZ)
+    return dates.strftime(PARTITION_FORMAT[interval])
+
+
+def to_records(dates_ns, columns):
+    records = np.empty(len(dates_ns), dtype=CACHE_DTYPE)
+    records['date'] = dates_ns
+    for name in CACHE_DTYPE.names[1:]:
+        records[name] = columns[name]
+    return records
+
+
+class CandleCache:
+    """Per-token, per-partition .npy candle files under `root`"""
+
+    def __init__(self, root=CACHE_DIR):
+        self.root = root
+        self.saved = {}  # (interval, token) -> (store end, store revision) at the last save
+
+    # === Paths ===
+    def token_dir(self, interval, token):
+        return os.path.join(self.root, interval, str(token))
+
+    def path(self, interval, token, key):
+        return os.path.join(self.token_dir(interval, token), f"{key}.npy")
+
+    def partitions(self, interval, token):
+        """Sorted partition keys on disk for one instrument"""
+        files = glob.glob(os.path.join(self.token_dir(interval, token), "*.npy"))
+        return sorted(os.path.basename(f)[:-4] for f in files)
+
+    def tokens(self, interval):
+        folder = os.path.join(self.root, interval)
+        if not os.path.isdir(folder):
+            return []
+        return sorted(int(name) for name in os.listdir(folder) if name.isdigit())
+
+    # === Read/write ===
+    def read(self, interval, token, key):
+        return np.load(self.path(interval, token, key), mmap_mode='r')
+
+    def write(self, interval, token, key, records):
+        path = self.path(interval, token, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = path + ".tmp"
+        with open(temp, "wb") as f:
+            np.save(f, records)
+        os.replace(temp, path)
+
+    def load(self, interval, token, store, days=None):
+        """Fill a CandleStore from the cached partitions of the last `days` days; returns rows loaded"""
+        keys = self.partitions(interval, token)
+        if days is not None:
+            cutoff = (clock.ist_now() - datetime.timedelta(days=days)).strftime(PARTITION_FORMAT[interval])
+            keys = [key for key in keys if key >= cutoff]
+        if not keys:
+            return 0
+        records = np.concatenate([self.read(interval, token, key) for key in keys])
+        loaded = store.extend(records['date'], {name: records[name] for name in CACHE_DTYPE.names[1:]})
+        self.saved[(interval, token)] = (store.end, store.revision)
+        return loaded
+
+    def save(self, interval, token, store):
+        """Rewrite the partitions holding bars added or changed since the last save/load"""
+        if not len(store):
+            return 0
+        end, revision = self.saved.get((interval, token), (None, None))
+        if end is None or revision != store.revision or end <= store.offset:
+            first = 0
+        else:
+            first = max(0, end - 1 - store.offset)  # the last saved bar may have been provisional
+
+        dates = store.dates_ns()
+        keys = partition_keys(dates, interval)
+        dirty = list(dict.fromkeys(keys[first:]))
+        columns = {name: store[name] for name in CACHE_DTYPE.names[1:]}
+        for key in dirty:
+            rows = np.flatnonzero(keys == key)
+            begin, stop = rows[0], rows[-1] + 1
+            records = to_records(dates[begin:stop], {name: values[begin:stop] for name, values in columns.items()})
+            if begin == 0 and key in self.partitions(interval, token):
+                # The store only holds the tail of this partition; keep older cached bars
+                cached = np.asarray(self.read(interval, token, key))
+                records = np.concatenate([cached[cached['date'] < records['date'][0]], records])
+            self.write(interval, token, key, records)
+        self.saved[(interval, token)] = (store.end, store.revision)
+        return len(dirty)
+
+    # === Maintenance ===
+    def validate(self, interval):
+        """List (path, problem) for every partition that fails a consistency check"""
+        problems = []
+        minutes = 5 if interval == '5minute' else None
+        for token in self.tokens(interval):
+            for key in self.partitions(interval, token):
+                path = self.path(interval, token, key)
+                try:
+                    records = self.read(interval, token, key)
+                except Exception as e:
+                    problems.append((path, f"unreadable: {e}"))
+                    continue
+                if records.dtype != CACHE_DTYPE:
+                    problems.append((path, f"unexpected dtype {records.dtype}"))
+                    continue
+                if not len(records):
+                    problems.append((path, "empty partition"))
+                    continue
+                dates = np.asarray(records['date'])
+                if np.any(np.diff(dates) <= 0):
+                    problems.append((path, "dates not strictly increasing"))
+                if np.any(partition_keys(dates, interval) != key):
+                    problems.append((path, "bars outside the partition"))
+                if minutes and np.any(dates % (minutes * 60 * 10**9)):
+                    problems.append((path, f"bars not aligned to {minutes} minutes"))
+                prices = np.column_stack([records[name] for name in ('open', 'high', 'low', 'close')])
+                if not np.all(np.isfinite(prices)):
+                    problems.append((path, "non-finite prices"))
+                elif np.any(records['high'] < records['low']):
+                    problems.append((path, "high below low"))
+                if np.any(records['volume'] < 0):
+                    problems.append((path, "negative volume"))
+        return problems
+
+    def compact(self, interval, keep_days=None):
+        """Sort and de-duplicate partitions, move stray bars to their partition, drop
+        unreadable/empty files and those older than `keep_days`; returns counts"""
+        summary = {'rewritten': 0, 'removed': 0, 'temp_files': 0}
+        for temp in glob.glob(os.path.join(self.root, interval, "*", "*.tmp")):
+            os.remove(temp)
+            summary['temp_files'] += 1
+        cutoff = None
+        if keep_days is not None:
+            cutoff = (clock.ist_now() - datetime.timedelta(days=keep_days)).strftime(PARTITION_FORMAT[interval])
+
+        for token in self.tokens(interval):
+            merged = {}
+            for key in self.partitions(interval, token):
+                try:
+                    records = np.asarray(self.read(interval, token, key)).astype(CACHE_DTYPE)
+                except Exception as e:
+                    logging.warning(f"Dropping unreadable cache partition {self.path(interval, token, key)}: {e}")
+                    records = np.empty(0, dtype=CACHE_DTYPE)
+                merged[key] = records
+
+            everything = np.concatenate(list(merged.values())) if merged else np.empty(0, dtype=CACHE_DTYPE)
+            # Stable sort on date, then keep the last copy of each timestamp (newest write wins)
+            everything = everything[np.argsort(everything['date'], kind='stable')]
+            if len(everything):
+                last_copy = np.append(everything['date'][1:] != everything['date'][:-1], True)
+                everything = everything[last_copy]
+            keys = partition_keys(everything['date'], interval) if len(everything) else np.array([])
+
+            for key in set(merged) | set(keys):
+                records = everything[keys == key] if len(everything) else everything
+                if not len(records) or (cutoff is not None and key < cutoff):
+                    if key in merged:
+                        os.remove(self.path(interval, token, key))
+                        summary['removed'] += 1
+                    continue
+                if key not in merged or not np.array_equal(merged[key], records):
+                    self.write(interval, token, key, records)
+                    summary['rewritten'] += 1
+
+            folder = self.token_dir(interval, token)
+            if os.path.isdir(folder) and not os.listdir(folder):
+                os.rmdir(folder)
+        return summary
+
+
+# === Live integration ===
+def load_cached_candles(cache, instrument_data):
+    """Warm every instrument's candle stores from the cache; returns rows loaded"""
+    total = 0
+    for token, data in instrument_data.items():
+        for name, interval in CACHED_STORES.items():
+            try:
+                loaded = cache.load(interval, token, data['candles'][name], LOAD_DAYS[interval])
+            except Exception as e:
+                logging.error(f"Candle cache load error for {data['symbol']} ({interval}): {e}")
+                continue
+            if loaded:
+                mark_updated(instrument_data, token, name)
+                total += loaded
+    print(f"💾 Loaded {total} cached candles for {len(instrument_data)} instruments")
+    return total
+
+
+def save_candle_cache(cache, instrument_data):
+    """Persist new and revised bars of every instrument"""
+    for token, data in instrument_data.items():
+        for name, interval in CACHED_STORES.items():
+            try:
+                cache.save(interval, token, data['candles'][name])
+            except Exception as e:
+                logging.error(f"Candle cache save error for {data['symbol']} ({interval}): {e}")
+
+
+async def persist_candle_cache(cache, instrument_data, interval=60):
+    """Periodically write new bars to the cache"""
+    while True:
+        await asyncio.sleep(interval)
+        save_candle_cache(cache, instrument_data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and maintain the on-disk candle cache")
+    parser.add_argument("command", choices=["stats", "validate", "compact"])
+    parser.add_argument("--root", default=CACHE_DIR)
+    parser.add_argument("--interval", choices=list(PARTITION_FORMAT), help="default: all")
+    parser.add_argument("--keep-days", type=int, help="compact: drop partitions older than this")
+    args = parser.parse_args()
+
+    cache = CandleCache(args.root)
+    intervals = [args.interval] if args.interval else list(PARTITION_FORMAT)
+    for interval in intervals:
+        if args.command == "stats":
+            for token in cache.tokens(interval):
+                keys = cache.partitions(interval, token)
+                if not keys:
+                    continue
+                rows = sum(len(cache.read(interval, token, key)) for key in keys)
+                print(f"{interval} {token}: {len(keys)} partitions, {rows} bars, {keys[0]} .. {keys[-1]}")
+        elif args.command == "validate":
+            problems = cache.validate(interval)
+            for path, problem in problems:
+                print(f"❌ {path}: {problem}")
+            print(f"{'✅' if not problems else '⚠️'} {interval}: {len(problems)} problems")
+        else:
+            summary = cache.compact(interval, args.keep_days)
+            print(f"🧹 {interval}: {summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Delta-encoded position snapshots.
+
+Each save appends one JSON line per instrument whose position state
+changed since the previous save:
+
+    {"token": ..., "op": "set", "at": ..., "state": {...}}         full state (new position)
+    {"token": ..., "op": "update", "at": ..., "state": {...changed scalars},
+     "append": {"atr_history": [...new points], ...}}               delta
+    {"token": ..., "op": "clear", "at": ...}                        position closed
+
+so history points are written once instead of in full every minute
+(a HistoryBuffer that downsampled its older points since the last save
+is resent whole in "state"). load_positions() replays the lines into the latest state.
+orjson is used for encoding when installed.
+"""
+import os
+import json
+import math
+import logging
+import datetime
+import numpy as np
+import clock
+from history_buffer import HistoryBuffer
+
+# === Optional fast encoder ===
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+SNAPSHOT_DIR = "./data/position_snapshots"
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, (np.ndarray, HistoryBuffer)):
+        return value.tolist()
+    return str(value)
+
+
+def encode_line(entry):
+    """One JSON line as bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(entry, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) + b"\n"
+    return (json.dumps(entry, default=_json_default) + "\n").encode()
+
+
+def decode_line(line):
+    return orjson.loads(line) if ORJSON_AVAILABLE else json.loads(line)
+
+
+def _series_mark(series):
+    """(points, rewrites) of a history list or HistoryBuffer"""
+    return len(series), getattr(series, 'compactions', 0)
+
+
+def _tail(series, start):
+    return series.tolist(start) if isinstance(series, HistoryBuffer) else series[start:]
+
+
+def _same(a, b):
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    try:
+        return bool(a == b)
+    except (TypeError, ValueError):
+        return False
+
+
+class PositionDeltas:
+    """Tracks what was last emitted per instrument and produces set/update/clear entries"""
+
+    def __init__(self):
+        self.written = {}  # token -> (position_data id, {scalar: value}, {series: (points, rewrites) written})
+        self.flat = set()  # tokens last emitted as having no position
+
+    def _delta(self, token, position_data):
+        """The entry to write for one instrument, or None when nothing changed"""
+        previous = self.written.get(token)
+        if not position_data:
+            if token in self.flat:
+                return None
+            self.written.pop(token, None)
+            self.flat.add(token)
+            return {'token': token, 'op': 'clear'}
+        self.flat.discard(token)
+
+        series = {k: v for k, v in position_data.items() if isinstance(v, (list, HistoryBuffer))}
+        scalars = {k: v for k, v in position_data.items() if k not in series}
+        marks = {k: _series_mark(v) for k, v in series.items()}
+        new_position = (
+            previous is None or previous[0] != id(position_data)
+            or previous[1].get('entry_time') != scalars.get('entry_time')
+        )
+        self.written[token] = (id(position_data), dict(scalars), marks)
+        if new_position:
+            return {'token': token, 'op': 'set', 'state': dict(position_data)}
+
+        changed = {k: v for k, v in scalars.items() if k not in previous[1] or not _same(previous[1][k], v)}
+        appended = {}
+        for k, (points, rewrites) in marks.items():
+            written_points, written_rewrites = previous[2].get(k, (0, 0))
+            if rewrites != written_rewrites or points < written_points:
+                # Older points were downsampled (or the series replaced): resend it whole
+                changed[k] = series[k]
+            elif points > written_points:
+                appended[k] = _tail(series[k], written_points)
+        if not changed and not appended:
+            return None
+        entry = {'token': token, 'op': 'update'}
+        if changed:
+            entry['state'] = changed
+        if appended:
+            entry['append'] = appended
+        return entry
+
+    def changes(self, instrument_data, at=None):
+        """Entries for every instrument whose position changed since the last call"""
+        at = clock.now() if at is None else at
+        entries = []
+        for token, data in instrument_data.items():
+            entry = self._delta(token, data.get('position_data') or {})
+            if entry is not None:
+                entry['at'] = at
+                entries.append(entry)
+        return entries
+
+
+class PositionSnapshotWriter:
+    """Appends position-state deltas to a JSON-lines file"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.file = open(path, "ab")
+        self.deltas = PositionDeltas()
+        self.lines = 0
+
+    def save(self, instrument_data):
+        """Write one line per instrument whose position changed; returns how many were written"""
+        lines = [encode_line(entry) for entry in self.deltas.changes(instrument_data)]
+        if lines:
+            self.file.write(b"".join(lines))
+            self.file.flush()
+            self.lines += len(lines)
+        return len(lines)
+
+    def close(self):
+        self.file.close()
+
+
+def apply_delta(positions, entry):
+    """Apply one set/update/clear entry to {token (str): position_data}"""
+    token = str(entry['token'])
+    if entry['op'] == 'set':
+        positions[token] = entry['state']
+    elif entry['op'] == 'clear':
+        positions[token] = {}
+    elif entry['op'] == 'update' and token in positions:
+        state = positions[token]
+        state.update(entry.get('state', {}))
+        for name, points in entry.get('append', {}).items():
+            state.setdefault(name, []).extend(points)
+
+
+def load_positions(path):
+    """Latest position_data per token (string keys, JSON values) by replaying a delta file"""
+    positions = {}
+    with open(path, "rb") as f:
+        data = f.read()
+    # A trailing line without a newline is still being written
+    for line in data[:data.rfind(b"\n") + 1].splitlines():
+        if not line.strip():
+            continue
+        try:
+            entry = decode_line(line)
+        except ValueError as e:
+            logging.warning(f"Skipping corrupt snapshot line in {path}: {e}")
+            continue
+        apply_delta(positions, entry)
+    return positions
@@ -0,0 +1,116 @@
+"""Warm start after a mid-session restart.
+
+A restarted bot resumes today's newest run instead of starting a fresh
+one: its signal journal is replayed into each instrument's SignalLog and
+position/exit state (open trades, last_exit_time, was_premature_exit),
+and open positions pick up their tracked state (highest/lowest price,
+histories) from the run's position snapshot deltas when the snapshot
+belongs to the same trade.
+"""
+import os
+import logging
+import datetime
+import clock
+from storage.signal_journal import read_journal, latest_journal, JOURNAL_DIR
+from storage.position_snapshots import load_positions, SNAPSHOT_DIR
+from history_buffer import HistoryBuffer, POSITION_HISTORIES, position_histories
+
+
+def resumable_run(directory=JOURNAL_DIR):
+    """RUN_ID of the newest journal when that run started today, else None"""
+    path = latest_journal(directory)
+    if path is None:
+        return None
+    run_id = os.path.basename(path)[len("signals_"):-len(".jsonl")]
+    return run_id if run_id.startswith(clock.now().strftime("%Y%m%d")) else None
+
+
+def _parse_time(value):
+    if isinstance(value, str):
+        try:
+            return datetime.datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value
+
+
+def new_position_data(position, price, entry_time, price_source):
+    """Position tracking state as monitoring creates it on entry"""
+    position_data = {
+        'entry_price': price,
+        'entry_time': entry_time,
+        **position_histories(),
+        'price_source': price_source
+    }
+    position_data['highest_price' if position == 'LONG' else 'lowest_price'] = price
+    return position_data
+
+
+def restore_signals(instrument_data, entries):
+    """Replay journal entries into signal logs and position/exit state; returns how many applied"""
+    restored = 0
+    for entry in entries:
+        data = instrument_data.get(entry['token'])
+        if data is None:
+            continue
+        action = entry['action']
+        timestamp = _parse_time(entry['timestamp'])
+        data['signals'].append(timestamp, action, entry['position'], entry['price'],
+                               entry['price_source'], entry['exit_reason'])
+        if action in ('ENTRY', 'REENTRY'):
+            data['position'] = entry['position']
+            data['position_data'] = new_position_data(entry['position'], entry['price'], timestamp, entry['price_source'])
+            if action == 'REENTRY':
+                data['was_premature_exit'] = False
+        elif action == 'EXIT':
+            data['position'] = None
+            data['position_data'] = {}
+            data['last_exit_time'] = timestamp
+            data['last_exit_position'] = entry['position']
+            data['was_premature_exit'] = (entry['exit_reason'] == 'STOPLOSS')
+        data['current_position'] = data['position']
+        restored += 1
+    return restored
+
+
+def restore_position_state(instrument_data, snapshot):
+    """Overlay snapshot state on open positions whose entry matches; returns how many matched"""
+    matched = 0
+    for token, data in instrument_data.items():
+        position_data = data['position_data']
+        state = snapshot.get(str(token))
+        if not position_data or not state:
+            continue
+        entry_time = _parse_time(state.get('entry_time'))
+        if entry_time != position_data['entry_time']:
+            # The snapshot predates this trade (it is at most a minute old)
+            continue
+        position_data.update(state)
+        position_data['entry_time'] = entry_time
+        for name in POSITION_HISTORIES:
+            if name in state:
+                position_data[name] = HistoryBuffer.from_values(state[name])
+        matched += 1
+    return matched
+
+
+def recover_session(instrument_data, run_id, journal_dir=JOURNAL_DIR, snapshot_dir=SNAPSHOT_DIR):
+    """Rebuild signal and position state for `run_id`; returns the number of open positions"""
+    journal_path = os.path.join(journal_dir, f"signals_{run_id}.jsonl")
+    entries = []
+    if os.path.exists(journal_path):
+        entries, _ = read_journal(journal_path)
+    restored = restore_signals(instrument_data, entries)
+
+    matched = 0
+    snapshot_path = os.path.join(snapshot_dir, f"positions_{run_id}.jsonl")
+    if os.path.exists(snapshot_path):
+        try:
+            matched = restore_position_state(instrument_data, load_positions(snapshot_path))
+        except Exception as e:
+            logging.error(f"Position snapshot {snapshot_path} not restored: {e}")
+
+    open_positions = sum(1 for data in instrument_data.values() if data['position'])
+    print(f"♻️ Resumed run {run_id}: {restored} signals replayed, "
+          f"{open_positions} open positions ({matched} with snapshot state)")
+    return open_positions
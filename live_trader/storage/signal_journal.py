@@ -0,0 +1,111 @@
+"""Append-only JSON-lines journal of trading signals.
+
+Every log_signal() call appends one line with a sequence number that
+increases by one per event. Readers keep a byte offset and only parse
+lines written since their last read, so exporting and alerting cost
+O(new signals) instead of re-reading the whole history.
+"""
+import os
+import glob
+import json
+import time
+import logging
+import datetime
+import numpy as np
+from signal_log import SIGNAL_COLUMNS as SIGNAL_FIELDS
+
+JOURNAL_DIR = "./data/signal_journal"
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    return str(value)
+
+
+def latest_journal(directory=JOURNAL_DIR):
+    """Newest journal file, or None"""
+    files = glob.glob(os.path.join(directory, "*.jsonl"))
+    return max(files, key=os.path.getmtime) if files else None
+
+
+class SignalJournal:
+    """Writer side: one JSON object per line, flushed as soon as it is appended"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.seq = self._last_seq()
+        self.file = open(path, "a", encoding="utf-8")
+
+    def _last_seq(self):
+        """Sequence number of the last complete entry already in the file (0 when new)"""
+        if not os.path.exists(self.path):
+            return 0
+        entries, _ = read_journal(self.path)
+        return entries[-1]['seq'] if entries else 0
+
+    def append(self, token, symbol, signal):
+        """Journal one signal; usable directly as a decision.signals listener. Returns its seq"""
+        self.seq += 1
+        entry = {'seq': self.seq, 'token': token, 'symbol': symbol}
+        entry.update((field, signal.get(field)) for field in SIGNAL_FIELDS)
+        entry['written_at'] = time.time()  # wall clock, for signal-to-alert latency
+        self.file.write(json.dumps(entry, default=_json_default) + "\n")
+        self.file.flush()
+        return self.seq
+
+    def close(self):
+        self.file.close()
+
+
+def read_journal(path, offset=0):
+    """Entries after byte `offset`, and the offset to resume from.
+
+    A trailing line without a newline is still being written; it is left
+    for the next read.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        chunk = f.read()
+    end = chunk.rfind(b"\n") + 1
+    entries = []
+    for line in chunk[:end].splitlines():
+        if not line.strip():
+            continue
+        try:
+            entries.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            logging.warning(f"Skipping corrupt journal line in {path}: {e}")
+    return entries, offset + end
+
+
+class JournalReader:
+    """Incremental reader that remembers its offset (and can start from a saved one)"""
+
+    def __init__(self, path, offset=0):
+        self.path = path
+        self.offset = offset
+        self.last_seq = 0
+
+    def poll(self):
+        """Entries appended since the previous poll"""
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return []
+        if size == self.offset:
+            return []
+        if size < self.offset:
+            # Journal was replaced; start over
+            self.offset = 0
+        entries, self.offset = read_journal(self.path, self.offset)
+        if entries:
+            self.last_seq = entries[-1]['seq']
+        return entries
@@ -0,0 +1,211 @@
+"""Memory-mapped engine state for the dashboard.
+
+The engine publishes every instrument's position and history buffers (and
+the portfolio overview rows, when given) into
+a fixed-size file-backed mmap; the dashboard maps the same file read-only.
+A sequence lock in the header keeps readers from seeing a half-written
+state: the writer makes the sequence odd, writes the payload, then makes
+it even again, and a reader only accepts a payload copied while the
+sequence stayed the same even number. Everything but the sequence (payload,
+length, publish time) is written while it is odd; the even sequence is
+the last, separate 8-byte write. Readers cache the decoded state per
+sequence number, so a refresh with no new publish costs one header read.
+
+Layout: header | payload = u64 meta length | JSON meta | pad | float64 histories
+"""
+import os
+import mmap
+import time
+import asyncio
+import struct
+import logging
+import numpy as np
+from history_buffer import HistoryBuffer
+from storage.position_snapshots import encode_line, decode_line
+
+STATE_PATH = "./data/state/engine_state.bin"
+SEGMENT_SIZE = 8 * 1024 * 1024
+PUBLISH_INTERVAL = 1  # seconds
+
+MAGIC = b"LTST"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sIQQd")  # magic, format version, sequence, payload length, published_at (epoch s)
+HEADER_SIZE = 64
+SEQ_OFFSET = 8
+SEQ = struct.Struct("<Q")
+PREFIX = struct.Struct("<4sI")  # magic, format version
+TAIL_OFFSET = 16
+TAIL = struct.Struct("<Qd")  # payload length, published_at
+META_LENGTH = struct.Struct("<Q")
+
+
+def encode_state(instrument_data, overview=None):
+    """Payload bytes for every instrument's position state (plus overview rows)"""
+    positions = {}
+    arrays = []
+    offset = 0
+    for token, data in instrument_data.items():
+        position_data = data.get('position_data') or {}
+        entry = {}
+        histories = {}
+        for name, value in position_data.items():
+            if isinstance(value, (HistoryBuffer, list)):
+                points = value.array() if isinstance(value, HistoryBuffer) else np.asarray(value, dtype='f8')
+                histories[name] = [offset, len(points)]
+                arrays.append(points)
+                offset += len(points)
+            else:
+                entry[name] = value
+        if entry or histories:
+            entry['position'] = data.get('position')
+            entry['histories'] = histories
+        positions[token] = entry
+    meta = {'positions': positions}
+    if overview is not None:
+        meta['overview'] = {'started_at': overview.started_at, 'version': overview.version, 'rows': overview.table()}
+    meta_bytes = encode_line(meta)
+    pad = -(META_LENGTH.size + len(meta_bytes)) % 8
+    values = np.concatenate(arrays).astype('f8', copy=False) if arrays else np.empty(0)
+    return META_LENGTH.pack(len(meta_bytes)) + meta_bytes + b"\0" * pad + values.tobytes()
+
+
+def decode_state(payload):
+    """{'positions': {token (str): position_data}, 'overview': {...}}; histories are read-only arrays over the payload"""
+    (meta_length,) = META_LENGTH.unpack_from(payload, 0)
+    meta_end = META_LENGTH.size + meta_length
+    meta = decode_line(payload[META_LENGTH.size:meta_end])
+    arrays_start = meta_end + (-meta_end % 8)
+    positions = {}
+    for token, entry in meta['positions'].items():
+        for name, (offset, count) in entry.pop('histories', {}).items():
+            entry[name] = np.frombuffer(payload, dtype='f8', count=count, offset=arrays_start + offset * 8)
+        positions[str(token)] = entry
+    return {'positions': positions, 'overview': meta.get('overview')}
+
+
+class StateSegmentWriter:
+    """Engine side: publishes instrument state under the sequence lock"""
+
+    def __init__(self, path=STATE_PATH, size=SEGMENT_SIZE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.file = open(path, "a+b")
+        # Never shrink: a reader mapping the old size would fault past the end
+        if os.path.getsize(path) < size:
+            self.file.truncate(size)
+        self.mm = mmap.mmap(self.file.fileno(), 0)
+        magic, _, seq, _, _ = HEADER.unpack_from(self.mm, 0)
+        self.seq = seq + (seq & 1) if magic == MAGIC else 0
+        self.published = 0
+
+    def publish(self, instrument_data, overview=None):
+        """Write the current state; returns the new (even) sequence number"""
+        payload = encode_state(instrument_data, overview)
+        if HEADER_SIZE + len(payload) > len(self.mm):
+            logging.error(f"State segment too small for {len(payload)} bytes; not published")
+            return self.seq
+        self.seq += 1
+        SEQ.pack_into(self.mm, SEQ_OFFSET, self.seq)  # odd: readers back off
+        self.mm[HEADER_SIZE:HEADER_SIZE + len(payload)] = payload
+        PREFIX.pack_into(self.mm, 0, MAGIC, FORMAT_VERSION)
+        TAIL.pack_into(self.mm, TAIL_OFFSET, len(payload), time.time())
+        self.seq += 1
+        SEQ.pack_into(self.mm, SEQ_OFFSET, self.seq)  # even, last: the new state is complete
+        self.published += 1
+        return self.seq
+
+    def close(self):
+        self.mm.close()
+        self.file.close()
+
+
+class StateSegmentReader:
+    """Dashboard side: consistent snapshots of the segment, decoded once per sequence number.
+
+    The file is re-mapped whenever its inode or size changes, so a segment
+    recreated by a restarted engine is picked up.
+    """
+
+    def __init__(self, path=STATE_PATH, retries=100):
+        self.path = path
+        self.retries = retries
+        self.mm = None
+        self.identity = None  # (st_dev, st_ino, st_size) of the mapped file
+        self.seq = None
+        self.state = None
+        self.published_at = None
+
+    def _open(self):
+        """Map the segment if it changed since it was mapped; False when there is nothing to read"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self.close()
+            return False
+        identity = (stat.st_dev, stat.st_ino, stat.st_size)
+        if self.mm is not None and identity == self.identity:
+            return True
+        self.close()
+        if stat.st_size < HEADER_SIZE:
+            return False  # being created (mmap of an empty file fails)
+        with open(self.path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.identity = identity
+        self.seq = None  # sequence numbers restart with a new segment
+        return True
+
+    def read(self):
+        """Latest consistent state, or None when the engine has not published one"""
+        if not self._open():
+            return None
+        for _ in range(self.retries):
+            (seq,) = SEQ.unpack_from(self.mm, SEQ_OFFSET)
+            if seq == self.seq:
+                return self.state
+            if seq & 1:
+                time.sleep(0)  # publish in progress
+                continue
+            magic, version, _, length, published_at = HEADER.unpack_from(self.mm, 0)
+            if HEADER_SIZE + length <= len(self.mm):
+                payload = self.mm[HEADER_SIZE:HEADER_SIZE + length]
+            else:
+                payload = None
+            if SEQ.unpack_from(self.mm, SEQ_OFFSET)[0] != seq:
+                continue  # torn: the writer moved on while we read the header or copied
+            if magic != MAGIC or version != FORMAT_VERSION or payload is None:
+                return None
+            try:
+                state = decode_state(payload)
+            except (ValueError, struct.error) as e:
+                if SEQ.unpack_from(self.mm, SEQ_OFFSET)[0] != seq:
+                    continue  # overwritten while decoding
+                logging.warning(f"Undecodable state segment (seq {seq}): {e}")
+                return self.state
+            self.state = state
+            self.seq = seq
+            self.published_at = published_at
+            return self.state
+        # Writer kept the lock the whole time; serve the last consistent state
+        return self.state
+
+    def age(self):
+        """Seconds since the state being served was published"""
+        return None if self.published_at is None else time.time() - self.published_at
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+            self.identity = None
+
+
+async def publish_state(writer, instrument_data, overview=None, interval=PUBLISH_INTERVAL):
+    """Engine task: republish the state segment every `interval` seconds"""
+    while True:
+        try:
+            if overview is not None:
+                overview.refresh()
+            writer.publish(instrument_data, overview)
+        except Exception as e:
+            logging.error(f"State segment publish failed: {e}")
+        await asyncio.sleep(interval)
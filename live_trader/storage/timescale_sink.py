@@ -0,0 +1,269 @@
+"""Batched TimescaleDB persistence for candles, ticks and signals.
+
+Producers hand rows to TimescaleSink without touching the database:
+offer()/offer_tick() never block (rows are dropped and counted when the
+queue is full), put() waits for room, and signals are never dropped. A single writer task drains the queue in
+batches and writes each table with one COPY (copy_records_to_table)
+through an asyncpg pool; failed batches are retried with backoff, so a
+database outage fills the bounded queue instead of memory. close()
+flushes the batch the writer was holding and whatever is still queued.
+
+Check a local Postgres/Timescale instance (uses TIMESCALE_DB_CONFIG):
+    python -m storage.timescale_sink check
+"""
+import time
+import asyncio
+import logging
+import argparse
+import datetime
+import numpy as np
+import pandas as pd
+import clock
+from config import TIMESCALE_DB_CONFIG
+from storage.candle_cache import CACHED_STORES
+
+# === Optional asyncpg ===
+try:
+    import asyncpg
+    ASYNCPG_AVAILABLE = True
+except ImportError:
+    asyncpg = None
+    ASYNCPG_AVAILABLE = False
+
+IST = datetime.timezone(clock.IST_OFFSET)
+
+TABLE_COLUMNS = {
+    'candles': ['time', 'token', 'interval', 'open', 'high', 'low', 'close', 'volume'],
+    'ticks': ['time', 'token', 'last_price', 'volume_traded', 'last_traded_quantity',
+              'total_buy_quantity', 'total_sell_quantity', 'oi', 'best_bid', 'best_ask'],
+    'signals': ['time', 'token', 'symbol', 'action', 'position', 'price', 'price_source', 'exit_reason'],
+}
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS candles (
+        time TIMESTAMPTZ NOT NULL, token BIGINT NOT NULL, interval TEXT NOT NULL,
+        open DOUBLE PRECISION, high DOUBLE PRECISION, low DOUBLE PRECISION, close DOUBLE PRECISION,
+        volume BIGINT)""",
+    """CREATE TABLE IF NOT EXISTS ticks (
+        time TIMESTAMPTZ NOT NULL, token BIGINT NOT NULL, last_price DOUBLE PRECISION,
+        volume_traded BIGINT, last_traded_quantity BIGINT, total_buy_quantity BIGINT,
+        total_sell_quantity BIGINT, oi BIGINT, best_bid DOUBLE PRECISION, best_ask DOUBLE PRECISION)""",
+    """CREATE TABLE IF NOT EXISTS signals (
+        time TIMESTAMPTZ NOT NULL, token BIGINT NOT NULL, symbol TEXT, action TEXT, position TEXT,
+        price DOUBLE PRECISION, price_source TEXT, exit_reason TEXT)""",
+]
+
+
+def as_ist(ts):
+    """Kite's naive exchange times are IST; make them tz-aware for TIMESTAMPTZ (None: now, in IST)"""
+    if ts is None:
+        return clock.ist_now().replace(tzinfo=IST)
+    return ts.replace(tzinfo=IST) if ts.tzinfo is None else ts
+
+
+def as_local(ts):
+    """clock.now() times are naive machine-local time; make them tz-aware for TIMESTAMPTZ"""
+    return ts.astimezone() if ts.tzinfo is None else ts
+
+
+class TimescaleSink:
+    """Bounded queue of rows plus one batching COPY writer"""
+
+    def __init__(self, config=None, max_queue=100_000, batch_size=5_000, flush_interval=1.0, pool_size=4):
+        if not ASYNCPG_AVAILABLE:
+            raise RuntimeError("asyncpg is not installed")
+        self.config = config or TIMESCALE_DB_CONFIG
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pool_size = pool_size
+        self.pool = None
+        self.in_flight = None  # {table: records} the writer has taken off the queue but not written yet
+        self.waiting = set()  # signal puts parked until the queue has room
+        self.last_drop_warning = 0.0
+        self.stats = {'queued': 0, 'written': 0, 'dropped': 0, 'batches': 0, 'errors': 0}
+
+    async def start(self):
+        """Open the pool and create the tables (as hypertables when TimescaleDB is installed)"""
+        self.pool = await asyncpg.create_pool(min_size=1, max_size=self.pool_size, **self.config)
+        async with self.pool.acquire() as conn:
+            for statement in SCHEMA:
+                await conn.execute(statement)
+            for table in TABLE_COLUMNS:
+                try:
+                    await conn.execute(f"SELECT create_hypertable('{table}', 'time', if_not_exists => TRUE)")
+                except asyncpg.PostgresError as e:
+                    logging.warning(f"{table} stays a plain table (no TimescaleDB?): {e}")
+        print(f"🗄️ Timescale sink connected to {self.config.get('host')}/{self.config.get('database')}")
+
+    # === Producers ===
+    def offer(self, table, record):
+        """Queue a row without waiting; returns False (and counts a drop) when the queue is full"""
+        try:
+            self.queue.put_nowait((table, record))
+        except asyncio.QueueFull:
+            self.stats['dropped'] += 1
+            if time.monotonic() - self.last_drop_warning > 10:
+                logging.warning(f"Timescale queue full, dropping rows ({self.stats['dropped']} so far)")
+                self.last_drop_warning = time.monotonic()
+            return False
+        self.stats['queued'] += 1
+        return True
+
+    async def put(self, table, record):
+        """Queue a row, waiting for room (back-pressure for async producers)"""
+        await self.queue.put((table, record))
+        self.stats['queued'] += 1
+
+    def offer_tick(self, tick):
+        depth = tick.get('depth') or {}
+        buy = depth.get('buy') or []
+        sell = depth.get('sell') or []
+        return self.offer('ticks', (
+            as_ist(tick.get('exchange_timestamp')), tick['instrument_token'], tick.get('last_price'),
+            tick.get('volume_traded'), tick.get('last_traded_quantity'), tick.get('total_buy_quantity'),
+            tick.get('total_sell_quantity'), tick.get('oi'),
+            buy[0]['price'] if buy else None, sell[0]['price'] if sell else None,
+        ))
+
+    def offer_signal(self, token, symbol, signal):
+        """decision.signals listener; signals are rare, so a full queue makes them wait instead of dropping"""
+        record = (
+            as_local(signal['timestamp']), token, symbol, signal['action'], signal['position'],
+            signal['price'], signal['price_source'], signal['exit_reason'],
+        )
+        try:
+            self.queue.put_nowait(('signals', record))
+            self.stats['queued'] += 1
+        except asyncio.QueueFull:
+            task = asyncio.get_running_loop().create_task(self.put('signals', record))
+            self.waiting.add(task)
+            task.add_done_callback(self.waiting.discard)
+
+    async def last_candle_times(self):
+        """Newest stored bar per (token, interval), as UTC ns"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch("SELECT token, interval, max(time) AS time FROM candles GROUP BY token, interval")
+        return {(row['token'], row['interval']): pd.Timestamp(row['time']).value for row in rows}
+
+    # === Writer ===
+    def _take(self, pending, limit):
+        """Move up to `limit` queued rows into `pending` ({table: records}); returns how many moved"""
+        taken = 0
+        while taken < limit:
+            try:
+                table, record = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            pending.setdefault(table, []).append(record)
+            taken += 1
+        return taken
+
+    async def _write(self, pending, retries=None):
+        """COPY a {table: records} batch table by table; retried tables resume where the last attempt failed"""
+        attempt = 0
+        while pending:
+            table, records = next(iter(pending.items()))
+            try:
+                async with self.pool.acquire() as conn:
+                    await conn.copy_records_to_table(table, records=records, columns=TABLE_COLUMNS[table])
+            except Exception as e:
+                self.stats['errors'] += 1
+                attempt += 1
+                if retries is not None and attempt > retries:
+                    lost = sum(len(rows) for rows in pending.values())
+                    self.stats['dropped'] += lost
+                    logging.error(f"Timescale write failed, dropping {lost} rows: {e}")
+                    pending.clear()
+                    return
+                delay = min(30, 2 ** attempt)
+                logging.error(f"Timescale write to {table} failed ({e}); retrying in {delay}s")
+                await asyncio.sleep(delay)
+                continue
+            del pending[table]
+            self.stats['written'] += len(records)
+        self.stats['batches'] += 1
+
+    async def run(self):
+        """Writer loop: wait for a row, let the batch fill for flush_interval, COPY it"""
+        while True:
+            table, record = await self.queue.get()
+            # Rows live on self from the moment they leave the queue, so close() can flush
+            # them wherever this task is cancelled (flush sleep, COPY or retry backoff)
+            self.in_flight = {table: [record]}
+            size = 1 + self._take(self.in_flight, self.batch_size - 1)
+            if size < self.batch_size:
+                await asyncio.sleep(self.flush_interval)
+                self._take(self.in_flight, self.batch_size - size)
+            await self._write(self.in_flight)
+            self.in_flight = None
+
+    async def close(self):
+        """Flush the writer's in-flight batch and everything still queued, then close the pool"""
+        if self.in_flight:
+            await self._write(self.in_flight, retries=3)
+        self.in_flight = None
+        while not self.queue.empty() or self.waiting:
+            pending = {}
+            if self._take(pending, self.batch_size):
+                await self._write(pending, retries=3)
+            else:
+                await asyncio.sleep(0)
+        if self.pool is not None:
+            await self.pool.close()
+        print(f"🗄️ Timescale sink closed: {self.stats}")
+
+
+async def stream_candles(sink, instrument_data, interval=5):
+    """Queue every bar once it has closed (all rows but each store's forming last one).
+
+    Starts after the newest bar already in the database, so restarts do
+    not duplicate history loaded from the cache or backfilled from Kite.
+    """
+    exported = await sink.last_candle_times()
+    while True:
+        for token, data in instrument_data.items():
+            for name, kite_interval in CACHED_STORES.items():
+                store = data['candles'][name]
+                dates = store.dates_ns()[:-1]
+                after = exported.get((token, kite_interval))
+                first = 0 if after is None else int(np.searchsorted(dates, after, side='right'))
+                if first >= len(dates):
+                    continue
+                # Copy the rows out before awaiting: the store may be rewritten meanwhile
+                rows = [
+                    (pd.Timestamp(ts, tz='UTC').to_pydatetime(), token, kite_interval,
+                     float(o), float(h), float(l), float(c), int(v))
+                    for ts, o, h, l, c, v in zip(dates[first:], store['open'][first:], store['high'][first:],
+                                                 store['low'][first:], store['close'][first:], store['volume'][first:])
+                ]
+                exported[(token, kite_interval)] = int(dates[-1])
+                for row in rows:
+                    await sink.put('candles', row)
+        await asyncio.sleep(interval)
+
+
+async def check(config=None):
+    """Round-trip a few rows of each kind through a real database"""
+    sink = TimescaleSink(config, flush_interval=0)
+    await sink.start()
+    now = clock.ist_now()
+    sink.offer('candles', (as_ist(now), 0, '5minute', 1.0, 2.0, 0.5, 1.5, 10))
+    sink.offer_tick({'instrument_token': 0, 'exchange_timestamp': now, 'last_price': 1.5, 'volume_traded': 10,
+                     'depth': {'buy': [{'price': 1.4}], 'sell': [{'price': 1.6}]}})
+    sink.offer_signal(0, 'TEST:CHECK', {'timestamp': clock.now(), 'action': 'ENTRY', 'position': 'LONG', 'price': 1.5,
+                                       'price_source': 'ltp', 'exit_reason': None})
+    await sink.close()
+    pool = await asyncpg.create_pool(min_size=1, max_size=1, **(config or TIMESCALE_DB_CONFIG))
+    async with pool.acquire() as conn:
+        for table in TABLE_COLUMNS:
+            count = await conn.fetchval(f"SELECT count(*) FROM {table} WHERE token = 0")
+            print(f"✅ {table}: {count} check rows")
+    await pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TimescaleDB sink tools")
+    parser.add_argument("command", choices=["check"])
+    parser.parse_args()
+    asyncio.run(check())
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules import each other relative to live_trader/ (as when main.py runs from there)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
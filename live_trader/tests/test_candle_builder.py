@@ -0,0 +1,38 @@
+import datetime
+from candle_store import CandleStore
+from data_ingestion.candle_builder import CandleBuilder
+
+
+def tick(hhmm, price, volume):
+    hour, minute = divmod(hhmm, 100)
+    return {'last_price': price, 'volume_traded': volume,
+            'exchange_timestamp': datetime.datetime(2025, 6, 2, hour, minute, 5)}
+
+
+def test_reconnect_backfill_does_not_double_count_gap_volume():
+    store = CandleStore(capacity=16)
+    builder = CandleBuilder(store)
+    builder.on_tick(tick(915, 100, 1000))
+    builder.on_tick(tick(916, 101, 1100))
+    # Offline from 09:16 to 09:18; the backfill's bar already includes the gap's volume
+    store.upsert(datetime.datetime(2025, 6, 2, 9, 15), 100, 103, 99, 102, 600)
+    builder.sync_from_store()
+    builder.on_tick(tick(918, 102, 1700))
+    assert store['volume'][-1] == 600
+    builder.on_tick(tick(919, 103, 1750))
+    assert store['volume'][-1] == 650
+    builder.on_tick(tick(920, 104, 1800))
+    assert store['volume'][-1] == 50
+
+
+def test_reconnect_backfill_into_a_new_bar():
+    store = CandleStore(capacity=16)
+    builder = CandleBuilder(store)
+    builder.on_tick(tick(915, 100, 1000))
+    # Offline through the 09:20 bar; the backfill appends it with its full volume
+    store.upsert(datetime.datetime(2025, 6, 2, 9, 20), 101, 104, 100, 103, 400)
+    builder.sync_from_store()
+    builder.on_tick(tick(925, 104, 1500))
+    assert store['volume'][-1] == 0
+    builder.on_tick(tick(926, 105, 1560))
+    assert store['volume'][-1] == 60
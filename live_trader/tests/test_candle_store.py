@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+from candle_store import CandleStore
+
+
+def bars(store, first, count):
+    for i in range(first, first + count):
+        store.upsert(pd.Timestamp("2025-06-02 09:15") + pd.Timedelta(minutes=5 * i), i, i + 1, i - 1, i, 10)
+
+
+def test_frames_survive_compaction():
+    store = CandleStore(capacity=8)
+    bars(store, 0, 8)
+    before = store.frame()
+    closes = before['close'].to_numpy().copy()
+    bars(store, 8, 9)  # fills the 2x buffer and compacts
+    assert store.compactions == 1
+    np.testing.assert_array_equal(before['close'].to_numpy(), closes)
+    np.testing.assert_array_equal(store['close'], np.arange(9, 17))
+
+
+def test_views_follow_writes_until_compaction():
+    store = CandleStore(capacity=8)
+    bars(store, 0, 3)
+    view = store['close']
+    store.upsert(pd.Timestamp("2025-06-02 09:25"), 2, 5, 1, 4.5, 10)  # revise the forming bar
+    assert view[-1] == 4.5
+
+
+def test_extend_compacts_into_fresh_arrays():
+    store = CandleStore(capacity=8)
+    bars(store, 0, 12)
+    before = store.frame()
+    dates = store.dates_ns()[-1] + np.arange(1, 7) * 300_000_000_000
+    columns = {name: np.arange(100, 106) for name in ['open', 'high', 'low', 'close', 'volume']}
+    store.extend(dates, columns)
+    assert len(store) == 8 and store.compactions == 1
+    np.testing.assert_array_equal(before['close'].to_numpy(), np.arange(4, 12))
+    np.testing.assert_array_equal(store['close'], [10, 11, 100, 101, 102, 103, 104, 105])
@@ -0,0 +1,163 @@
+"""Array kernels against the original df.at-loop indicators they replaced"""
+import numpy as np
+import pandas as pd
+import pytest
+from computation.indicators import compute_supertrend, compute_fisher_transform
+
+
+# === Reference implementations (compute_supertrend / compute_fisher_transform before the kernels) ===
+def reference_supertrend(df, period=10, multiplier=3):
+    """Supertrend calculation for a given DataFrame"""
+    df = df.copy()
+    # Original supertrend logic preserved
+    df['hl2'] = (df['high'] + df['low']) / 2
+    df['tr'] = np.maximum(
+        df['high'] - df['low'],
+        np.maximum(
+            abs(df['high'] - df['close'].shift(1)),
+            abs(df['low'] - df['close'].shift(1))
+        )
+    )
+    
+    alpha = 1 / period
+    df['atr'] = np.nan
+    sma_initial = df['tr'].rolling(period, min_periods=1).mean()
+    df.loc[period-1, 'atr'] = sma_initial.iloc[period-1]
+    
+    for i in range(period, len(df)):
+        df.at[i, 'atr'] = alpha * df.at[i, 'tr'] + (1 - alpha) * df.at[i-1, 'atr']
+    
+    df['upper_band'] = df['hl2'] + multiplier * df['atr']
+    df['lower_band'] = df['hl2'] - multiplier * df['atr']
+    
+    start_idx = period - 1
+    df['final_upper_band'] = np.nan
+    df['final_lower_band'] = np.nan
+    df.loc[start_idx, ['final_upper_band', 'final_lower_band']] = df.loc[start_idx, ['upper_band', 'lower_band']].values
+    
+    for i in range(start_idx + 1, len(df)):
+        current_upper = df.at[i, 'upper_band']
+        prev_upper = df.at[i-1, 'final_upper_band']
+        prev_close = df.at[i-1, 'close']
+        df.at[i, 'final_upper_band'] = current_upper if (current_upper < prev_upper) or (prev_close > prev_upper) else prev_upper
+        
+        current_lower = df.at[i, 'lower_band']
+        prev_lower = df.at[i-1, 'final_lower_band']
+        df.at[i, 'final_lower_band'] = current_lower if (current_lower > prev_lower) or (prev_close < prev_lower) else prev_lower
+    
+    df['direction'] = 1
+    df['supertrend'] = df['final_upper_band']
+    
+    for i in range(start_idx + 1, len(df)):
+        current_close = df.at[i, 'close']
+        prev_supertrend = df.at[i-1, 'supertrend']
+        
+        if current_close > df.at[i, 'final_upper_band']:
+            df.at[i, 'direction'] = -1
+            df.at[i, 'supertrend'] = df.at[i, 'final_lower_band']
+        elif current_close < df.at[i, 'final_lower_band']:
+            df.at[i, 'direction'] = 1
+            df.at[i, 'supertrend'] = df.at[i, 'final_upper_band']
+        else:
+            df.at[i, 'direction'] = df.at[i-1, 'direction']
+            df.at[i, 'supertrend'] = df.at[i, 'final_lower_band'] if df.at[i, 'direction'] == -1 else df.at[i, 'final_upper_band']
+    
+    return df
+
+def reference_fisher_transform(df, length=10):
+    """Fisher Transform for a given DataFrame"""
+    df = df.copy()
+    df['hl2'] = (df['high'] + df['low']) / 2
+    df['high_hl2'] = df['hl2'].rolling(length, min_periods=1).max()
+    df['low_hl2'] = df['hl2'].rolling(length, min_periods=1).min()
+    df['value'] = 0.0
+    df['fisher'] = 0.0
+    df['trigger'] = np.nan
+
+    for i in range(1, len(df)):
+        denom = df.at[i, 'high_hl2'] - df.at[i, 'low_hl2'] or 1e-9
+        current_val = 0.66 * ((df.at[i, 'hl2'] - df.at[i, 'low_hl2']) / denom - 0.5) + 0.67 * df.at[i-1, 'value']
+        df.at[i, 'value'] = min(max(current_val, -0.99), 0.999)
+
+    for i in range(1, len(df)):
+        prev_fisher = df.at[i-1, 'fisher']
+        current_val = df.at[i, 'value']
+        fisher_val = 0.5 * np.log((1 + current_val) / (1 - current_val)) + 0.5 * prev_fisher
+        df.at[i, 'fisher'] = fisher_val
+
+    df['trigger'] = df['fisher'].shift(1)
+    return df
+
+# === Inputs ===
+def random_frame(rows, seed, nan_rows=0, flat=None):
+    rng = np.random.default_rng(seed)
+    close = np.round(1000 + np.cumsum(rng.normal(0, 5, rows)), 1)
+    high = close + np.round(rng.random(rows) * 8, 1)
+    low = close - np.round(rng.random(rows) * 8, 1)
+    if flat is not None:
+        # Flat high/low run: zero Fisher denominators
+        high[flat] = low[flat] = close[flat] = close[flat.start]
+    close[:nan_rows] = high[:nan_rows] = low[:nan_rows] = np.nan
+    return pd.DataFrame({
+        'date': pd.date_range("2025-06-02 09:15", periods=rows, freq="5min", tz="Asia/Kolkata"),
+        'open': close, 'high': high, 'low': low, 'close': close, 'volume': np.arange(rows),
+    })
+
+
+def assert_identical(expected, actual, last_ulp=()):
+    """Same columns, dtypes and bits (`last_ulp` columns may differ in the last ulp)"""
+    assert list(actual.columns) == list(expected.columns)
+    for column in expected.columns:
+        assert actual[column].dtype == expected[column].dtype, column
+        if column in last_ulp:
+            np.testing.assert_allclose(actual[column], expected[column], rtol=1e-12, atol=1e-12, err_msg=column)
+        elif expected[column].dtype.kind == 'f':
+            assert actual[column].to_numpy().tobytes() == expected[column].to_numpy().tobytes(), column
+        else:
+            assert actual[column].equals(expected[column]), column
+
+
+FRAMES = [
+    pytest.param(dict(rows=10, seed=1), id="exactly-one-period"),
+    pytest.param(dict(rows=11, seed=2), id="period-plus-one"),
+    pytest.param(dict(rows=300, seed=3), id="random"),
+    pytest.param(dict(rows=3000, seed=4, flat=slice(100, 120)), id="random-flat-run"),
+    pytest.param(dict(rows=60, seed=5, nan_rows=3), id="nan-leading"),
+    pytest.param(dict(rows=60, seed=6, nan_rows=12), id="nan-leading-past-period"),
+]
+
+
+# === Supertrend ===
+@pytest.mark.parametrize("frame", FRAMES)
+@pytest.mark.parametrize("period,multiplier", [(10, 3), (7, 2), (14, 4)])
+def test_supertrend_matches_reference(frame, period, multiplier):
+    df = random_frame(**frame)
+    if len(df) < period:
+        pytest.skip("shorter than the period")
+    assert_identical(reference_supertrend(df, period, multiplier), compute_supertrend(df, period, multiplier))
+
+
+@pytest.mark.parametrize("rows", [1, 5, 9])
+def test_supertrend_short_frame(rows):
+    """The reference raised IndexError below one period; the kernel leaves the bands unset instead"""
+    df = random_frame(rows, seed=rows)
+    with pytest.raises(IndexError):
+        reference_supertrend(df)
+    result = compute_supertrend(df)
+    assert len(result) == rows
+    assert result[['atr', 'final_upper_band', 'final_lower_band', 'supertrend']].isna().all().all()
+    assert (result['direction'] == 1).all()
+
+
+# === Fisher Transform ===
+@pytest.mark.parametrize("frame", FRAMES + [
+    pytest.param(dict(rows=1, seed=7), id="one-row"),
+    pytest.param(dict(rows=2, seed=8), id="two-rows"),
+    pytest.param(dict(rows=9, seed=9), id="short"),
+])
+@pytest.mark.parametrize("length", [10, 5])
+def test_fisher_matches_reference(frame, length):
+    df = random_frame(**frame)
+    # math.log (Numba-compilable) vs np.log: fisher/trigger may differ in the last ulp
+    assert_identical(reference_fisher_transform(df, length), compute_fisher_transform(df, length),
+                     last_ulp=('fisher', 'trigger'))
@@ -0,0 +1,11 @@
+import socket
+import asyncio
+from live_feed import LiveFeed
+
+
+def test_serve_returns_when_the_port_is_taken():
+    with socket.socket() as taken:
+        taken.bind(("127.0.0.1", 0))
+        taken.listen()
+        feed = LiveFeed({}, port=taken.getsockname()[1])
+        assert asyncio.run(asyncio.wait_for(feed.serve(), 5)) is None
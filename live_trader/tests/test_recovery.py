@@ -0,0 +1,74 @@
+import asyncio
+import datetime
+import numpy as np
+import pandas as pd
+import clock
+from instrument_manager import init_instrument_data
+from computation.indicators import compute_indicators_for_instrument
+from decision import signals
+from decision.monitoring import handle_position_logic
+from storage.signal_journal import SignalJournal
+from storage.position_snapshots import PositionSnapshotWriter
+from storage.recovery import recover_session
+
+TOKEN = 256265
+RUN_ID = "20250602_091500"
+
+
+class SteppingClock(clock.ReplayClock):
+    """Every now() call is 10ms later, like the wall clock across the awaits in handle_position_logic"""
+
+    def now(self):
+        self.current += datetime.timedelta(milliseconds=10)
+        return self.current
+
+
+def candles(rows=40):
+    rng = np.random.default_rng(7)
+    close = 20000 + np.cumsum(rng.normal(0, 15, rows))
+    return pd.DataFrame({
+        'date': pd.date_range("2025-06-02 09:15", periods=rows, freq="5min", tz="Asia/Kolkata"),
+        'open': close, 'high': close + 20, 'low': close - 20, 'close': close, 'volume': 100,
+    })
+
+
+def new_registry(df):
+    registry = {}
+    init_instrument_data(TOKEN, "NSE:NIFTY 50", intraday_df=df, registry=registry)
+    compute_indicators_for_instrument(registry, TOKEN, 'intraday')
+    return registry
+
+
+def test_resume_restores_live_entry_state(tmp_path):
+    df = candles()
+    instrument_data = new_registry(df)
+    journal = SignalJournal(str(tmp_path / "journal" / f"signals_{RUN_ID}.jsonl"))
+    snapshots = PositionSnapshotWriter(str(tmp_path / "snapshots" / f"positions_{RUN_ID}.jsonl"))
+    previous = clock.set_clock(SteppingClock(datetime.datetime(2025, 6, 2, 12, 35, 0, 617425)))
+    signals.signal_listeners.append(journal.append)
+    try:
+        ltp = float(df['close'].iloc[-1])
+        for step in range(4):
+            price = ltp + 5 * step
+            price_cache = {TOKEN: {'ltp': price, 'best_bid': price - 1, 'best_ask': price + 1}}
+            asyncio.run(handle_position_logic(None, instrument_data, TOKEN, price_cache=price_cache))
+        snapshots.save(instrument_data)
+    finally:
+        signals.signal_listeners.remove(journal.append)
+        clock.set_clock(previous)
+        journal.close()
+        snapshots.close()
+
+    live = instrument_data[TOKEN]
+    assert live['position'] and len(live['signals']) == 1
+    assert live['signals'].last().timestamp == live['position_data']['entry_time']
+
+    resumed = new_registry(df)
+    assert recover_session(resumed, RUN_ID, str(tmp_path / "journal"), str(tmp_path / "snapshots")) == 1
+    restored = resumed[TOKEN]['position_data']
+    assert resumed[TOKEN]['position'] == live['position']
+    assert restored['entry_time'] == live['position_data']['entry_time']
+    extreme = 'highest_price' if live['position'] == 'LONG' else 'lowest_price'
+    assert restored[extreme] == live['position_data'][extreme]
+    assert list(restored['profit_history']) == list(live['position_data']['profit_history'])
+    assert len(restored['supertrend_history']) == 5  # entry value + one per evaluation
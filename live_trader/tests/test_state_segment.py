@@ -0,0 +1,81 @@
+import os
+import time
+import multiprocessing
+from history_buffer import HistoryBuffer
+from storage.state_segment import StateSegmentReader, StateSegmentWriter
+
+
+def instruments(price):
+    return {256265: {'position': 'LONG', 'position_data': {
+        'entry_price': price, 'profit_history': HistoryBuffer.from_values([1.0, 2.0])}}}
+
+
+def test_reader_waits_for_an_empty_segment(tmp_path):
+    path = str(tmp_path / "engine_state.bin")
+    reader = StateSegmentReader(path)
+    assert reader.read() is None  # missing
+    open(path, "wb").close()
+    assert reader.read() is None  # created, not sized yet
+    writer = StateSegmentWriter(path, size=1 << 16)
+    writer.publish(instruments(100.0))
+    assert reader.read()['positions']['256265']['entry_price'] == 100.0
+    writer.close()
+    reader.close()
+
+
+def test_reader_follows_a_recreated_segment(tmp_path):
+    path = str(tmp_path / "engine_state.bin")
+    writer = StateSegmentWriter(path, size=1 << 16)
+    writer.publish(instruments(100.0))
+    reader = StateSegmentReader(path)
+    assert reader.read()['positions']['256265']['entry_price'] == 100.0
+
+    # Engine restart that removes the old segment: new inode, sequence numbers start over
+    writer.close()
+    os.remove(path)
+    writer = StateSegmentWriter(path, size=1 << 17)
+    writer.publish(instruments(200.0))
+    state = reader.read()
+    assert state['positions']['256265']['entry_price'] == 200.0
+    assert list(state['positions']['256265']['profit_history']) == [1.0, 2.0]
+    writer.close()
+    reader.close()
+
+
+def _publish_forever(path, stop):
+    writer = StateSegmentWriter(path, size=1 << 20)
+    price = 0
+    while not stop.is_set():
+        price += 1
+        # Payload length changes on every publish, so a stale length would tear the JSON
+        writer.publish({256265: {'position': 'LONG', 'position_data': {
+            'entry_price': float(price), 'note': 'x' * (price % 97),
+            'profit_history': HistoryBuffer.from_values([float(price)] * (price % 13 + 1))}}})
+    writer.close()
+
+
+def test_reader_never_sees_a_torn_state(tmp_path):
+    path = str(tmp_path / "engine_state.bin")
+    StateSegmentWriter(path, size=1 << 20).close()
+    context = multiprocessing.get_context("fork")
+    stop = context.Event()
+    writer = context.Process(target=_publish_forever, args=(path, stop))
+    writer.start()
+    reader = StateSegmentReader(path, retries=10_000)
+    reads = 0
+    try:
+        deadline = time.monotonic() + 1.5
+        while time.monotonic() < deadline:
+            state = reader.read()
+            if state is None:
+                continue
+            entry = state['positions']['256265']
+            price = entry['entry_price']
+            assert entry['note'] == 'x' * (int(price) % 97)
+            assert list(entry['profit_history']) == [price] * (int(price) % 13 + 1)
+            reads += 1
+    finally:
+        stop.set()
+        writer.join(5)
+        reader.close()
+    assert reads > 0
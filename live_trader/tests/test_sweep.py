@@ -0,0 +1,48 @@
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+from backtest import sweep
+from backtest.replay import run_replay
+
+TOKEN = 256265
+SYMBOLS = {TOKEN: "NSE:NIFTY 50"}
+START = "2025-06-03 09:15"
+
+
+def session_candles(days=3, tz=None):
+    rng = np.random.default_rng(11)
+    dates = pd.DatetimeIndex([])
+    for day in pd.bdate_range("2025-06-02", periods=days):
+        dates = dates.append(pd.date_range(day + pd.Timedelta("09:15:00"), periods=75, freq="5min"))
+    if tz is not None:
+        dates = dates.tz_localize("Asia/Kolkata").tz_convert(tz)
+    close = 20000 + np.cumsum(rng.normal(0, 25, len(dates)))
+    return pd.DataFrame({
+        'date': dates, 'open': close, 'high': close + 30, 'low': close - 30, 'close': close, 'volume': 100.0,
+    })
+
+
+@pytest.mark.parametrize("tz", [None, "Asia/Kolkata", "UTC"])
+def test_worker_replay_matches_direct_replay(tz):
+    candles = {TOKEN: session_candles(tz=tz)}
+    direct, _ = asyncio.run(run_replay(candles, SYMBOLS, START))
+
+    blocks, layout = sweep.pack_candles(candles)
+    try:
+        sweep._attach(layout, SYMBOLS, START, None, 0.0)
+        worker_candles = sweep._worker['candles']
+        assert worker_candles[TOKEN]['date'].iloc[0] == pd.Timestamp("2025-06-02 09:15", tz="Asia/Kolkata")
+        worker, _ = asyncio.run(run_replay(worker_candles, SYMBOLS, START))
+        _, stats = sweep._evaluate({})
+    finally:
+        for block in sweep._worker.pop('blocks', []):
+            block.close()
+        sweep._worker.clear()
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    assert len(direct) > 0
+    pd.testing.assert_frame_equal(worker, direct)
+    assert stats == sweep.score_signals(direct, {TOKEN: float(candles[TOKEN]['close'].iloc[-1])})
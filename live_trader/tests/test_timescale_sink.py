@@ -0,0 +1,62 @@
+import asyncio
+import contextlib
+from storage import timescale_sink
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def copy_records_to_table(self, table, records, columns):
+        if self.pool.failures:
+            self.pool.failures -= 1
+            raise ConnectionError("database down")
+        self.pool.rows.setdefault(table, []).extend(records)
+
+
+class FakePool:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.rows = {}
+
+    @contextlib.asynccontextmanager
+    async def acquire(self):
+        yield FakeConnection(self)
+
+    async def close(self):
+        pass
+
+
+def new_sink(monkeypatch, pool, **kwargs):
+    monkeypatch.setattr(timescale_sink, 'ASYNCPG_AVAILABLE', True)
+    sink = timescale_sink.TimescaleSink(config={}, **kwargs)
+    sink.pool = pool
+    return sink
+
+
+async def cancel_then_close(sink, rows, wait):
+    for i in range(rows):
+        sink.offer('candles', (i,))
+    sink.offer('ticks', ('tick',))
+    writer = asyncio.create_task(sink.run())
+    await asyncio.sleep(wait)
+    writer.cancel()
+    await asyncio.gather(writer, return_exceptions=True)
+    assert sink.queue.empty()  # everything was already taken by the writer
+    await sink.close()
+
+
+def test_close_flushes_rows_held_during_the_flush_sleep(monkeypatch):
+    pool = FakePool()
+    sink = new_sink(monkeypatch, pool, flush_interval=60)
+    asyncio.run(cancel_then_close(sink, 5, wait=0.05))
+    assert pool.rows == {'candles': [(i,) for i in range(5)], 'ticks': [('tick',)]}
+    assert sink.stats['written'] == 6 and sink.stats['dropped'] == 0
+
+
+def test_close_flushes_rows_held_during_a_retry(monkeypatch):
+    pool = FakePool(failures=1)
+    sink = new_sink(monkeypatch, pool, flush_interval=0)
+    asyncio.run(cancel_then_close(sink, 5, wait=0.05))
+    assert pool.rows == {'candles': [(i,) for i in range(5)], 'ticks': [('tick',)]}
+    assert sink.stats['written'] == 6 and sink.stats['errors'] == 1
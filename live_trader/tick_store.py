@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+
+DEPTH_LEVELS = 5
+TICK_CAPACITY = 30_000  # ~8 hours of MODE_FULL ticks at one per second
+
+TICK_DTYPE = np.dtype([
+    ('exchange_timestamp', 'M8[ns]'),
+    ('last_trade_time', 'M8[ns]'),
+    ('last_price', 'f8'),
+    ('last_traded_quantity', 'i8'),
+    ('average_traded_price', 'f8'),
+    ('volume_traded', 'i8'),
+    ('total_buy_quantity', 'i8'),
+    ('total_sell_quantity', 'i8'),
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+    ('change', 'f8'),
+    ('oi', 'i8'),
+    ('oi_day_high', 'i8'),
+    ('oi_day_low', 'i8'),
+    ('depth_buy_price', 'f8', (DEPTH_LEVELS,)),
+    ('depth_buy_quantity', 'i4', (DEPTH_LEVELS,)),
+    ('depth_buy_orders', 'i4', (DEPTH_LEVELS,)),
+    ('depth_sell_price', 'f8', (DEPTH_LEVELS,)),
+    ('depth_sell_quantity', 'i4', (DEPTH_LEVELS,)),
+    ('depth_sell_orders', 'i4', (DEPTH_LEVELS,)),
+])
+
+_NAT = np.datetime64('NaT', 'ns')
+_EMPTY_LEVEL = (0.0, 0, 0)
+
+
+def _timestamp(value):
+    return _NAT if value is None else np.datetime64(value, 'ns')
+
+
+def _depth(levels):
+    """Fixed-width (prices, quantities, orders) for one side of the book"""
+    levels = (levels or [])[:DEPTH_LEVELS]
+    rows = [(level.get('price', 0.0), level.get('quantity', 0), level.get('orders', 0)) for level in levels]
+    rows += [_EMPTY_LEVEL] * (DEPTH_LEVELS - len(rows))
+    prices, quantities, orders = zip(*rows)
+    return prices, quantities, orders
+
+
+def tick_to_record(tick):
+    """One KiteTicker tick dict as a TICK_DTYPE tuple"""
+    ohlc = tick.get('ohlc') or {}
+    depth = tick.get('depth') or {}
+    buy_price, buy_qty, buy_orders = _depth(depth.get('buy'))
+    sell_price, sell_qty, sell_orders = _depth(depth.get('sell'))
+    return (
+        _timestamp(tick.get('exchange_timestamp')),
+        _timestamp(tick.get('last_trade_time')),
+        tick.get('last_price') or 0.0,
+        tick.get('last_traded_quantity') or 0,
+        tick.get('average_traded_price') or 0.0,
+        tick.get('volume_traded') or 0,
+        tick.get('total_buy_quantity') or 0,
+        tick.get('total_sell_quantity') or 0,
+        ohlc.get('open', 0.0),
+        ohlc.get('high', 0.0),
+        ohlc.get('low', 0.0),
+        ohlc.get('close', 0.0),
+        tick.get('change') or 0.0,
+        tick.get('oi') or 0,
+        tick.get('oi_day_high') or 0,
+        tick.get('oi_day_low') or 0,
+        buy_price, buy_qty, buy_orders,
+        sell_price, sell_qty, sell_orders,
+    )
+
+
+class TickBuffer:
+    """Fixed-capacity structured ring buffer of ticks for one instrument.
+
+    Storage is preallocated as capacity + slack records. When the write
+    cursor hits the end the newest `capacity` records are moved to the
+    front, so the live window is always one contiguous slice and tail()
+    returns views; the move costs O(capacity) once per `slack` appends.
+    Views are valid until the next append.
+    """
+
+    def __init__(self, capacity=TICK_CAPACITY, slack=None):
+        self.capacity = capacity
+        self.slack = slack or max(1, capacity // 4)
+        self._records = np.zeros(capacity + self.slack, dtype=TICK_DTYPE)
+        self._start = 0
+        self._end = 0
+        self.total = 0  # ticks ever appended, including evicted ones
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    def _make_room(self, n):
+        if self._end + n > len(self._records):
+            keep = min(len(self), self.capacity - n)
+            self._records[:keep] = self._records[self._end - keep:self._end]
+            self._start, self._end = 0, keep
+        overflow = len(self) + n - self.capacity
+        if overflow > 0:
+            self._start += overflow
+
+    def append_many(self, ticks):
+        """Append a batch of tick dicts for this instrument"""
+        ticks = ticks[-self.capacity:]
+        n = len(ticks)
+        if not n:
+            return 0
+        self._make_room(n)
+        for i, tick in enumerate(ticks, start=self._end):
+            self._records[i] = tick_to_record(tick)
+        self._end += n
+        self.total += n
+        return n
+
+    def tail(self, n=None):
+        """Zero-copy view of the newest n ticks (all when n is None)"""
+        start = self._start if n is None else max(self._start, self._end - n)
+        return self._records[start:self._end]
+
+    def last(self):
+        """Newest tick record, or None"""
+        return self._records[self._end - 1] if len(self) else None
+
+    def frame(self, n=None):
+        """DataFrame copy of the newest n ticks (depth levels as array columns)"""
+        records = self.tail(n)
+        data = {}
+        for name in TICK_DTYPE.names:
+            column = records[name]
+            data[name] = list(column) if column.ndim > 1 else column.copy()
+        return pd.DataFrame(data)